@@ -21,6 +21,7 @@ from trimesh import Scene
 
 from infinigen.core import tagging
 from infinigen.core.util import blender as butil
+from infinigen.core.util import profiling
 
 logger = logging.getLogger(__name__)
 
@@ -304,6 +305,7 @@ def col_from_subset(scene, names, tags=None, bvh_cache=None):
         tag_key = frozenset(tags) if tags is not None else None
         key = (frozenset(names), tag_key)
         res = bvh_cache.get(key)
+        profiling.record_cache("bvh_cache", res is not None)
         if res is not None:
             return res
 
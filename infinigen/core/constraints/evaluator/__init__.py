@@ -1,2 +1,3 @@
 from .eval_memo import evict_memo_for_move, evict_memo_for_obj, memo_key
+from .eval_plan import EvalPlan, compile_problem, evaluate_plan, evict_item_memo
 from .evaluate import EvalResult, evaluate_node, evaluate_problem, viol_count
@@ -80,8 +80,12 @@ def reset_bvh_cache(state, filter_name=None):
 
 
 def evict_memo_for_move(
-    problem: cl.Problem, state: State, memo: dict, move: moves.Move
+    problem: cl.Problem, state: State, memo: dict, move: moves.Move, plan=None
 ):
+    """
+    plan: optional eval_plan.EvalPlan compiled from `problem`, used to evict in a single pass
+    """
+
     match move:
         case (
             moves.TranslateMove(names)
@@ -93,7 +97,10 @@ def evict_memo_for_move(
         ):
             for name in names:
                 assert name is not None, move
-                evict_memo_for_obj(problem, memo, state.objs[name])
+                if plan is not None:
+                    plan.evict_memo_for_obj(memo, state.objs[name])
+                else:
+                    evict_memo_for_obj(problem, memo, state.objs[name])
                 reset_bvh_cache(state, filter_name=name)
         case moves.Deletion(name):
             # TODO hack - delete everything since we cant evict for specific obj after it has ben deleted
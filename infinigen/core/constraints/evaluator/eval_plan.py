@@ -0,0 +1,571 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+"""
+Compile a cl.Problem once into a flat list of slots, so that repeated evaluation
+(e.g. once per SimulatedAnnealingSolver step) does not need to re-dispatch on node types,
+re-walk node.children() or copy the whole memo for every quantified object.
+
+Values for nodes which do not depend on any quantified variable are stored in the usual
+`memo` dict under eval_memo.memo_key, so lazy eviction via eval_memo works unchanged.
+Values which depend on a quantified variable are stored in a small per-iteration frame.
+
+Optionally, the predicate of each unquantified loop can also be cached per object in an
+`item_memo`, alongside the names of the objects it read, so that a move which only
+changes a few objects (e.g. FloorPlanSolver perturbing one room) only re-scores the loop
+bodies which touched them. See evict_item_memo.
+"""
+
+import logging
+import operator
+import typing
+from dataclasses import dataclass, field
+
+from infinigen.core import tags as t
+from infinigen.core.constraints import constraint_language as cl
+from infinigen.core.constraints import reasoning as r
+from infinigen.core.constraints.evaluator import eval_memo, evaluate, node_impl
+from infinigen.core.constraints.example_solver.state_def import ObjectState, State
+from infinigen.core.util import profiling
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PlanNode:
+    node: cl.Node
+    key: typing.Hashable  # eval_memo.memo_key(node)
+    kind: str
+    children: list[tuple[str, int]]
+
+    # id() of the innermost quantifier binding one of our free variables, None if unquantified
+    scope: int | None = None
+    free_vars: frozenset = frozenset()
+
+    impl: typing.Callable = None
+    impl_kwargs: dict = field(default_factory=dict)
+
+    # set if this node can be computed for every object of its quantifier in one call
+    batched_impl: typing.Callable = None
+
+    viol_kind: str = None
+
+
+@dataclass
+class EvalPlan:
+    problem: cl.Problem
+    nodes: list[PlanNode]  # topologically sorted, every child slot precedes its parent
+    score_slots: dict[str, int]
+    constraint_slots: dict[str, int]
+
+    _relevance_filter: r.Domain = None
+    _relevance: dict[int, bool] = field(default_factory=dict)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def relevant(self, i: int, filter: r.Domain | None) -> bool:
+        if filter is None:
+            return True
+        if filter is not self._relevance_filter:
+            self._relevance_filter = filter
+            self._relevance = {}
+        res = self._relevance.get(i)
+        if res is None:
+            res = evaluate.relevant(self.nodes[i].node, filter)
+            self._relevance[i] = res
+        return res
+
+    def evict_memo_for_obj(self, memo: dict, obj: ObjectState):
+        """
+        Equivalent to eval_memo.evict_memo_for_obj(self.problem, ...), but does one pass
+        over the topologically sorted slots rather than re-walking shared subtrees
+        """
+
+        affected = [False] * len(self.nodes)
+        for i, pn in enumerate(self.nodes):
+            match pn.kind:
+                case "scene":
+                    res = True
+                case _:
+                    res = any(affected[c] for _, c in pn.children)
+                    if res and isinstance(pn.node, cl.tagged):
+                        res = t.implies(obj.tags, pn.node.tags)
+            affected[i] = res
+            if res and pn.key in memo:
+                del memo[pn.key]
+
+
+def _node_kind(node: cl.Node) -> str:
+    match node:
+        case cl.scene():
+            return "scene"
+        case cl.ForAll() | cl.SumOver() | cl.MeanOver():
+            return "quantifier"
+        case cl.item():
+            return "item"
+        case cl.Node() if node.__class__ in node_impl.node_impls:
+            return "impl"
+        case cl.Problem():
+            return "problem"
+        case cl.debugprint():
+            return "debugprint"
+        case _:
+            return "unsupported"
+
+
+def _viol_kind(node: cl.Node) -> str:
+    # must match the case order of evaluate.viol_count
+    match node:
+        case cl.BoolOperatorExpression(operator.and_, _):
+            return "and"
+        case cl.in_range():
+            return "in_range"
+        case cl.BoolOperatorExpression(operator.eq, [_, _]):
+            return "eq"
+        case cl.ForAll():
+            return "forall"
+        case cl.BoolOperatorExpression(
+            operator.ge | operator.le | operator.gt | operator.lt, [_, _]
+        ):
+            return "compare"
+        case cl.constant(val) if isinstance(val, bool):
+            return "constant"
+        case cl.BoolOperatorExpression(operator.or_, [_, _]):
+            return "or"
+        case cl.BoolOperatorExpression(operator.not_, [_]):
+            return "not"
+        case _:
+            return "value"
+
+
+def compile_problem(problem: cl.Problem, batched=True) -> EvalPlan:
+    """
+    batched: use node_impl.batched_node_impls for geometry relations between a quantified
+        object and an unquantified set, e.g. `objs.sum(lambda o: cl.distance(o, others))`
+    """
+
+    nodes: list[PlanNode] = []
+    slots: dict[int, int] = {}
+    quantifiers: dict[int, PlanNode] = {}
+
+    def visit(node: cl.Node, binders: dict[str, tuple[int, int]]) -> int:
+        # binders maps var name -> (nesting depth, id of binding quantifier)
+
+        if (i := slots.get(id(node))) is not None:
+            pn = nodes[i]
+            if _resolve_scope(pn.free_vars, binders) != pn.scope:
+                raise ValueError(
+                    f"{compile_problem.__name__} found {node.__class__.__name__} shared "
+                    f"between different quantifier scopes, cannot compile"
+                )
+            return i
+
+        kind = _node_kind(node)
+        children = []
+        free_vars = set()
+
+        if kind == "quantifier":
+            assert isinstance(node.var, str)
+            objs_slot = visit(node.objs, binders)
+            depth = max((d for d, _ in binders.values()), default=0) + 1
+            inner = dict(binders)
+            inner[node.var] = (depth, id(node))
+            pred_slot = visit(node.pred, inner)
+            children = [("objs", objs_slot), ("pred", pred_slot)]
+            free_vars |= nodes[objs_slot].free_vars
+            free_vars |= nodes[pred_slot].free_vars - {node.var}
+        else:
+            for name, c in node.children():
+                ci = visit(c, binders)
+                children.append((name, ci))
+                free_vars |= nodes[ci].free_vars
+            if kind == "item":
+                free_vars.add(node.name)
+
+        free_vars = frozenset(free_vars)
+        pn = PlanNode(
+            node=node,
+            key=eval_memo.memo_key(node),
+            kind=kind,
+            children=children,
+            scope=_resolve_scope(free_vars, binders),
+            free_vars=free_vars,
+            viol_kind=_viol_kind(node),
+        )
+        if kind == "impl":
+            pn.impl = node_impl.node_impls[node.__class__]
+            if hasattr(node, "others_tags"):
+                pn.impl_kwargs["others_tags"] = getattr(node, "others_tags")
+        elif kind == "quantifier":
+            quantifiers[id(node)] = pn
+
+        slots[id(node)] = len(nodes)
+        nodes.append(pn)
+        return slots[id(node)]
+
+    score_slots = {k: visit(v, {}) for k, v in problem.score_terms.items()}
+    constraint_slots = {k: visit(v, {}) for k, v in problem.constraints.items()}
+
+    if batched:
+        for pn in nodes:
+            if _batchable(pn, nodes, quantifiers):
+                pn.batched_impl = node_impl.batched_node_impls[pn.node.__class__]
+
+    logger.debug(
+        f"{compile_problem.__name__} produced {len(nodes)} slots for "
+        f"{len(score_slots)=} {len(constraint_slots)=}, "
+        f"{sum(pn.batched_impl is not None for pn in nodes)} batched"
+    )
+
+    return EvalPlan(
+        problem=problem,
+        nodes=nodes,
+        score_slots=score_slots,
+        constraint_slots=constraint_slots,
+    )
+
+
+def _batchable(pn: PlanNode, nodes: list[PlanNode], quantifiers: dict) -> bool:
+    # only relations of the form f(item, others), where others does not depend on the item
+
+    if pn.kind != "impl" or pn.node.__class__ not in node_impl.batched_node_impls:
+        return False
+    if pn.scope is None:
+        return False
+
+    quantifier = quantifiers[pn.scope].node
+    for name, c in pn.children:
+        child = nodes[c]
+        if name == "objs":
+            if not (child.kind == "item" and child.node.name == quantifier.var):
+                return False
+        elif child.scope == pn.scope:
+            return False
+    return True
+
+
+def _resolve_scope(free_vars: frozenset, binders: dict) -> int | None:
+    bound = [binders[v] for v in free_vars if v in binders]
+    if len(bound) == 0:
+        return None
+    return max(bound)[1]
+
+
+_ITEM_MEMO = "item_memo"
+
+
+@dataclass
+class _ItemEntry:
+    value: typing.Any
+    accessed: set  # object names the predicate looked up
+    root_inputs: dict  # slot -> value, for every unquantified slot the predicate read
+
+
+class _RecordingObjs:
+    def __init__(self, objs: dict, accessed: set):
+        self._objs = objs
+        self._accessed = accessed
+
+    def __getitem__(self, name):
+        self._accessed.add(name)
+        return self._objs[name]
+
+    def get(self, name, default=None):
+        self._accessed.add(name)
+        return self._objs.get(name, default)
+
+    def __contains__(self, name):
+        return name in self._objs
+
+    def __iter__(self):
+        return iter(self._objs)
+
+    def __len__(self):
+        return len(self._objs)
+
+    def __getattr__(self, name):
+        # items() / keys() / values() only enumerate, they are not recorded
+        return getattr(self._objs, name)
+
+
+class _RecordingState:
+    """
+    Forwards to a State, remembering which objects were looked up by name via
+    state[name] or state.objs[name]
+    """
+
+    def __init__(self, state: State):
+        self._state = state
+        self.accessed = set()
+        self.root_inputs = {}
+        self.objs = _RecordingObjs(state.objs, self.accessed)
+
+    def __getitem__(self, name):
+        self.accessed.add(name)
+        return self._state[name]
+
+    def __getattr__(self, name):
+        return getattr(self._state, name)
+
+
+def evict_item_memo(item_memo: dict, names: typing.Iterable[str]):
+    """
+    Drop every cached loop predicate which read any of `names`
+    """
+
+    names = set(names)
+    if len(names) == 0:
+        return
+    for k in [k for k, e in item_memo.items() if not e.accessed.isdisjoint(names)]:
+        del item_memo[k]
+
+
+def _unchanged(a, b) -> bool:
+    if a is b:
+        return True
+    try:
+        return bool(a == b)
+    except ValueError:  # e.g. numpy arrays
+        return False
+
+
+class _QuantifierFrame(dict):
+    """
+    Values for one object of a quantifier loop. Results of batched impls are computed once
+    for every object in the loop and shared between all frames of that loop
+    """
+
+    def __init__(self, var: str, objs: list, index: int, batched: dict):
+        super().__init__({var: {objs[index]}})
+        self.var = var
+        self.objs = objs
+        self.index = index
+        self.batched = batched
+
+
+def _quantifier_frames(plan: EvalPlan, pn: PlanNode, state: State, frames: dict):
+    objs_slot = pn.children[0][1]
+    objs = list(_value(plan, objs_slot, state, frames))
+    batched = {}
+    for j in range(len(objs)):
+        sub = dict(frames)
+        sub[id(pn.node)] = _QuantifierFrame(pn.node.var, objs, j, batched)
+        yield sub
+
+
+def _value(plan: EvalPlan, i: int, state: State, frames: dict):
+    pn = plan.nodes[i]
+    frame = frames[pn.scope]
+    cached = pn.key in frame
+    if pn.scope is None:
+        profiling.record_cache("eval_memo", cached)
+    if cached:
+        val = frame[pn.key]
+    # batched results are shared between loop objects, so cannot be attributed to one item
+    elif pn.batched_impl is not None and not isinstance(state, _RecordingState):
+        val = frame[pn.key] = _batched_value(plan, i, state, frames)
+    else:
+        val = frame[pn.key] = _compute(plan, pn, state, frames)
+    if pn.scope is None and isinstance(state, _RecordingState):
+        state.root_inputs[i] = val
+    return val
+
+
+def _pred_value(
+    plan: EvalPlan, pn: PlanNode, pred_slot: int, state: State, frames: dict
+):
+    item_memo = frames.get(_ITEM_MEMO)
+    if item_memo is None or pn.scope is not None:
+        return _value(plan, pred_slot, state, frames)
+
+    frame = frames[id(pn.node)]
+    key = (pred_slot, frame.objs[frame.index])
+    recorder = state if isinstance(state, _RecordingState) else None
+    base = state._state if recorder is not None else state
+
+    entry = item_memo.get(key)
+    if entry is not None and not all(
+        _unchanged(_value(plan, s, base, frames), v)
+        for s, v in entry.root_inputs.items()
+    ):
+        entry = None
+    profiling.record_cache("item_memo", entry is not None)
+    if entry is None:
+        rec = _RecordingState(base)
+        val = _value(plan, pred_slot, rec, frames)
+        entry = item_memo[key] = _ItemEntry(val, rec.accessed, rec.root_inputs)
+
+    if recorder is not None:
+        # we are nested inside another cached predicate, which depends on everything we read
+        recorder.accessed |= entry.accessed
+        recorder.root_inputs.update(entry.root_inputs)
+
+    return entry.value
+
+
+def _batched_value(plan: EvalPlan, i: int, state: State, frames: dict):
+    pn = plan.nodes[i]
+    frame = frames[pn.scope]
+
+    vals = frame.batched.get(i)
+    if vals is None:
+        shared = {
+            name: _value(plan, c, state, frames)
+            for name, c in pn.children
+            if name != "objs"
+        }
+        child_vals_list = [dict(shared, objs={o}) for o in frame.objs]
+        vals = profiling.call_impl(
+            pn.batched_impl, pn.node, state, child_vals_list, **pn.impl_kwargs
+        )
+        assert len(vals) == len(frame.objs), (pn.node.__class__, len(vals))
+        frame.batched[i] = vals
+
+    return vals[frame.index]
+
+
+def _compute(plan: EvalPlan, pn: PlanNode, state: State, frames: dict):
+    match pn.kind:
+        case "impl":
+            child_vals = {
+                name: _value(plan, c, state, frames) for name, c in pn.children
+            }
+            return profiling.call_impl(
+                pn.impl, pn.node, state, child_vals, **pn.impl_kwargs
+            )
+        case "scene":
+            return set(k for k, v in state.objs.items() if v.active)
+        case "quantifier":
+            pred_slot = pn.children[1][1]
+            results = [
+                _pred_value(plan, pn, pred_slot, state, sub)
+                for sub in _quantifier_frames(plan, pn, state, frames)
+            ]
+            return evaluate.gather_funcs[pn.node.__class__](results)
+        case "item":
+            raise ValueError(
+                f"_compute_node_val encountered undefined variable {pn.node}. {frames[None].keys()}"
+            )
+        case "debugprint":
+            res = _value(plan, pn.children[0][1], state, frames)
+            var_assignments = [
+                frame[frame.var]
+                for frame in frames.values()
+                if isinstance(frame, _QuantifierFrame)
+            ]
+            print(f"cl.debugprint {pn.node.msg}: {res} {var_assignments}")
+            return res
+        case "problem":
+            raise TypeError(
+                f"evaluate_node is invalid for {pn.node}, please use evaluate_problem"
+            )
+        case _:
+            raise NotImplementedError(
+                f"Couldnt compute value for {type(pn.node)}, please add it to "
+                f"{node_impl.node_impls.keys()=} or add a specialcase"
+            )
+
+
+def _viol(plan: EvalPlan, i: int, state: State, frames: dict, filter: r.Domain):
+    pn = plan.nodes[i]
+    child_slots = [c for _, c in pn.children]
+
+    match pn.viol_kind:
+        case "and":
+            return sum(_viol(plan, c, state, frames, filter) for c in child_slots)
+        case "in_range":
+            (val,) = child_slots
+            val_res = _value(plan, val, state, frames)
+            low, high = pn.node.low, pn.node.high
+            if val_res < low:
+                res = low - val_res
+            elif val_res > high:
+                res = val_res - high
+            else:
+                res = 0
+            if not plan.relevant(val, filter):
+                res = 0
+            return res
+        case "eq":
+            lhs, rhs = child_slots
+            res = abs(
+                _value(plan, lhs, state, frames) - _value(plan, rhs, state, frames)
+            )
+            if not plan.relevant(lhs, filter) and not plan.relevant(rhs, filter):
+                res = 0
+            return res
+        case "forall":
+            pred_slot = child_slots[1]
+            viol = 0
+            for sub in _quantifier_frames(plan, pn, state, frames):
+                viol += _viol(plan, pred_slot, state, sub, filter)
+            return viol
+        case "compare":
+            lhs, rhs = child_slots
+            if not (plan.relevant(lhs, filter) or plan.relevant(rhs, filter)):
+                return 0
+            l_res = _value(plan, lhs, state, frames)
+            r_res = _value(plan, rhs, state, frames)
+            return evaluate._viol_count_binop(pn.node, l_res, r_res)
+        case "constant":
+            return 0 if pn.node.value else 1
+        case "or":
+            lhs, rhs = child_slots
+            # matches evaluate.viol_count, which does not pass filter through or_
+            return min(
+                _viol(plan, rhs, state, frames, None),
+                _viol(plan, lhs, state, frames, None),
+            )
+        case "not":
+            (lhs,) = child_slots
+            return 1 if _value(plan, lhs, state, frames) is True else 0
+        case _:
+            return _value(plan, i, state, frames)
+
+
+def evaluate_plan(
+    plan: EvalPlan,
+    state: State,
+    filter: r.Domain = None,
+    memo=None,
+    enable_loss=True,
+    enable_violated=True,
+    item_memo: dict = None,
+) -> evaluate.EvalResult:
+    """
+    Drop-in replacement for evaluate.evaluate_problem(plan.problem, ...), gives identical EvalResults
+
+    item_memo: optional dict caching loop predicates per object across calls. The caller must
+        evict_item_memo() every object modified since the last call, and clear it entirely
+        if objects are added / removed / retagged or if an impl reads objects other than
+        through state[name] / state.objs[name]
+    """
+
+    logger.debug(
+        f"Evaluating plan {len(plan.constraint_slots)=} {len(plan.score_slots)=}"
+    )
+
+    if memo is None:
+        memo = {}
+    frames = {None: memo}
+    if item_memo is not None:
+        frames[_ITEM_MEMO] = item_memo
+
+    scores = {}
+    if enable_loss:
+        for name, i in plan.score_slots.items():
+            profiling.set_term(name)
+            scores[name] = _value(plan, i, state, frames)
+
+    violated = {}
+    if enable_violated:
+        for name, i in plan.constraint_slots.items():
+            profiling.set_term(name)
+            violated[name] = _viol(plan, i, state, frames, filter)
+            if violated[name]:
+                logger.debug(f"Evaluator found {violated[name]} violations for {name=}")
+
+    profiling.set_term(None)
+    return evaluate.EvalResult(loss_vals=scores, violations=violated)
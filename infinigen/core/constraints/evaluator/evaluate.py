@@ -15,6 +15,7 @@ from infinigen.core.constraints import constraint_language as cl
 from infinigen.core.constraints import reasoning as r
 from infinigen.core.constraints.evaluator import eval_memo, node_impl
 from infinigen.core.constraints.example_solver.state_def import State
+from infinigen.core.util import profiling
 
 logger = logging.getLogger(__name__)
 
@@ -69,7 +70,7 @@ def _compute_node_val(node: cl.Node, state: State, memo: dict):
             kwargs = {}
             if hasattr(node, "others_tags"):
                 kwargs["others_tags"] = getattr(node, "others_tags")
-            return impl_func(node, state, child_vals, **kwargs)
+            return profiling.call_impl(impl_func, node, state, child_vals, **kwargs)
         case cl.Problem():
             raise TypeError(
                 f"evaluate_node is invalid for {node}, please use evaluate_problem"
@@ -207,7 +208,10 @@ def evaluate_node(node: cl.Node, state: State, memo=None):
     if memo is None:
         memo = {}
     elif k in memo:
+        profiling.record_cache("eval_memo", True)
         return memo[k]
+    else:
+        profiling.record_cache("eval_memo", False)
     val = _compute_node_val(node, state, memo)
 
     memo[k] = val
@@ -260,6 +264,7 @@ def evaluate_problem(
     if enable_loss:
         for name, score_node in problem.score_terms.items():
             logger.debug(f"Evaluating score for {name=}")
+            profiling.set_term(name)
             scores[name] = evaluate_node(score_node, state, memo)
             logger.debug(f"Evaluator got score {scores[name]} for {name=}")
 
@@ -267,9 +272,11 @@ def evaluate_problem(
     if enable_violated:
         for name, node in problem.constraints.items():
             logger.debug(f"Evaluating constraint {name=}")
+            profiling.set_term(name)
             violated[name] = viol_count(node, state, memo, filter=filter)
 
             if violated[name]:
                 logger.debug(f"Evaluator found {violated[name]} violations for {name=}")
 
+    profiling.set_term(None)
     return EvalResult(loss_vals=scores, violations=violated)
@@ -1,2 +1,2 @@
 from . import rooms
-from .impl_bindings import node_impls
+from .impl_bindings import batched_node_impls, node_impls
@@ -25,6 +25,10 @@ logger = logging.getLogger(__name__)
 
 node_impls = {}
 
+# optional impls which evaluate a node for every object of a quantifier at once.
+# called as func(cons, state, child_vals_list, **kwargs) and must return one value per child_vals
+batched_node_impls = {}
+
 
 def statenames_to_blnames(state, names):
     return [state.objs[n].obj.name for n in names]
@@ -38,6 +42,38 @@ def register_node_impl(node_cls):
     return decorator
 
 
+def register_batched_node_impl(node_cls):
+    def decorator(func):
+        batched_node_impls[node_cls] = func
+        return func
+
+    return decorator
+
+
+def _batched_name_pairs(state, child_vals_list: list[dict]):
+    return [
+        (
+            statenames_to_blnames(state, child_vals["objs"]),
+            statenames_to_blnames(state, child_vals["others"]),
+        )
+        for child_vals in child_vals_list
+    ]
+
+
+def _call_nonempty_pairs(func, pairs, empty_val=0, need_others=True):
+    # run func on only the pairs where both sides (or just a, if not need_others) are nonempty,
+    # fill the rest with empty_val
+    idxs = [
+        i for i, (a, b) in enumerate(pairs) if len(a) and (len(b) or not need_others)
+    ]
+    results = [empty_val] * len(pairs)
+    if len(idxs) == 0:
+        return results
+    for i, res in zip(idxs, func([pairs[i] for i in idxs])):
+        results[i] = res
+    return results
+
+
 def generic_impl_interface(cons: cl.Node, state: state_def.State, child_vals: dict):
     pass
 
@@ -107,6 +143,24 @@ def accessibility_impl(
     return res
 
 
+@register_batched_node_impl(cl.accessibility_cost)
+def accessibility_batched_impl(
+    cons: cl.accessibility_cost,
+    state: state_def.State,
+    child_vals_list: list[dict],
+):
+    return _call_nonempty_pairs(
+        lambda pairs: trimesh_geometry.accessibility_cost_cuboid_penetration_batched(
+            state.trimesh_scene,
+            pairs,
+            cons.normal,
+            cons.dist,
+            bvh_cache=state.bvh_cache,
+        ),
+        _batched_name_pairs(state, child_vals_list),
+    )
+
+
 @register_node_impl(cl.distance)
 def min_distance_impl(
     cons: cl.Node, state: state_def.State, child_vals: dict, others_tags: set = None
@@ -134,6 +188,29 @@ def min_distance_impl(
     return res.dist
 
 
+@register_batched_node_impl(cl.distance)
+def min_distance_batched_impl(
+    cons: cl.distance,
+    state: state_def.State,
+    child_vals_list: list[dict],
+    others_tags: set = None,
+):
+    if others_tags is not None and len(others_tags) > 0:
+        # tagged distance queries need per-pair submeshes, no benefit from batching
+        return [
+            min_distance_impl(cons, state, child_vals, others_tags=others_tags)
+            for child_vals in child_vals_list
+        ]
+
+    dists = _call_nonempty_pairs(
+        lambda pairs: trimesh_geometry.min_dist_batched(
+            state.trimesh_scene, pairs, bvh_cache=state.bvh_cache
+        ),
+        _batched_name_pairs(state, child_vals_list),
+    )
+    return [max(d, 0) for d in dists]
+
+
 @register_node_impl(cl.min_distance_internal)
 def min_distance_internal_impl(
     cons: cl.min_distance_internal, state: state_def.State, child_vals: dict
@@ -182,9 +259,38 @@ def angle_alignment_impl(
     return trimesh_geometry.angle_alignment_cost(state, a, b, others_tags)
 
 
+@register_batched_node_impl(cl.angle_alignment_cost)
+def angle_alignment_batched_impl(
+    cons: cl.angle_alignment_cost,
+    state: state_def.State,
+    child_vals_list: list[dict],
+    others_tags: set = None,
+):
+    return _call_nonempty_pairs(
+        lambda pairs: trimesh_geometry.angle_alignment_cost_batched(
+            state, pairs, others_tags
+        ),
+        _batched_name_pairs(state, child_vals_list),
+    )
+
+
 @register_node_impl(cl.freespace_2d)
 def freespace_2d_impl(cons: cl.freespace_2d, state: state_def.State, child_vals: dict):
-    return trimesh_geometry.freespace_2d()
+    a = statenames_to_blnames(state, child_vals["objs"])
+    b = statenames_to_blnames(state, child_vals["others"])
+    return trimesh_geometry.freespace_2d(state.trimesh_scene, a, b)
+
+
+@register_batched_node_impl(cl.freespace_2d)
+def freespace_2d_batched_impl(
+    cons: cl.freespace_2d, state: state_def.State, child_vals_list: list[dict]
+):
+    # with no others all of objs is free, as in freespace_2d
+    return _call_nonempty_pairs(
+        lambda pairs: trimesh_geometry.freespace_2d_batched(state.trimesh_scene, pairs),
+        _batched_name_pairs(state, child_vals_list),
+        need_others=False,
+    )
 
 
 @register_node_impl(cl.rotational_asymmetry)
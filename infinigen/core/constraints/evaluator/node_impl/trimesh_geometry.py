@@ -8,15 +8,18 @@
 
 from __future__ import annotations
 
+import itertools
 import logging
 from dataclasses import dataclass
 from typing import Union
 
 import bpy
+import fcl
 import gin
 import matplotlib.pyplot as plt
 import networkx as nx
 import numpy as np
+import shapely
 import trimesh
 from mathutils import Vector
 from scipy.optimize import linear_sum_assignment
@@ -34,9 +37,6 @@ from infinigen.core.constraints.example_solver.geometry.parse_scene import add_t
 from infinigen.core.util import blender as butil
 from infinigen.core.util.logging import lazydebug
 
-# import fcl
-
-
 # from infinigen.core.tagging import tag_object,tag_system
 # from scipy.optimize import dual_annealing
 # from tqdm import tqdm
@@ -252,6 +252,84 @@ def min_dist(
     )
 
 
+def _aabb_gap_matrix(scene: Scene, names: list[str]) -> np.ndarray:
+    """
+    Lower bound on the distance between every pair of objects, from their world-space AABBs.
+    Trimesh geometry in the solver scene is kept in world space, so .bounds is already a world AABB
+    """
+    bounds = np.array([m.bounds for m in iu.meshes_from_names(scene, names)])
+    lo, hi = bounds[:, 0], bounds[:, 1]
+    gap = np.maximum(lo[None] - hi[:, None], lo[:, None] - hi[None])
+    return np.linalg.norm(np.maximum(gap, 0), axis=-1)
+
+
+def _batched_pair_candidates(scene: Scene, pairs: list[tuple[list[str], list[str]]]):
+    """
+    Run one many-to-many broad-phase over every object mentioned by `pairs`, then
+    yield (pair_idx, a_names, b_names, lower_bounds) with lower_bounds sorted ascending
+    """
+    names = sorted({n for a, b in pairs for n in (*a, *b)})
+    if len(names) == 0:
+        return
+    index = {n: i for i, n in enumerate(names)}
+    lower = _aabb_gap_matrix(scene, names)
+
+    for i, (a, b) in enumerate(pairs):
+        ia = np.array([index[n] for n in a])
+        ib = np.array([index[n] for n in b])
+        lb = lower[np.ix_(ia, ib)].ravel()
+        order = np.argsort(lb, kind="stable")
+        a_names = [a[k // len(b)] for k in order]
+        b_names = [b[k % len(b)] for k in order]
+        yield i, a_names, b_names, lb[order]
+
+
+def min_dist_batched(
+    scene: Scene,
+    pairs: list[tuple[list[str], list[str]]],
+    bvh_cache: dict = None,
+) -> list[float]:
+    """
+    Equivalent to [min_dist(scene, a, b).dist for a, b in pairs], except for the exact
+    value of negative (penetrating) distances, which fcl does not compute consistently anyway
+
+    A single AABB broad-phase bounds every object pair, then fcl narrow-phase queries are run
+    in order of increasing bound until no remaining pair can be closer
+    """
+
+    results = [None] * len(pairs)
+
+    batch_pairs, batch_idxs = [], []
+    for i, (a, b) in enumerate(pairs):
+        a, b = list(a), list(b)
+        if len(a) == 1 and len(b) == 1 and a[0] == b[0]:
+            results[i] = 0
+            continue
+        if len(a) == 1 and len(b) > 1 and a[0] in b:
+            b.remove(a[0])
+        elif len(b) == 1 and len(a) > 1 and b[0] in a:
+            a.remove(b[0])
+        elif not set(a).isdisjoint(b):
+            # intra-set distance queries are left to the unbatched implementation
+            results[i] = min_dist(scene, a, b, bvh_cache=bvh_cache).dist
+            continue
+        batch_pairs.append((a, b))
+        batch_idxs.append(i)
+
+    request = fcl.DistanceRequest(enable_signed_distance=True)
+    for j, a_names, b_names, lower in _batched_pair_candidates(scene, batch_pairs):
+        best = np.inf
+        for a_name, b_name, lb in zip(a_names, b_names, lower):
+            if lb >= best or best <= 0:
+                break
+            oa, ob = iu.meshes_from_names(scene, [a_name, b_name])
+            d = fcl.distance(oa.col_obj, ob.col_obj, request, fcl.DistanceResult())
+            best = min(best, d)
+        results[batch_idxs[j]] = best
+
+    return results
+
+
 def contains(scene: Scene, a: str, b: str, tol=1e-6) -> bool:
     """
     Check if a contains b
@@ -404,6 +482,28 @@ def freespace_2d(
     return percent_available
 
 
+def freespace_2d_batched(
+    scene: trimesh.Scene, pairs: list[tuple[list[str], list[str]]]
+) -> list[float]:
+    """
+    Equivalent to [freespace_2d(scene, a, b) for a, b in pairs], but projects each object only once
+    """
+    areas = {}
+
+    def projected_area(name):
+        if name not in areas:
+            mesh = iu.meshes_from_names(scene, name)[0]
+            areas[name] = iu.project_to_xy_path2d(mesh).area
+        return areas[name]
+
+    results = []
+    for a, b in pairs:
+        total_projected_area = sum(projected_area(n) for n in b)
+        available_area = sum(projected_area(n) for n in a)
+        results.append(((available_area - total_projected_area) / available_area) * 100)
+    return results
+
+
 def rasterize_space_with_obstacles(
     scene,
     a: Union[str, list[str]],
@@ -578,6 +678,62 @@ def angle_alignment_cost_tagged(
     return res
 
 
+def projected_xy_edges(mesh: trimesh.Trimesh) -> list[LineString]:
+    """
+    Edges of the xy-projected outline of mesh, or of the mesh itself if it has no projected area
+    """
+    edges = []
+    poly = iu.project_to_xy_poly(mesh)
+    if (poly is not None) and (not poly.is_empty):
+        polys = poly.geoms if isinstance(poly, MultiPolygon) else [poly]
+        for sub_poly in polys:
+            coords = sub_poly.exterior.coords
+            for i, coord in enumerate(coords[:-1]):
+                start, end = coord, coords[i + 1]
+                if np.isclose(start, end).all():
+                    continue
+                edges.append(LineString([start, end]))
+    else:
+        for edge3d in mesh.edges:
+            start = mesh.vertices[edge3d[0]][:2]
+            end = mesh.vertices[edge3d[1]][:2]
+            if np.isclose(start, end).all():
+                continue
+            edges.append(LineString([start, end]))
+    return edges
+
+
+def _xy_centroid(mesh: trimesh.Trimesh, poly=None) -> Point:
+    if poly is not None:
+        return poly.centroid
+    return Point(mesh.vertices[:, :2].mean(axis=0))
+
+
+def _edge_normals(line: LineString):
+    dx = line.xy[0][1] - line.xy[0][0]  # x1 - x0
+    dy = line.xy[1][1] - line.xy[1][0]  # y1 - y0
+
+    # Candidate normal vectors (perpendicular to edge)
+    normal_vector_1 = np.array([dy, -dx])
+    normal_vector_2 = -normal_vector_1
+
+    # Normalize the vectors
+    normal_vector_1 /= np.linalg.norm(normal_vector_1)
+    normal_vector_2 /= np.linalg.norm(normal_vector_2)
+
+    return normal_vector_1, normal_vector_2
+
+
+def _edge_alignment_score(axis, normal_vector_1, normal_vector_2) -> float:
+    dot1 = np.dot(axis, normal_vector_1)
+    dot2 = np.dot(axis, normal_vector_2)
+
+    score1 = -dot1 / 2 + 0.5
+    score2 = -dot2 / 2 + 0.5
+
+    return min(score1, score2)
+
+
 def angle_alignment_cost_base(
     state: state_def.State,
     a: Union[str, list[str]],
@@ -593,28 +749,7 @@ def angle_alignment_cost_base(
     b_meshes = iu.meshes_from_names(scene, b)
     b_edges = []
     for b_name, b_mesh in zip(b, b_meshes):
-        b_poly = iu.project_to_xy_poly(b_mesh)
-        if (b_poly is not None) and (not b_poly.is_empty):
-            if isinstance(b_poly, Polygon):
-                for i, coord in enumerate(b_poly.exterior.coords[:-1]):
-                    start, end = coord, b_poly.exterior.coords[i + 1]
-                    if np.isclose(start, end).all():
-                        continue
-                    b_edges.append((LineString([start, end]), b_name))
-            elif isinstance(b_poly, MultiPolygon):
-                for sub_poly in b_poly.geoms:
-                    for i, coord in enumerate(sub_poly.exterior.coords[:-1]):
-                        start, end = coord, sub_poly.exterior.coords[i + 1]
-                        if np.isclose(start, end).all():
-                            continue
-                        b_edges.append((LineString([start, end]), b_name))
-        else:
-            for edge3d in b_mesh.edges:
-                start = b_mesh.vertices[edge3d[0]][:2]
-                end = b_mesh.vertices[edge3d[1]][:2]
-                if np.isclose(start, end).all():
-                    continue
-                b_edges.append((LineString([start, end]), b_name))
+        b_edges.extend((edge, b_name) for edge in projected_xy_edges(b_mesh))
 
     a_blender_objs = iu.blender_objs_from_names(a)
 
@@ -630,38 +765,15 @@ def angle_alignment_cost_base(
         _, axis = get_axis(state, a_obj)
         axis = axis[:2]
         a_poly = iu.project_to_xy_poly(a_mesh)
-
-        if a_poly is not None:
-            if isinstance(a_poly, Polygon):
-                a_centroid = a_poly.centroid
-            elif isinstance(a_poly, MultiPolygon):
-                a_centroid = a_poly.centroid
-        else:
-            a_centroid = Point(a_mesh.vertices[:, :2].mean(axis=0))
+        a_centroid = _xy_centroid(a_mesh, a_poly)
 
         filtered_b_edges = [edge for edge, b_name in b_edges if b_name != a_name]
         if len(filtered_b_edges) == 0:
             continue
         closest_line = iu.closest_edge_to_point_edge_list(filtered_b_edges, a_centroid)
 
-        dx = closest_line.xy[0][1] - closest_line.xy[0][0]  # x1 - x0
-        dy = closest_line.xy[1][1] - closest_line.xy[1][0]  # y1 - y0
-
-        # Candidate normal vectors (perpendicular to edge)
-        normal_vector_1 = np.array([dy, -dx])
-        normal_vector_2 = -normal_vector_1
-
-        # Normalize the vectors
-        normal_vector_1 /= np.linalg.norm(normal_vector_1)
-        normal_vector_2 /= np.linalg.norm(normal_vector_2)
-
-        dot1 = np.dot(axis, normal_vector_1)
-        dot2 = np.dot(axis, normal_vector_2)
-
-        score1 = -dot1 / 2 + 0.5
-        score2 = -dot2 / 2 + 0.5
-
-        score += min(score1, score2)
+        normal_vector_1, normal_vector_2 = _edge_normals(closest_line)
+        score += _edge_alignment_score(axis, normal_vector_1, normal_vector_2)
 
         if visualize:
             if a_poly is not None:
@@ -739,6 +851,68 @@ def angle_alignment_cost(
     return angle_alignment_cost_base(state, a, b, visualize)
 
 
+def angle_alignment_cost_batched(
+    state: state_def.State,
+    pairs: list[tuple[list[str], list[str]]],
+    b_tags=None,
+) -> list[float]:
+    """
+    Equivalent to [angle_alignment_cost(state, a, b, b_tags) for a, b in pairs].
+
+    Each b object is projected (and for b_tags, has its tagged surface extracted) only once,
+    and the closest edge search is a single vectorized shapely query per a object
+    """
+
+    scene = state.trimesh_scene
+    b_names = sorted({n for _, b in pairs for n in b})
+
+    surf_names = {}
+    if b_tags is not None:
+        for b_name, b_obj in zip(b_names, iu.blender_objs_from_names(b_names)):
+            b_surf = tagging.extract_tagged_faces(b_obj, b_tags)
+            add_to_scene(scene, b_surf)
+            surf_names[b_name] = b_surf.name
+
+    try:
+        edges = {}
+        for b_name in b_names:
+            mesh_name = surf_names.get(b_name, b_name)
+            mesh = iu.meshes_from_names(scene, mesh_name)[0]
+            edges[b_name] = (
+                mesh_name,
+                np.array(projected_xy_edges(mesh), dtype=object),
+            )
+
+        a_cache = {}
+        results = []
+        for a, b in pairs:
+            score = 0
+            for a_name in a:
+                if a_name not in a_cache:
+                    a_obj = iu.blender_objs_from_names(a_name)[0]
+                    a_mesh = iu.meshes_from_names(scene, a_name)[0]
+                    _, axis = get_axis(state, a_obj)
+                    a_poly = iu.project_to_xy_poly(a_mesh)
+                    a_cache[a_name] = (axis[:2], _xy_centroid(a_mesh, a_poly))
+                axis, a_centroid = a_cache[a_name]
+
+                b_edges = [
+                    edges[b_name][1] for b_name in b if edges[b_name][0] != a_name
+                ]
+                b_edges = np.concatenate(b_edges) if len(b_edges) else []
+                if len(b_edges) == 0:
+                    continue
+                closest_line = b_edges[np.argmin(shapely.distance(b_edges, a_centroid))]
+
+                score += _edge_alignment_score(axis, *_edge_normals(closest_line))
+            results.append(score)
+    finally:
+        for surf_name in surf_names.values():
+            iu.delete_obj(scene, surf_name)
+
+    return results
+
+
 @gin.configurable
 def focus_score(
     state: state_def.State, a: Union[str, list[str]], b: str, visualize=False
@@ -988,6 +1162,44 @@ def dist_soft_score(res: dict, min, max):
 _accessibility_vis_seen_objs = set()  # used to make vis=True below less spammy
 
 
+def _accessibility_freespace_box(name: str, normal_dir: np.ndarray, dist: float):
+    """
+    Create an extrusion of the bbox of `name` by dist in the direction of normal_dir
+    """
+
+    # find which of +X, -X +Y, -Y, +Z, -Z is the normal_dir. Only these values are supported
+    if (
+        not np.isclose(np.linalg.norm(normal_dir), 1)
+        or np.isclose(normal_dir, 0).sum() != 2
+    ):
+        raise ValueError(
+            f"Invalid normal_dir {normal_dir=}, expected +X, -X, +Y, -Y, +Z, -Z"
+        )
+    normal_axis = np.argmax(np.abs(normal_dir))
+    normal_sign = np.sign(normal_dir[normal_axis])
+
+    bpy_obj = bpy.data.objects[name]
+
+    freespace_exts = np.copy(np.array(bpy_obj.dimensions))
+    freespace_exts[normal_axis] = dist
+    freespace_box = trimesh.creation.box(freespace_exts)
+
+    bbox = np.array(bpy_obj.bound_box)
+    origin_to_bbox_center = bbox.mean(axis=0)
+    extent_from_real_origin = bbox[0 if normal_sign < 0 else -1][normal_axis]
+
+    offset_vec = normal_dir * (
+        dist / 2 + extent_from_real_origin - origin_to_bbox_center[normal_axis]
+    )
+    total_offset_vec = origin_to_bbox_center + offset_vec
+
+    freespace_box_transform = np.array(
+        bpy_obj.matrix_world
+    ) @ trimesh.transformations.translation_matrix(total_offset_vec)
+
+    return freespace_box, freespace_box_transform
+
+
 def accessibility_cost_cuboid_penetration(
     scene: trimesh.Scene,
     a: Union[str, list[str]],
@@ -1012,42 +1224,14 @@ def accessibility_cost_cuboid_penetration(
 
     a_free_col = trimesh.collision.CollisionManager()
 
-    # find which of +X, -X +Y, -Y, +Z, -Z is the normal_dir. Only these values are supported
-    if (
-        not np.isclose(np.linalg.norm(normal_dir), 1)
-        or np.isclose(normal_dir, 0).sum() != 2
-    ):
-        raise ValueError(
-            f"Invalid normal_dir {normal_dir=}, expected +X, -X, +Y, -Y, +Z, -Z"
-        )
-    normal_axis = np.argmax(np.abs(normal_dir))
-    normal_sign = np.sign(normal_dir[normal_axis])
-
     visobjs = []
     for name in a:
         T, g = scene.graph[name]
         geom = scene.geometry[g]
 
-        # create an extrusion of the bbox by dist in the direction of normal_dir
-        bpy_obj = bpy.data.objects[name]
-
-        freespace_exts = np.copy(np.array(bpy_obj.dimensions))
-        freespace_exts[normal_axis] = dist
-        freespace_box = trimesh.creation.box(freespace_exts)
-
-        bbox = np.array(bpy_obj.bound_box)
-        origin_to_bbox_center = bbox.mean(axis=0)
-        extent_from_real_origin = bbox[0 if normal_sign < 0 else -1][normal_axis]
-
-        offset_vec = normal_dir * (
-            dist / 2 + extent_from_real_origin - origin_to_bbox_center[normal_axis]
+        freespace_box, freespace_box_transform = _accessibility_freespace_box(
+            name, normal_dir, dist
         )
-        total_offset_vec = origin_to_bbox_center + offset_vec
-
-        freespace_box_transform = np.array(
-            bpy_obj.matrix_world
-        ) @ trimesh.transformations.translation_matrix(total_offset_vec)
-
         a_free_col.add_object(name, freespace_box, freespace_box_transform)
 
         visobjs.append(geom.apply_transform(T))
@@ -1059,9 +1243,6 @@ def accessibility_cost_cuboid_penetration(
 
     if vis:
         bobjs = iu.meshes_from_names(scene, b)
-        print(
-            f"{np.round(origin_to_bbox_center, 3)=} {extent_from_real_origin} {bpy_obj.dimensions}"
-        )
         if not all(name in _accessibility_vis_seen_objs for name in a + b):
             trimesh.Scene(visobjs + bobjs).show()
         _accessibility_vis_seen_objs.update(a + b)
@@ -1072,6 +1253,49 @@ def accessibility_cost_cuboid_penetration(
         return 0
 
 
+def accessibility_cost_cuboid_penetration_batched(
+    scene: trimesh.Scene,
+    pairs: list[tuple[list[str], list[str]]],
+    normal_dir: np.ndarray,
+    dist: float,
+    bvh_cache: dict = None,
+) -> list[float]:
+    """
+    Equivalent to [accessibility_cost_cuboid_penetration(scene, a, b, ...) for a, b in pairs].
+
+    All freespace boxes go into one collision manager, which is collided against every b object
+    in a single many-to-many query. Contacts are then split back out per pair.
+    """
+
+    a_names = sorted({n for a, _ in pairs for n in a})
+    b_names = sorted({n for _, b in pairs for n in b})
+    if len(a_names) == 0 or len(b_names) == 0:
+        return [0] * len(pairs)
+
+    a_free_col = trimesh.collision.CollisionManager()
+    for name in a_names:
+        freespace_box, freespace_box_transform = _accessibility_freespace_box(
+            name, normal_dir, dist
+        )
+        a_free_col.add_object(
+            ("freespace", name), freespace_box, freespace_box_transform
+        )
+
+    b_col = iu.col_from_subset(scene, b_names, bvh_cache=bvh_cache)
+    _, contacts = b_col.in_collision_other(a_free_col, return_data=True)
+
+    depths = {}
+    for c in contacts:
+        (_, a_name), b_name = sorted(c.names, key=lambda n: isinstance(n, str))
+        depths[a_name, b_name] = max(depths.get((a_name, b_name), 0), c.depth)
+
+    results = []
+    for a, b in pairs:
+        pair_depths = [depths[k] for k in itertools.product(a, b) if k in depths]
+        results.append(max(pair_depths) if len(pair_depths) else 0)
+    return results
+
+
 @gin.configurable
 def accessibility_cost(scene, a, b, normal, visualize=False, fast=True):
     """
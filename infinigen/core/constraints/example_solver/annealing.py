@@ -4,6 +4,7 @@
 
 # Authors: Alexander Raistrick, Karhan Kayan
 
+import json
 import logging
 import os
 import time
@@ -19,8 +20,9 @@ import pandas as pd
 from infinigen.core.constraints import constraint_language as cl
 from infinigen.core.constraints import reasoning as r
 from infinigen.core.constraints.constraint_language import util as impl_util
-from infinigen.core.constraints.evaluator import eval_memo, evaluate
+from infinigen.core.constraints.evaluator import eval_memo, eval_plan, evaluate
 from infinigen.core.util import blender as butil
+from infinigen.core.util import profiling
 
 from .moves import Move
 from .state_def import State
@@ -43,6 +45,8 @@ class SimulatedAnnealingSolver:
         visualize=False,
         print_report_freq=1,
         print_breakdown_freq=0,
+        use_eval_plan=True,
+        profile=False,
     ) -> None:
         self.initial_temp = initial_temp
         self.final_temp = final_temp
@@ -65,7 +69,44 @@ class SimulatedAnnealingSolver:
         self.eval_memo = {}
         self.stats = []
 
+        self.use_eval_plan = use_eval_plan
+        self.eval_plan = None
+
+        # opt-in per-stage timing of node impls / moves and cache hit rates, see util.profiling
+        self.profile = profile
+        self.profile_records = []
+        self.stage = None
+
+    def save_profile(self, path):
+        self._flush_profile()
+        if len(self.profile_records) == 0:
+            return
+
+        df = pd.DataFrame.from_records(self.profile_records)
+        df = df.sort_values(["stage", "kind", "seconds"], ascending=[True, True, False])
+        logger.info(f"Saving profile {path}")
+        df.to_csv(path, index=False)
+
+        summary = {}
+        for stage, stage_df in df.groupby("stage", sort=False):
+            summary[stage] = {
+                kind: kind_df.dropna(axis=1, how="all").to_dict(orient="records")
+                for kind, kind_df in stage_df.drop(columns="stage").groupby("kind")
+            }
+        with path.with_suffix(".json").open("w") as f:
+            json.dump(summary, f, indent=2, default=str)
+
+    def _flush_profile(self):
+        profile = profiling.stop()
+        if profile is not None:
+            self.profile_records += profile.records(stage=str(self.stage))
+        if self.profile:
+            profiling.start()
+
     def save_stats(self, path):
+        if self.profile:
+            self.save_profile(path.parent / (path.stem + "_profile.csv"))
+
         if len(self.stats) == 0:
             return
 
@@ -90,7 +131,11 @@ class SimulatedAnnealingSolver:
 
         logger.info(f"Total elapsed {path.stem} {self.stats[-1]['elapsed']:.2f}")
 
-    def reset(self, max_iters):
+    def reset(self, max_iters, stage: str = None):
+        if self.profile:
+            self._flush_profile()
+        self.stage = stage
+
         self.curr_iteration = 0
         self.curr_result = None
         self.best_loss = None
@@ -110,6 +155,31 @@ class SimulatedAnnealingSolver:
             f"Reset solver with {max_iters=} cooling_rate={self.cooling_rate:.4f}"
         )
 
+    def get_eval_plan(self, consgraph: cl.Problem) -> eval_plan.EvalPlan | None:
+        if not self.use_eval_plan:
+            return None
+        if self.eval_plan is None or self.eval_plan.problem is not consgraph:
+            self.eval_plan = eval_plan.compile_problem(consgraph)
+            logger.debug(f"Compiled {len(self.eval_plan)} node eval plan")
+        return self.eval_plan
+
+    def _evaluate(
+        self,
+        consgraph: cl.Problem,
+        state: State,
+        filter_domain: r.Domain,
+        memo: dict = None,
+    ) -> evaluate.EvalResult:
+        plan = self.get_eval_plan(consgraph)
+        if plan is None:
+            return evaluate.evaluate_problem(consgraph, state, filter_domain, memo=memo)
+        return eval_plan.evaluate_plan(plan, state, filter_domain, memo=memo)
+
+    def evict_memo_for_move(self, consgraph: cl.Problem, state: State, move: Move):
+        eval_memo.evict_memo_for_move(
+            consgraph, state, self.eval_memo, move, plan=self.get_eval_plan(consgraph)
+        )
+
     def checkpoint(self, state):
         filename = os.path.join(self.output_folder, "checkpoint_state.pkl")
         state.save(filename)
@@ -148,7 +218,8 @@ class SimulatedAnnealingSolver:
 
         for n in consgraph.traverse(inorder=False):
             key = eval_memo.memo_key(n)
-            if key not in self.eval_memo:
+            if key not in self.eval_memo or key not in test_memo:
+                # eval_plan also memoizes unquantified nodes nested inside quantifiers
                 continue
             lazy = self.eval_memo[key]
             if test_memo[key] == lazy:
@@ -170,14 +241,12 @@ class SimulatedAnnealingSolver:
         validate_lazy_eval=False,
     ):
         if do_lazy_eval:
-            eval_memo.evict_memo_for_move(consgraph, state, self.eval_memo, move)
-            prop_result = evaluate.evaluate_problem(
+            self.evict_memo_for_move(consgraph, state, move)
+            prop_result = self._evaluate(
                 consgraph, state, filter_domain, self.eval_memo
             )
         else:
-            prop_result = evaluate.evaluate_problem(
-                consgraph, state, filter_domain, memo={}
-            )
+            prop_result = self._evaluate(consgraph, state, filter_domain, memo={})
 
         if validate_lazy_eval:
             self.validate_lazy_eval(state, consgraph, prop_result, filter_domain)
@@ -206,12 +275,12 @@ class SimulatedAnnealingSolver:
 
             succeeded = move.apply(state)
             if succeeded:
-                eval_memo.evict_memo_for_move(consgraph, state, self.eval_memo, move)
+                self.evict_memo_for_move(consgraph, state, move)
                 result = self._move(consgraph, state, move, filter_domain)
                 return move, result, retry
 
             logger.debug(f"{retry=} reverting {move=}")
-            eval_memo.evict_memo_for_move(consgraph, state, self.eval_memo, move)
+            self.evict_memo_for_move(consgraph, state, move)
             move.revert(state)
 
         else:
@@ -249,9 +318,7 @@ class SimulatedAnnealingSolver:
 
     def step(self, consgraph, state, move_gen_func, filter_domain):
         if self.curr_result is None:
-            self.curr_result = evaluate.evaluate_problem(
-                consgraph, state, filter_domain
-            )
+            self.curr_result = self._evaluate(consgraph, state, filter_domain)
 
         move_start_time = time.perf_counter()
 
@@ -283,11 +350,14 @@ class SimulatedAnnealingSolver:
                 self.curr_result = prop_result
                 move.accept(state)
             else:
-                eval_memo.evict_memo_for_move(consgraph, state, self.eval_memo, move)
+                self.evict_memo_for_move(consgraph, state, move)
                 move.revert(state)
 
         dt = time.perf_counter() - move_start_time
         elapsed = time.perf_counter() - self.optim_start_time
+        profiling.record_move(
+            move_gen_func.__name__ if move is None else move.__class__.__name__, dt
+        )
 
         if (self.print_report_freq != 0 and accept_result["accept"]) or is_log_step:
             n = len(state.objs)
@@ -0,0 +1,84 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+import logging
+
+import numpy as np
+import shapely
+import trimesh
+
+logger = logging.getLogger(__name__)
+
+
+def _affine_2d(C: np.ndarray) -> list[float]:
+    # shapely.affinity.affine_transform params for the xy block of a 4x4 plane-to-plane transform
+    return [C[0, 0], C[0, 1], C[1, 0], C[1, 1], C[0, 3], C[1, 3]]
+
+
+class Footprints:
+    """
+    Polygons of solver meshes projected onto planes, as computed by trimesh.path.polygons.projected,
+    cached in each object's local frame.
+
+    The solver's trimesh geometry is its local mesh transformed by mesh.current_transform. Projecting
+    along `normal` in world space is the same as projecting along M^-1 @ normal in the local frame
+    and mapping the result with a 2D affine transform, so a cached footprint stays valid for any move
+    which keeps that local direction fixed, ie every translation and every rotation about `normal`.
+    """
+
+    def __init__(self):
+        self._cache = {}  # key -> (mesh, local polygon)
+
+    def clear(self):
+        self._cache.clear()
+
+    def projected(
+        self,
+        mesh: trimesh.Trimesh,
+        normal: np.ndarray,
+        origin: np.ndarray,
+        key: tuple,
+        submesh_fn=None,
+    ):
+        """
+        Equivalent to trimesh.path.polygons.projected(submesh_fn() or mesh, normal, origin)
+
+        key must identify which part of the object is being projected, eg the object name plus
+        the tags and plane used by submesh_fn.
+        """
+
+        normal = np.array(normal, dtype=np.float64)
+        normal /= np.linalg.norm(normal)
+        M = np.asarray(mesh.current_transform, dtype=np.float64)
+
+        local_dir = np.linalg.solve(M[:3, :3], normal)
+        local_dir /= np.linalg.norm(local_dir)
+
+        to_world_2d = trimesh.geometry.plane_transform(origin=origin, normal=normal)
+        to_local_2d = trimesh.geometry.plane_transform(
+            origin=np.zeros(3), normal=local_dir
+        )
+        C = to_world_2d @ M @ np.linalg.inv(to_local_2d)
+
+        def compute():
+            target = mesh if submesh_fn is None else submesh_fn()
+            return trimesh.path.polygons.projected(target, normal, origin)
+
+        if not np.allclose(C[:2, 2], 0, atol=1e-9):
+            logger.debug(f"Footprints cannot cache {key=}, {C[:2, 2]=}")
+            return compute()
+
+        cache_key = key + (tuple(np.round(local_dir, 6)),)
+        entry = self._cache.get(cache_key)
+        if entry is not None and entry[0] is mesh:
+            return shapely.affinity.affine_transform(entry[1], _affine_2d(C))
+
+        res = compute()
+        if res is not None:
+            C_inv = np.linalg.inv(C)
+            self._cache[cache_key] = (
+                mesh,
+                shapely.affinity.affine_transform(res, _affine_2d(C_inv)),
+            )
+        return res
@@ -19,6 +19,7 @@ from infinigen.core.constraints.constraint_language.util import (
     blender_objs_from_names,
     meshes_from_names,
 )
+from infinigen.core.util import profiling
 
 logger = logging.getLogger(__name__)
 
@@ -47,10 +48,12 @@ class Planes:
         cache_key = (obj.name, current_face_mask_hash)
 
         # Check if mesh has been modified or planes have not been computed before for this object and face_mask
-        if (
+        miss = (
             cache_key not in self._cached_planes
             or self._mesh_hashes.get(obj.name) != current_mesh_hash
-        ):
+        )
+        profiling.record_cache("planes", not miss)
+        if miss:
             self._mesh_hashes[obj.name] = (
                 current_mesh_hash  # Update the hash for this object
             )
@@ -292,6 +295,7 @@ class Planes:
             or self._mesh_hashes.get(obj_id) != current_hash
         )
 
+        profiling.record_cache("plane_masks", not mesh_or_face_mask_changed)
         if not mesh_or_face_mask_changed:
             # logger.info(f'Cache HIT plane mask for {obj.name=}')
             return self._cached_plane_masks[cache_key]["mask"]
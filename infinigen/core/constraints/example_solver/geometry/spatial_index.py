@@ -0,0 +1,200 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+"""
+World-space bounding boxes for every object in a State, used to reject or accept candidate
+poses before running the exact (and much more expensive) checks in validity.py / stability.py.
+
+All tests here are conservative: they only reject a pose if the exact check would certainly
+fail, and only skip a collision query if the exact query would certainly find nothing.
+"""
+
+from __future__ import annotations
+
+import logging
+
+import gin
+import numpy as np
+
+from infinigen.core.constraints import constraint_language as cl
+from infinigen.core.util import blender as butil
+
+logger = logging.getLogger(__name__)
+
+# stability.stable_against tests containment against the parent plane buffered by 1e-2,
+# plus some slack for the padding trimesh applies when projecting meshes to polygons
+_SUPPORT_TOL = 1e-2 + 1e-3
+_AXIS_ALIGNED_TOL = 1e-6
+
+
+class AABBIndex:
+    """
+    Lazily refreshed (N, 2, 3) array of object AABBs, keyed by State object name.
+
+    The solver's trimesh geometry is stored in world space and iu.sync_trimesh replaces
+    mesh.current_transform whenever an object moves, so an entry is only recomputed when
+    that array (or the mesh itself) is no longer the one we saw last time.
+    """
+
+    def __init__(self):
+        self.names: list[str] = []
+        self.bounds = np.zeros((0, 2, 3))
+        self._rows: dict[str, int] = {}
+
+        self._entries = {}  # name -> (mesh, transform, bounds)
+        self._plane_axes = {}  # (name, tags, plane_idx) -> (transform, axis)
+
+    def _mesh(self, state, name):
+        objstate = state.objs.get(name)
+        if objstate is None or objstate.obj is None or state.trimesh_scene is None:
+            return None
+        return state.trimesh_scene.geometry.get(objstate.obj.name + "_mesh")
+
+    def _entry(self, state, name):
+        mesh = self._mesh(state, name)
+        if mesh is None:
+            return None
+        transform = getattr(mesh, "current_transform", None)
+        entry = self._entries.get(name)
+        if entry is None or entry[0] is not mesh or entry[1] is not transform:
+            entry = (mesh, transform, np.array(mesh.bounds))
+            self._entries[name] = entry
+            self._rows = None
+        return entry
+
+    def refresh(self, state):
+        for name in list(self._entries.keys()):
+            if name not in state.objs:
+                del self._entries[name]
+                self._rows = None
+        for name in state.objs:
+            self._entry(state, name)
+
+        if self._rows is None:
+            self.names = list(self._entries.keys())
+            self._rows = {n: i for i, n in enumerate(self.names)}
+            self.bounds = (
+                np.stack([self._entries[n][2] for n in self.names])
+                if len(self.names)
+                else np.zeros((0, 2, 3))
+            )
+
+    def get(self, state, name) -> np.ndarray | None:
+        entry = self._entry(state, name)
+        return None if entry is None else entry[2]
+
+    def may_overlap(self, state, name: str, others: list[str]) -> bool:
+        """
+        False only if the AABB of `name` has no positive-volume overlap with that of any of `others`
+        """
+
+        bounds = self.get(state, name)
+        if bounds is None:
+            return True
+
+        self.refresh(state)
+        rows = [self._rows.get(o) for o in others]
+        if any(r is None for r in rows):
+            return True  # something we cant bound, let the exact check decide
+        if len(rows) == 0:
+            return False
+
+        other_bounds = self.bounds[rows]
+        lo = np.maximum(other_bounds[:, 0], bounds[0])
+        hi = np.minimum(other_bounds[:, 1], bounds[1])
+        return bool(((hi - lo) > 0).all(axis=-1).any())
+
+    def plane_axis(self, state, relation_state: "state_def.RelationState"):  # noqa: F821
+        """
+        Index of the world axis the parent plane of `relation_state` is normal to,
+        or None if the plane is not axis aligned
+        """
+
+        parent = relation_state.target_name
+        parent_obj = state.objs[parent].obj
+        mesh = self._mesh(state, parent)
+        transform = getattr(mesh, "current_transform", None)
+
+        key = (
+            parent,
+            frozenset(relation_state.relation.parent_tags),
+            relation_state.parent_plane_idx,
+        )
+        cached = self._plane_axes.get(key)
+        if cached is not None and cached[0] is transform:
+            return cached[1]
+
+        planes = state.planes.get_tagged_planes(
+            parent_obj, relation_state.relation.parent_tags
+        )
+        if relation_state.parent_plane_idx >= len(planes):
+            return None
+        poly = state.planes.planerep_to_poly(planes[relation_state.parent_plane_idx])
+        normal = np.abs(np.array(butil.global_polygon_normal(parent_obj, poly)))
+        axis = int(np.argmax(normal))
+        if normal[axis] < 1 - _AXIS_ALIGNED_TOL:
+            axis = None
+
+        self._plane_axes[key] = (transform, axis)
+        return axis
+
+
+def _overhangs_allowed():
+    try:
+        return bool(gin.query_parameter("stable_against.allow_overhangs"))
+    except ValueError:
+        return False
+
+
+def support_feasible(state, name: str, translation: np.ndarray = None) -> bool:
+    """
+    Necessary condition for stability.stable_against on every StableAgainst relation of `name`,
+    if it were translated by `translation`: seen along an axis-aligned parent plane normal,
+    the child's AABB must lie within the parent's AABB
+    """
+
+    index: AABBIndex = state.spatial_index
+    if index is None:
+        return True
+
+    child = index.get(state, name)
+    if child is None:
+        return True
+    if translation is not None:
+        child = child + np.asarray(translation)[None]
+
+    overhangs = _overhangs_allowed()
+
+    for relation_state in state.objs[name].relations:
+        relation = relation_state.relation
+        if not isinstance(relation, cl.StableAgainst):
+            continue
+        parent = index.get(state, relation_state.target_name)
+        if parent is None:
+            continue
+        axis = index.plane_axis(state, relation_state)
+        if axis is None:
+            continue
+
+        if relation.check_z or overhangs:
+            axes = [a for a in range(3) if a != axis]
+        elif axis == 2:
+            continue  # stable_against has no well-defined in-plane direction to test
+        else:
+            # check_z=False only tests the horizontal in-plane extent
+            axes = [a for a in range(2) if a != axis]
+
+        lo, hi = child[0, axes], child[1, axes]
+        plo, phi = parent[0, axes], parent[1, axes]
+        if overhangs:
+            ok = (lo <= phi + _SUPPORT_TOL).all() and (hi >= plo - _SUPPORT_TOL).all()
+        else:
+            ok = (lo >= plo - _SUPPORT_TOL).all() and (hi <= phi + _SUPPORT_TOL).all()
+        if not ok:
+            logger.debug(
+                f"{support_feasible.__name__} rejected {name=} on {relation_state.target_name}"
+            )
+            return False
+
+    return True
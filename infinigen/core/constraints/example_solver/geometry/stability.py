@@ -87,6 +87,16 @@ def project_vector(vector, origin, normal):
     return transformed_vector
 
 
+def plane_distances(obj: bpy.types.Object, polygon, plane_point, plane_normal):
+    """
+    Vectorized iu.distance_to_plane for every vertex of one of obj's polygons
+    """
+    M = np.array(obj.matrix_world)
+    co = np.array([obj.data.vertices[v].co for v in polygon.vertices])
+    verts = co @ M[:3, :3].T + M[:3, 3]
+    return np.abs((verts - np.array(plane_point)) @ np.array(plane_normal))
+
+
 @gin.configurable
 def stable_against(
     state: state_def.State,
@@ -130,14 +140,23 @@ def stable_against(
     a_trimesh = iu.meshes_from_names(scene, sa.obj.name)[0]
     b_trimesh = iu.meshes_from_names(scene, sb.obj.name)[0]
 
-    mask = tagging.tagged_face_mask(sb.obj, relation.parent_tags)
-    mask = state.planes.tagged_plane_mask(sb.obj, mask, pb)
-    assert mask.any()
-    b_trimesh_mask = b_trimesh.submesh([np.where(mask)[0]], append=True)
+    def b_trimesh_mask():
+        mask = tagging.tagged_face_mask(sb.obj, relation.parent_tags)
+        mask = state.planes.tagged_plane_mask(sb.obj, mask, pb)
+        assert mask.any()
+        return b_trimesh.submesh([np.where(mask)[0]], append=True)
 
     # Project mesh A onto the plane of mesh B
-    projected_a = trimesh.path.polygons.projected(a_trimesh, normal_b, origin_b)
-    projected_b = trimesh.path.polygons.projected(b_trimesh_mask, normal_b, origin_b)
+    projected_a = state.footprints.projected(
+        a_trimesh, normal_b, origin_b, key=(sa.obj.name,)
+    )
+    projected_b = state.footprints.projected(
+        b_trimesh,
+        normal_b,
+        origin_b,
+        key=(sb.obj.name, frozenset(relation.parent_tags), tuple(pb)),
+        submesh_fn=b_trimesh_mask,
+    )
     logger.debug(
         f"stable_against projecting along {normal_b} for parent_tags {relation.parent_tags}"
     )
@@ -167,14 +186,10 @@ def stable_against(
     if not res:
         return False
 
-    for vertex in poly_a.vertices:
-        vertex_global = butil.global_vertex_coordinates(
-            a_blender_obj, a_blender_obj.data.vertices[vertex]
-        )
-        distance = iu.distance_to_plane(vertex_global, origin_b, normal_b)
-        if not np.isclose(distance, relation_state.relation.margin, atol=1e-2):
-            logger.debug(f"stable against failed, not close to {distance=}")
-            return False
+    distance = plane_distances(a_blender_obj, poly_a, origin_b, normal_b)
+    if not np.isclose(distance, relation_state.relation.margin, atol=1e-2).all():
+        logger.debug(f"stable against failed, not close to {distance=}")
+        return False
 
     return True
 
@@ -214,14 +229,10 @@ def coplanar(
         b_blender_obj, b_blender_obj.data.vertices[poly_b.vertices[0]]
     )
 
-    for vertex in poly_a.vertices:
-        vertex_global = butil.global_vertex_coordinates(
-            a_blender_obj, a_blender_obj.data.vertices[vertex]
-        )
-        distance = iu.distance_to_plane(vertex_global, origin_b, normal_b)
-        if not np.isclose(distance, relation_state.relation.margin, atol=1e-2):
-            logger.debug(f"coplanar failed, not close to {distance=}")
-            return False
+    distance = plane_distances(a_blender_obj, poly_a, origin_b, normal_b)
+    if not np.isclose(distance, relation_state.relation.margin, atol=1e-2).all():
+        logger.debug(f"coplanar failed, not close to {distance=}")
+        return False
 
     return True
 
@@ -19,6 +19,9 @@ from infinigen.core.constraints.evaluator.node_impl.trimesh_geometry import (
     any_touching,
     constrain_contact,
 )
+from infinigen.core.constraints.example_solver.geometry.spatial_index import (
+    support_feasible,
+)
 from infinigen.core.constraints.example_solver.geometry.stability import (
     coplanar,
     stable_against,
@@ -69,6 +72,10 @@ def check_pre_move_validity(scene, a, parent_dict, dx, dy):
 
 
 def all_relations_valid(state, name):
+    if not support_feasible(state, name):
+        logger.debug(f"{name} failed bounding box support check")
+        return False
+
     rels = state.objs[name].relations
     for i, relation_state in enumerate(rels):
         match relation_state.relation:
@@ -100,11 +107,12 @@ def check_post_move_validity(
     scene = state.trimesh_scene
     objstate = state.objs[name]
 
-    collision_objs = [
-        os.obj.name
+    collision_keys = [
+        k
         for k, os in state.objs.items()
         if k != name and t.Semantics.NoCollision not in os.tags
     ]
+    collision_objs = [state.objs[k].obj.name for k in collision_keys]
 
     if len(collision_objs) == 0:
         return True
@@ -120,6 +128,8 @@ def check_post_move_validity(
         return True
     if t.Semantics.NoCollision in objstate.tags:
         return True
+    if not state.spatial_index.may_overlap(state, name, collision_keys):
+        return True
 
     touch = any_touching(
         scene, objstate.obj.name, collision_objs, bvh_cache=state.bvh_cache
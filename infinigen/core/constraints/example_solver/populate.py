@@ -16,6 +16,7 @@ from infinigen.core.constraints import usage_lookup
 from infinigen.core.constraints.constraint_language.util import delete_obj
 from infinigen.core.constraints.example_solver.geometry import parse_scene
 from infinigen.core.constraints.example_solver.state_def import State
+from infinigen.core.placement import spawn_pool
 from infinigen.core.placement.placement import parse_asset_name
 from infinigen.core.util import blender as butil
 
@@ -77,6 +78,7 @@ def populate_state_placeholders(state: State, filter=None, final=True):
 
     update_state_mesh_objs = []
 
+    specs = []
     for i, objkey in enumerate(targets):
         os = state.objs[objkey]
         placeholder = os.obj
@@ -87,11 +89,20 @@ def populate_state_placeholders(state: State, filter=None, final=True):
         update_state_mesh_objs.append((objkey, old_objname))
 
         *_, inst_seed = parse_asset_name(placeholder.name)
-        os.obj = os.generator.spawn_asset(
-            i=int(inst_seed),
-            loc=placeholder.location,  # we could use placeholder=pholder here, but I worry pholder may have been modified
-            rot=placeholder.rotation_euler,
+        specs.append(
+            spawn_pool.SpawnSpec(
+                os.generator,
+                int(inst_seed),
+                loc=placeholder.location,  # we could use placeholder=pholder here, but I worry pholder may have been modified
+                rot=placeholder.rotation_euler,
+            )
         )
+
+    spawned = spawn_pool.spawn_assets(specs)
+
+    for objkey, obj in zip(targets, spawned):
+        os = state.objs[objkey]
+        os.obj = obj
         os.generator.finalize_assets([os.obj])
         butil.put_in_collection(os.obj, unique_assets)
 
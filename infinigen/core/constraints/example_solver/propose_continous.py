@@ -15,6 +15,7 @@ from infinigen.core.constraints import reasoning as r
 from infinigen.core.constraints.evaluator.domain_contains import domain_contains
 
 from . import moves, state_def
+from .geometry.spatial_index import support_feasible
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +26,9 @@ ROT_MIN = 0  # 2 * np.pi / 200
 
 ANGLE_STEP_SIZE = (2 * np.pi) / 8
 
+# translations resampled per proposal when the bounding box already rules out stability
+MAX_TRANSLATE_RESAMPLES = 10
+
 
 def get_pose_candidates(
     consgraph: cl.Node,
@@ -59,8 +63,11 @@ def propose_translate(
         obj_state = state.objs[obj_state_name]
 
         var = max(TRANS_MIN, TRANS_MULT * temperature)
-        random_vector = np.random.normal(0, var, size=3)
-        projected_vector = obj_state.dof_matrix_translation @ random_vector
+        for _ in range(MAX_TRANSLATE_RESAMPLES):
+            random_vector = np.random.normal(0, var, size=3)
+            projected_vector = obj_state.dof_matrix_translation @ random_vector
+            if support_feasible(state, obj_state_name, projected_vector):
+                break
 
         yield moves.TranslateMove(
             names=[obj_state_name],
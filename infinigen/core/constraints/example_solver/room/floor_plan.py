@@ -4,6 +4,8 @@
 # Authors:
 # - Lingjie Mei
 
+import multiprocessing
+
 import gin
 import numpy as np
 import shapely
@@ -12,6 +14,11 @@ from shapely.affinity import translate
 from tqdm import tqdm, trange
 
 from infinigen.core.constraints import constraint_language as cl
+from infinigen.core.constraints.evaluator.eval_plan import (
+    compile_problem,
+    evaluate_plan,
+    evict_item_memo,
+)
 from infinigen.core.constraints.evaluator.evaluate import evaluate_problem
 from infinigen.core.constraints.example_solver.state_def import State
 from infinigen.core.tags import Semantics
@@ -23,11 +30,32 @@ from .graph import GraphMaker
 from .segment import SegmentMaker
 from .solidifier import BlueprintSolidifier
 from .solver import FloorPlanMoves
+from .utils import changed_rooms
+
+_pool_segment_makers = None
+
+
+def _init_segment_pool(segment_makers):
+    global _pool_segment_makers
+    _pool_segment_makers = segment_makers
+
+
+def _build_segments_trial(args):
+    j, pholder, seed = args
+    return _pool_segment_makers[j].build_segments(pholder, seed=seed)
 
 
 @gin.configurable
 class FloorPlanSolver:
-    def __init__(self, factory_seed, consgraph, n_divide_trials=100, iters_mult=200):
+    def __init__(
+        self,
+        factory_seed,
+        consgraph,
+        n_divide_trials=100,
+        iters_mult=200,
+        incremental=True,
+        n_divide_workers=1,
+    ):
         self.factory_seed = factory_seed
         with FixedSeed(factory_seed):
             self.constants = consgraph.constants
@@ -59,7 +87,9 @@ class FloorPlanSolver:
             ]
 
             self.n_divide_trials = n_divide_trials
+            self.n_divide_workers = n_divide_workers
             self.iter_per_room = iters_mult
+            self.incremental = incremental
             self.score_scale = 5
             self.staircase_solver_prob = 0.1
 
@@ -110,25 +140,59 @@ class FloorPlanSolver:
             self.widths.append(width)
             self.heights.append(height)
 
+    def divide_segments(self, j, pholder, pool=None):
+        n_trials = self.n_divide_trials * (j + 1) ** 2
+        if pool is None:
+            for _ in trange(n_trials, desc=f"Dividing segments for {j}"):
+                st = self.segment_makers[j].build_segments(pholder)
+                if st is not None:
+                    return st
+            return None
+
+        # run trials in batches, but only consume as many seeds as the sequential loop would
+        with tqdm(total=n_trials, desc=f"Dividing segments for {j}") as pbar:
+            while pbar.n < n_trials:
+                n = min(self.n_divide_workers, n_trials - pbar.n)
+                rng_state = np.random.get_state()
+                seeds = [np.random.randint(10e7) for _ in range(n)]
+                results = pool.map(
+                    _build_segments_trial, [(j, pholder, seed) for seed in seeds]
+                )
+                for m, st in enumerate(results):
+                    if st is not None:
+                        np.random.set_state(rng_state)
+                        for _ in range(m + 1):
+                            np.random.randint(10e7)
+                        pbar.update(m + 1)
+                        return st
+                pbar.update(n)
+        return None
+
     def solve(self):
+        pool = None
+        if self.n_divide_workers > 1:
+            pool = multiprocessing.get_context("fork").Pool(
+                self.n_divide_workers,
+                initializer=_init_segment_pool,
+                initargs=(self.segment_makers,),
+            )
+
         state = State(graphs=self.graphs)
         states = []
-        while len(states) < self.n_stories:
-            pholder = self.contour_factory.add_staircase(self.contours[-1])
-            state.objs = {}
-            states = []
-            for j in range(self.n_stories):
-                for _ in trange(
-                    self.n_divide_trials * (j + 1) ** 2,
-                    desc=f"Dividing segments for {j}",
-                ):
-                    st = self.segment_makers[j].build_segments(pholder)
-                    if st is not None:
-                        states.append(st)
-                        state.objs.update(st.objs)
+        try:
+            while len(states) < self.n_stories:
+                pholder = self.contour_factory.add_staircase(self.contours[-1])
+                state.objs = {}
+                states = []
+                for j in range(self.n_stories):
+                    st = self.divide_segments(j, pholder, pool)
+                    if st is None:
                         break
-                else:
-                    break
+                    states.append(st)
+                    state.objs.update(st.objs)
+        finally:
+            if pool is not None:
+                pool.terminate()
 
         state = self.simulated_anneal(state)
         self.contour_factory.decorate(state)
@@ -154,16 +218,29 @@ class FloorPlanSolver:
     def simulated_anneal(self, state):
         consgraph = self.consgraph.filter("room")
         consgraph.constraints["graph"] = cl.graph_coherent(self.consgraph.constants)
-        score, _ = evaluate_problem(consgraph, state, memo={})
+
+        # per-room scores of the current state, only rooms changed by a move are re-scored
+        plan = compile_problem(consgraph)
+        item_memo = {}
+
+        def evaluate(state_, item_memo_):
+            if not self.incremental:
+                return evaluate_problem(consgraph, state_, memo={})
+            return evaluate_plan(plan, state_, item_memo=item_memo_)
+
+        score, _ = evaluate(state, item_memo)
         it = self.iter_per_room * sum(len(g) for g in self.graphs)
         with tqdm(total=it, desc="Sampling solutions") as pbar:
             while pbar.n < it:
                 state_ = self.solver.perturb_state(state)
-                score_, violated_ = evaluate_problem(consgraph, state_, memo={})
+                item_memo_ = dict(item_memo)
+                evict_item_memo(item_memo_, changed_rooms(state_, state))
+                score_, violated_ = evaluate(state_, item_memo_)
                 scale = self.score_scale * pbar.n / it
                 if np.log(uniform()) < (score - score_) * scale and not violated_:
                     state = state_
                     score = score_
+                    item_memo = item_memo_
                 pbar.update(1)
                 pbar.set_postfix(score=score)
         return state
@@ -57,8 +57,9 @@ class SegmentMaker:
             self.divide_box_fn = lambda x: x.area**0.5
             self.n_box_trials = 100
 
-    def build_segments(self, placeholder=None):
-        seed = np.random.randint(10e7)
+    def build_segments(self, placeholder=None, seed=None):
+        if seed is None:
+            seed = np.random.randint(10e7)
         while True:
             try:
                 with FixedSeed(seed):
@@ -6,8 +6,6 @@
 # - Lingjie Mei: primary author
 # - Karhan Kayan: fix constants
 
-from copy import deepcopy
-
 import matplotlib.pyplot as plt
 import numpy as np
 import shapely.affinity
@@ -19,7 +17,7 @@ from infinigen.core.constraints.example_solver import state_def
 from infinigen.core.tags import Semantics
 
 from .base import room_level, room_name, room_type, valid_rooms
-from .utils import update_contour, update_exterior, update_shared
+from .utils import cow_copy, update_contour, update_exterior, update_shared, writable
 
 _eps = 1e-3
 
@@ -34,17 +32,18 @@ class FloorPlanMoves:
             k = np.random.choice(
                 [k for k in state.objs if room_type(k) != Semantics.Exterior]
             )
-            state_ = deepcopy(state)
+            # copy-on-write, untouched rooms stay shared with `state`
+            state_ = cow_copy(state)
             rn = uniform()
             try:
                 if room_type(k) == Semantics.Staircase:
-                    indices = self.move_staircase(state_)
+                    indices = self.move_staircase(state_, state)
                 elif rn < 0.4:
-                    indices = self.extrude_room_out(state_, k)
+                    indices = self.extrude_room_out(state_, k, state)
                 elif rn < 0.8:
-                    indices = self.extrude_room_in(state_, k)
+                    indices = self.extrude_room_in(state_, k, state)
                 else:
-                    indices = self.swap_room(state_, k)
+                    indices = self.swap_room(state_, k, state)
             except NotImplementedError:
                 indices = set()
             if len(indices) > 0:
@@ -53,8 +52,8 @@ class FloorPlanMoves:
             if not self.constants.fixed_contour:
                 update_contour(state_, state, indices)
             for k in indices:
-                update_shared(state_, k)
-                update_exterior(state_, k)
+                update_shared(state_, k, state)
+                update_exterior(state_, k, state)
         return state_
 
     def extrude_room(self, state, k, out=True):
@@ -94,19 +93,21 @@ class FloorPlanMoves:
             s = self.constants.canonicalize(shapely.difference(state[k].polygon, c))
         return c, s, stride, theta
 
-    def extrude_room_out(self, state, k):
+    def extrude_room_out(self, state, k, origin=None):
         c, s, stride, theta = self.extrude_room(state, k, True)
         indices = {k}
         for r in state[k].relations:
             l = r.target_name
             p = state[l].polygon
             if shapely.distance(p, c) <= stride:
-                state[l].polygon = self.constants.canonicalize(p.difference(c))
+                writable(state, origin, l).polygon = self.constants.canonicalize(
+                    p.difference(c)
+                )
                 indices.add(l)
-        state[k].polygon = s
+        writable(state, origin, k).polygon = s
         return indices
 
-    def extrude_room_in(self, state, k):
+    def extrude_room_in(self, state, k, origin=None):
         c, s, stride, theta = self.extrude_room(state, k, False)
         indices = {k}
         for r in state[k].relations:
@@ -123,19 +124,23 @@ class FloorPlanMoves:
                     )
                 inter = q.intersection(c)
                 if inter.area > 0.1:
-                    state[l].polygon = self.constants.canonicalize(p.union(inter))
+                    writable(state, origin, l).polygon = self.constants.canonicalize(
+                        p.union(inter)
+                    )
                     indices.add(l)
-        state[k].polygon = s
+        writable(state, origin, k).polygon = s
         return indices
 
-    def swap_room(self, state, k):
+    def swap_room(self, state, k, origin=None):
         j = np.random.choice(
             [r.target_name for r in state[k].relations if r.value.length > 0]
         )
-        state[k].polygon, state[j].polygon = state[j].polygon, state[k].polygon
+        p, q = state[j].polygon, state[k].polygon
+        writable(state, origin, k).polygon = p
+        writable(state, origin, j).polygon = q
         return {k, j}
 
-    def move_staircase(self, state):
+    def move_staircase(self, state, origin=None):
         p = state[room_name(Semantics.Staircase, 0)].polygon
         if uniform() < 0.2:
             p = shapely.affinity.rotate(p, 90)
@@ -158,7 +163,7 @@ class FloorPlanMoves:
             for i, _ in enumerate(state.graphs):
                 names.add(room_name(Semantics.Staircase, i))
             for n in names:
-                state[n].polygon = p
+                writable(state, origin, n).polygon = p
             return names
         return set()
 
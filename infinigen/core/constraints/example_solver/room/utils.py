@@ -6,24 +6,57 @@
 # - Lingjie Mei: primary author
 # - Karhan Kayan: fix constants
 
+from copy import copy
+
 import numpy as np
 import shapely
 from shapely import MultiLineString
 from shapely.ops import shared_paths
 
-from infinigen.core.constraints.example_solver.state_def import State
+from infinigen.core.constraints.example_solver.state_def import ObjectState, State
 from infinigen.core.tags import Semantics
 
 from .base import room_level, room_name, valid_rooms
 
 
-def update_shared(state: State, i: str):
-    for r in state[i].relations:
+def cow_copy(state: State) -> State:
+    """
+    Shallow copy of a room state which shares every ObjectState with `state`,
+    use writable(state_, state, k) before modifying any of them
+    """
+    state_ = copy(state)
+    state_.objs = dict(state.objs)
+    return state_
+
+
+def writable(state_: State, origin: State | None, k: str) -> ObjectState:
+    """
+    Get state_[k] for modification, copying it first if it is still shared with origin
+    """
+    o = state_[k]
+    if origin is not None and o is origin.objs.get(k):
+        o = copy(o)
+        o.relations = [copy(r) for r in o.relations]
+        state_[k] = o
+    return o
+
+
+def changed_rooms(state_: State, state: State) -> set[str]:
+    return {k for k, o in state_.objs.items() if o is not state.objs.get(k)}
+
+
+def update_shared(state: State, i: str, origin: State = None):
+    for r in writable(state, origin, i).relations:
         r.value = shared(state[i].polygon, state[r.target_name].polygon)
     for k, o in valid_rooms(state):
         if room_level(k) == room_level(i) and k != i:
             r = next(r for r in o.relations if r.target_name == i)
-            r.value = shared(o.polygon, state[i].polygon)
+            value = shared(o.polygon, state[i].polygon)
+            if origin is not None and value == r.value:
+                continue
+            o = writable(state, origin, k)
+            r = next(r for r in o.relations if r.target_name == i)
+            r.value = value
 
 
 def update_contour(state_: State, state: State, indices: set[str]):
@@ -31,10 +64,12 @@ def update_contour(state_: State, state: State, indices: set[str]):
     exterior = room_name(Semantics.Exterior, room_level(i))
     minus = shapely.union_all([state[k].polygon for k in indices])
     plus = shapely.union_all([state_[k].polygon for k in indices])
-    state_[exterior].polygon = state[exterior].polygon.difference(minus).union(plus)
+    writable(state_, state, exterior).polygon = (
+        state[exterior].polygon.difference(minus).union(plus)
+    )
 
 
-def update_exterior(state: State, i: str):
+def update_exterior(state: State, i: str, origin: State = None):
     exterior = room_name(Semantics.Exterior, room_level(i))
     r = next(r for r in state[exterior].relations if r.target_name == i)
     v = state[i].polygon.exterior
@@ -43,11 +78,17 @@ def update_exterior(state: State, i: str):
             v = v.difference(q.value)
     v = shapely.force_2d(v)
     if v.geom_type == "MultiLineString":
-        r.value = v
+        value = v
     elif v.length > 0:
-        r.value = MultiLineString([v])
+        value = MultiLineString([v])
     else:
-        r.value = MultiLineString(v)
+        value = MultiLineString(v)
+    if origin is not None and value == r.value:
+        return
+    r = next(
+        r for r in writable(state, origin, exterior).relations if r.target_name == i
+    )
+    r.value = value
 
 
 def mls_ccw(mls: MultiLineString, state: State, i: str):
@@ -184,7 +184,7 @@ class Solver:
             f"{active_count=}/{len(self.state.objs)} objs"
         )
 
-        self.optim.reset(max_iters=n_steps)
+        self.optim.reset(max_iters=n_steps, stage="/".join(desc_full))
         ra = trange(n_steps) if self.optim.print_report_freq == 0 else range(n_steps)
         for j in ra:
             move_gen = self.choose_move_type(moves, j, n_steps)
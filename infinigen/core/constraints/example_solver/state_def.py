@@ -25,7 +25,9 @@ import trimesh
 
 from infinigen.core import tags as t
 from infinigen.core.constraints import constraint_language as cl
+from infinigen.core.constraints.example_solver.geometry.footprints import Footprints
 from infinigen.core.constraints.example_solver.geometry.planes import Planes
+from infinigen.core.constraints.example_solver.geometry.spatial_index import AABBIndex
 from infinigen.core.placement.factory import AssetFactory
 from infinigen.core.util.math import int_hash
 
@@ -85,6 +87,8 @@ class State:
     graphs: list[RoomGraph] = field(default_factory=list)
     bvh_cache: dict = field(default_factory=dict)
     planes: Planes = None
+    spatial_index: AABBIndex = None
+    footprints: Footprints = None
 
     def __getitem__(self, item):
         return self.objs[item]
@@ -167,6 +171,8 @@ class State:
         ]
         self.trimesh_scene = parse_scene.parse_scene(bpy_objs)
         self.planes = Planes()
+        self.spatial_index = AABBIndex()
+        self.footprints = Footprints()
 
     def save(self, filename: str):
         return
@@ -92,6 +92,7 @@ def save_meshes(
     frame_range,
     resample_idx=False,
     point_trajectory_src_frame=1,
+    dedup_meshes=True,
 ):
     if resample_idx is not None and resample_idx > 0:
         resample_scene(int_hash((scene_seed, resample_idx)))
@@ -104,9 +105,25 @@ def save_meshes(
     previous_frame_mesh_id_mapping = dict()
     current_frame_mesh_id_mapping = defaultdict(dict)
 
+    # npz files are saved on a background thread while later frames are extracted
+    writer = exporting.NpzWriter()
+
+    # geometry shared between frames is written once, see exporting.MeshStore
+    mesh_store = (
+        exporting.MeshStore(output_folder / "mesh_store", writer=writer)
+        if dedup_meshes
+        else None
+    )
+
+    # classify once rather than per frame; rigid objects' mesh data is reused between frames
+    classes = exporting.ObjectClasses.from_scene(is_static)
+    logger.info(
+        f"save_meshes found {len(classes.static)} static and {len(classes.rigid)} rigid objects"
+    )
+
     # save static meshes
     for obj in bpy.data.objects:
-        obj.hide_viewport = not (not obj.hide_render and is_static(obj))
+        obj.hide_viewport = not (not obj.hide_render and obj.name in classes.static)
     frame_idx = point_trajectory_src_frame
     frame_info_folder = output_folder / f"frame_{frame_idx:04d}"
     frame_info_folder.mkdir(parents=True, exist_ok=True)
@@ -116,12 +133,15 @@ def save_meshes(
         frame_info_folder / "static_mesh",
         previous_frame_mesh_id_mapping,
         current_frame_mesh_id_mapping,
+        mesh_store=mesh_store,
+        writer=writer,
+        classes=classes,
     )
     previous_frame_mesh_id_mapping = dict(current_frame_mesh_id_mapping)
     current_frame_mesh_id_mapping.clear()
 
     for obj in bpy.data.objects:
-        obj.hide_viewport = not (not obj.hide_render and not is_static(obj))
+        obj.hide_viewport = not (not obj.hide_render and obj.name not in classes.static)
 
     for frame_idx in set(
         [point_trajectory_src_frame]
@@ -137,6 +157,9 @@ def save_meshes(
             frame_info_folder / "mesh",
             previous_frame_mesh_id_mapping,
             current_frame_mesh_id_mapping,
+            mesh_store=mesh_store,
+            writer=writer,
+            classes=classes,
         )
         for cam in cameras:
             cam_util.save_camera_parameters(
@@ -147,6 +170,12 @@ def save_meshes(
         previous_frame_mesh_id_mapping = dict(current_frame_mesh_id_mapping)
         current_frame_mesh_id_mapping.clear()
 
+    writer.close()
+    if mesh_store is not None:
+        logger.info(
+            f"save_meshes wrote {mesh_store.n_added} unique arrays, reused {mesh_store.n_reused}"
+        )
+
 
 def validate_version(scene_version):
     if (
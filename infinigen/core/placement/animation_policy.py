@@ -322,6 +322,56 @@ class AnimPolicyFollowObject:
         return Vector(pos), None, time, "BEZIER"
 
 
+def sample_locations(obj: bpy.types.Object, frames) -> np.ndarray:
+    """
+    (len(frames), 3) obj.location at each frame, evaluating its fcurves directly rather than
+    calling frame_set. Falls back to frame_set if obj has drivers or NLA tracks
+    """
+
+    frames = np.asarray(frames)
+    anim = obj.animation_data
+    if anim is not None and (len(anim.drivers) or len(anim.nla_tracks)):
+        res = []
+        for frame in frames:
+            bpy.context.scene.frame_set(int(frame))
+            res.append(np.array(obj.location))
+        return np.array(res).reshape(-1, 3)
+
+    res = np.tile(np.array(obj.location), (len(frames), 1))
+    if anim is None or anim.action is None:
+        return res
+    for fc in anim.action.fcurves:
+        if fc.data_path == "location":
+            res[:, fc.array_index] = [fc.evaluate(f) for f in frames]
+    return res
+
+
+def first_blocked_segment(
+    bvhtree: BVHTree, points: np.ndarray, min_altitude: float = None
+) -> int | None:
+    """
+    Index i of the first segment points[i] -> points[i + 1] which hits bvhtree, or whose end is
+    less than min_altitude above it. None if the whole polyline is clear
+    """
+
+    points = [Vector(p) for p in points]
+
+    for i, (a, b) in enumerate(zip(points[:-1], points[1:])):
+        if min_altitude is not None:
+            alt = get_altitude(b, bvhtree)
+            if alt is None or alt < min_altitude:
+                return i
+
+        v = b - a
+        if v.length == 0:
+            continue
+        location, *_ = bvhtree.ray_cast(a, v, v.length)
+        if location is not None:
+            return i
+
+    return None
+
+
 def validate_keyframe_range(
     obj,
     start_frame,
@@ -330,33 +380,47 @@ def validate_keyframe_range(
     validate_pose_func=None,
     stride=5,  # runs faster but imperfect precision
     check_straight_line=True,  # rules out proposals faster, but has imperfect precision
+    ray_stride=1,
+    min_altitude=None,
 ):
-    last_pos = deepcopy(obj.location)
+    """
+    Check that obj can move from its current location along its keyframes from start_frame to
+    end_frame without hitting bvhtree, sampling its path every ray_stride frames, and that it
+    satisfies validate_pose_func every `stride` frames.
+
+    All ray checks are run on sampled fcurve values before any frame_set, so most rejected
+    trajectories never evaluate the scene at all
+    """
 
-    def freespace_ray_check(a, b):
-        location, *_ = bvhtree.ray_cast(a, b - a, (a - b).length)
-        return location is None
+    start_pos = np.array(obj.location)
+    pose_frames = list(range(start_frame, end_frame + 1, stride))
+    ray_frames = sorted(set(range(start_frame, end_frame + 1, ray_stride)))
 
     if check_straight_line:
-        bpy.context.scene.frame_set(end_frame)
-        if not freespace_ray_check(last_pos, obj.location):
+        (end_pos,) = sample_locations(obj, [end_frame])
+        if first_blocked_segment(bvhtree, [start_pos, end_pos]) is not None:
             logger.debug("straight line check failed")
             return False
 
-    for frame_idx in range(start_frame, end_frame + 1, stride):
-        bpy.context.scene.frame_set(frame_idx)
+    path = np.concatenate([start_pos[None], sample_locations(obj, ray_frames)])
+    blocked = first_blocked_segment(bvhtree, path, min_altitude=min_altitude)
+    if blocked is not None:
+        logger.debug(f"frame_idx={ray_frames[blocked]} freespace_ray_check failed")
+        return False
 
-        if not freespace_ray_check(last_pos, obj.location):
-            logger.debug(f"{frame_idx=} freespace_ray_check failed")
-            return False
+    if validate_pose_func is None:
+        # callers continue from the pose at the last sampled frame
+        bpy.context.scene.frame_set(pose_frames[-1])
+        return True
 
-        if validate_pose_func is not None and not validate_pose_func(obj):
+    for frame_idx in pose_frames:
+        bpy.context.scene.frame_set(frame_idx)
+
+        if not validate_pose_func(obj):
             # technically we should validate against all cameras, but this would be expensive
             logger.debug(f"{frame_idx} validate_pose_func failed")
             return False
 
-        last_pos = deepcopy(obj.location)
-
     return True
 
 
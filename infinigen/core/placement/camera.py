@@ -11,6 +11,7 @@ import logging
 import typing
 from copy import deepcopy
 from dataclasses import dataclass
+from functools import partial
 from itertools import chain
 from pathlib import Path
 
@@ -36,13 +37,16 @@ from infinigen.core.util.random import random_general
 from infinigen.terrain.core import Terrain
 from infinigen.tools.suffixes import get_suffix
 
-from . import animation_policy
+from . import animation_policy, placeholder_store
 
 logger = logging.getLogger(__name__)
 
 
-@gin.configurable
-def get_sensor_coords(cam, H, W, sparse=False):
+def relative_sensor_coords(cam, H, W):
+    """
+    (H, W, 3) camera-space position of each pixel on the sensor plane
+    """
+
     camd = cam.data
     f_in_m = camd.lens / 1000
     scene = bpy.context.scene
@@ -82,7 +86,18 @@ def get_sensor_coords(cam, H, W, sparse=False):
     coords_y = (yy - v_0 + 1) / s_v  # relative, in mm
 
     coords_z = np.full(coords_x.shape, -f_in_m)
-    relative_cam_coords = np.stack((coords_x, coords_y, coords_z), axis=-1)
+    return np.stack((coords_x, coords_y, coords_z), axis=-1)
+
+
+@gin.configurable
+def get_sensor_coords(cam, H=None, W=None, sparse=False):
+    scene = bpy.context.scene
+    if H is None:
+        H = scene.render.resolution_y
+    if W is None:
+        W = scene.render.resolution_x
+
+    relative_cam_coords = relative_sensor_coords(cam, H, W)
 
     cam_coords_vectors = np.empty((H, W), dtype=Vector)
     pixel_locs = np.stack((np.meshgrid(np.arange(W), np.arange(H))), axis=-1).reshape(
@@ -99,6 +114,35 @@ def get_sensor_coords(cam, H, W, sparse=False):
     return cam_coords_vectors, pixel_locs
 
 
+def sensor_resolution():
+    """
+    (H, W) of the sensor grid used for camera rays: the get_sensor_coords.H / .W gin bindings
+    if set, else the render resolution
+    """
+    scene = bpy.context.scene
+    bindings = gin.get_bindings(get_sensor_coords)
+    return (
+        bindings.get("H", scene.render.resolution_y),
+        bindings.get("W", scene.render.resolution_x),
+    )
+
+
+def sample_sensor_rays(cam, n=1000, rng=np.random):
+    """
+    World-space origin and unit directions of the rays through `n` sensor pixels
+    of `cam`, sampled with replacement as in get_sensor_coords(sparse=True)
+    """
+
+    H, W = sensor_resolution()
+    rel = relative_sensor_coords(cam, H, W).reshape(-1, 3)
+    rel = rel[rng.choice(H * W, size=n)]
+
+    M = np.array(cam.matrix_world)
+    dirs = rel @ M[:3, :3].T
+    dirs /= np.linalg.norm(dirs, axis=-1, keepdims=True)
+    return M[:3, 3], dirs
+
+
 def adjust_camera_sensor(cam):
     scene = bpy.context.scene
     W = scene.render.resolution_x
@@ -189,20 +233,20 @@ def set_active_camera(camera: bpy.types.Object):
     return bpy.context.scene.camera
 
 
-def terrain_camera_query(
-    cam: bpy.types.Object,
+def terrain_ray_query(
+    origin: np.ndarray,
+    dirs: np.ndarray,
     scene_bvh: BVHTree,
     terrain_tags_queries,
     vertexwise_min_dist,
     min_dist=0,
 ):
     dists = []
-    sensor_coords, pix_it = get_sensor_coords(cam, sparse=True)
     terrain_tags_queries_counts = {q: 0 for q in terrain_tags_queries}
 
-    for x, y in pix_it:
-        direction = (sensor_coords[y, x] - cam.matrix_world.translation).normalized()
-        _, _, index, dist = scene_bvh.ray_cast(cam.matrix_world.translation, direction)
+    origin = Vector(origin)
+    for direction in dirs:
+        _, _, index, dist = scene_bvh.ray_cast(origin, Vector(direction))
         if dist is None:
             continue
         dists.append(dist)
@@ -215,9 +259,25 @@ def terrain_camera_query(
         for q in terrain_tags_queries:
             terrain_tags_queries_counts[q] += terrain_tags_queries[q][index]
 
-    n_pix = pix_it.shape[0]
+    return dists, terrain_tags_queries_counts, len(dirs)
 
-    return dists, terrain_tags_queries_counts, n_pix
+
+def terrain_camera_query(
+    cam: bpy.types.Object,
+    scene_bvh: BVHTree,
+    terrain_tags_queries,
+    vertexwise_min_dist,
+    min_dist=0,
+):
+    origin, dirs = sample_sensor_rays(cam)
+    return terrain_ray_query(
+        origin,
+        dirs,
+        scene_bvh,
+        terrain_tags_queries,
+        vertexwise_min_dist,
+        min_dist=min_dist,
+    )
 
 
 @dataclass
@@ -327,8 +387,10 @@ def keep_cam_pose_proposal(
     min_placeholder_dist=0,
     min_terrain_distance=0,
     terrain_coverage_range=(0.5, 1),
+    terrain_sdf=None,
+    camera_query=terrain_camera_query,
 ):
-    if terrain is not None:  # TODO refactor
+    if terrain is not None and terrain_sdf is None:  # TODO refactor
         terrain_sdf = terrain.compute_camera_space_sdf(
             np.array(cam.matrix_world.translation).reshape((1, 3))
         )
@@ -344,7 +406,7 @@ def keep_cam_pose_proposal(
         logger.debug(f"keep_cam_pose_proposal rejects {dist_to_placeholder=}, {v, i}")
         return None
 
-    dists, camera_selection_answers_counts, n_pix = terrain_camera_query(
+    dists, camera_selection_answers_counts, n_pix = camera_query(
         cam,
         scene_bvh,
         camera_selection_answers,
@@ -424,6 +486,120 @@ class AnimPolicyGoToProposals:
         return Vector(res.loc), Vector(res.rot), time, "BEZIER"
 
 
+class _DeferredQuery(Exception):
+    pass
+
+
+class _QueryRecorder:
+    """
+    Stands in for terrain_camera_query in keep_cam_pose_proposal. Samples the camera's rays at
+    its current pose, then aborts the check so the ray casts themselves can run later
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.queries = []
+
+    def __call__(
+        self, cam, scene_bvh, terrain_tags_queries, vertexwise_min_dist, min_dist=0
+    ):
+        origin, dirs = sample_sensor_rays(cam, rng=self.rng)
+        self.queries.append(
+            partial(
+                terrain_ray_query,
+                origin,
+                dirs,
+                scene_bvh,
+                terrain_tags_queries,
+                vertexwise_min_dist,
+                min_dist=min_dist,
+            )
+        )
+        raise _DeferredQuery()
+
+
+def _batched_view_scores(
+    camera_rig: bpy.types.Object,
+    batch: list[tuple[CameraProposal, int]],
+    terrain,
+    scene_bvh: BVHTree,
+    placeholders_kd,
+    **kwargs,
+):
+    """
+    Same criterion compute_base_views would give each (proposal, seed) in batch, or None if rejected.
+
+    Proposals whose cameras are inside the terrain are rejected with one batched SDF query, and
+    the placeholder distance check runs before any rays are cast. The remaining terrain ray
+    queries sample their pixels with np.random.default_rng(seed)
+    """
+
+    cams = [c for c in camera_rig.children if c.type == "CAMERA"]
+
+    terrain_sdf = None
+    if terrain is not None:
+        locs = []
+        for props, _ in batch:
+            props.apply(camera_rig)
+            bpy.context.view_layer.update()
+            locs += [np.array(c.matrix_world.translation) for c in cams]
+        terrain_sdf = terrain.compute_camera_space_sdf(np.array(locs)).reshape(
+            len(batch), len(cams)
+        )
+
+    pending = {}
+    for i, (props, seed) in enumerate(batch):
+        if terrain_sdf is not None and (terrain_sdf[i] <= 0).any():
+            logger.debug(f"{_batched_view_scores.__name__} rejects {terrain_sdf[i]=}")
+            continue
+        props.apply(camera_rig)
+        bpy.context.view_layer.update()
+        recorder = _QueryRecorder(np.random.default_rng(seed))
+        for j, cam in enumerate(cams):
+            try:
+                keep_cam_pose_proposal(
+                    cam,
+                    terrain,
+                    scene_bvh,
+                    placeholders_kd,
+                    terrain_sdf=None if terrain_sdf is None else terrain_sdf[i, j],
+                    camera_query=recorder,
+                    **kwargs,
+                )
+            except _DeferredQuery:
+                continue
+            break  # rejected before reaching the query
+        else:
+            pending[i] = recorder.queries
+
+    # BVHTree.ray_cast holds the GIL, so these run serially
+    results = [q() for queries in pending.values() for q in queries]
+
+    scores = [None] * len(batch)
+    results = iter(results)
+    for i, queries in pending.items():
+        props, _ = batch[i]
+        props.apply(camera_rig)
+        bpy.context.view_layer.update()
+        all_scores = []
+        for j, (cam, res) in enumerate(zip(cams, [next(results) for _ in queries])):
+            all_scores.append(
+                keep_cam_pose_proposal(
+                    cam,
+                    terrain,
+                    scene_bvh,
+                    placeholders_kd,
+                    terrain_sdf=None if terrain_sdf is None else terrain_sdf[i, j],
+                    camera_query=lambda *_, res=res, **__: res,
+                    **kwargs,
+                )
+            )
+        if not any(score is None for score in all_scores):
+            scores[i] = np.mean(all_scores)
+
+    return scores
+
+
 @gin.configurable
 def compute_base_views(
     camera_rig: bpy.types.Object,
@@ -438,67 +614,116 @@ def compute_base_views(
     min_candidates_ratio=20,
     max_tries=30000,
     visualize=False,
+    batch_size=None,
     **kwargs,
 ):
+    """
+    Search for the n_views best scoring poses of camera_rig.
+
+    By default proposals are scored one at a time. With batch_size set, proposals are generated
+    batch_size at a time and scored by _batched_view_scores, which gives different (but still
+    seed-determined) results since each proposal samples its pixels from its own generator
+    """
+
     potential_views = []
     n_min_candidates = int(min_candidates_ratio * n_views)
 
-    with tqdm(total=n_min_candidates, desc="Searching for camera viewpoints") as pbar:
-        for it in range(1, max_tries):
-            if center_coordinate:
-                props = camera_pose_proposal(
-                    scene_bvh=scene_bvh,
-                    location_sample=location_sample,
-                    center_coordinate=center_coordinate,
-                    radius=random_general(radius),
-                    bbox=bbox,
-                )
-            else:
-                props = camera_pose_proposal(
-                    scene_bvh=scene_bvh, location_sample=location_sample
-                )
+    def propose(it):
+        if center_coordinate:
+            props = camera_pose_proposal(
+                scene_bvh=scene_bvh,
+                location_sample=location_sample,
+                center_coordinate=center_coordinate,
+                radius=random_general(radius),
+                bbox=bbox,
+            )
+        else:
+            props = camera_pose_proposal(
+                scene_bvh=scene_bvh, location_sample=location_sample
+            )
 
-            if props is None:
-                logger.debug(
-                    f"{camera_pose_proposal.__name__} returned {props=} for {it=}"
-                )
-                continue
+        if props is None:
+            logger.debug(f"{camera_pose_proposal.__name__} returned {props=} for {it=}")
+        return props
 
-            props.apply(camera_rig)
+    def serial_scores(it):
+        props = propose(it)
+        if props is None:
+            return []
 
-            all_scores = []
-            for cam in camera_rig.children:
-                score = keep_cam_pose_proposal(
-                    cam,
-                    terrain,
-                    scene_bvh,
-                    placeholders_kd,
-                    **kwargs,
-                )
-                all_scores.append(score)
+        props.apply(camera_rig)
 
-            if any(score is None for score in all_scores):
-                criterion = None
-            else:
-                criterion = np.mean(all_scores)
+        all_scores = []
+        for cam in camera_rig.children:
+            score = keep_cam_pose_proposal(
+                cam,
+                terrain,
+                scene_bvh,
+                placeholders_kd,
+                **kwargs,
+            )
+            all_scores.append(score)
 
-            if visualize:
-                criterion_str = f"{criterion:.2f}" if criterion is not None else "None"
-                marker = butil.spawn_empty(f"attempt_{it}_{criterion_str}")
-                marker.location = camera_rig.location
-                marker.rotation_euler = camera_rig.rotation_euler
+        if any(score is None for score in all_scores):
+            criterion = None
+        else:
+            criterion = np.mean(all_scores)
+        return [(it, props, criterion)]
+
+    def batched_scores(it):
+        batch = []
+        for i in range(it, min(it + batch_size, max_tries)):
+            props = propose(i)
+            if props is not None:
+                batch.append((i, props, np.random.randint(2**31)))
+        scores = _batched_view_scores(
+            camera_rig,
+            [(props, seed) for _, props, seed in batch],
+            terrain,
+            scene_bvh,
+            placeholders_kd,
+            **kwargs,
+        )
+        return [(i, props, c) for (i, props, _), c in zip(batch, scores)]
 
-            if criterion is None:
-                logger.debug(f"{it=} {criterion=}")
-                continue
+    step = 1 if batch_size is None else batch_size
+    with tqdm(total=n_min_candidates, desc="Searching for camera viewpoints") as pbar:
+        for start in range(1, max_tries, step):
+            if batch_size is None:
+                scored = serial_scores(start)
+            else:
+                scored = batched_scores(start)
+
+            for it, props, criterion in scored:
+                if batch_size is not None:
+                    props.apply(camera_rig)
+                    bpy.context.view_layer.update()
+
+                if visualize:
+                    criterion_str = (
+                        f"{criterion:.2f}" if criterion is not None else "None"
+                    )
+                    marker = butil.spawn_empty(f"attempt_{it}_{criterion_str}")
+                    marker.location = camera_rig.location
+                    marker.rotation_euler = camera_rig.rotation_euler
+
+                if criterion is None:
+                    logger.debug(f"{it=} {criterion=}")
+                    continue
 
-            # Compute focus distance
-            destination = cam.matrix_world @ Vector((0.0, 0.0, -1.0))
-            forward_dir = (destination - cam.location).normalized()
-            *_, straight_ahead_dist = scene_bvh.ray_cast(cam.location, forward_dir)
+                # Compute focus distance
+                cam = camera_rig.children[-1]
+                destination = cam.matrix_world @ Vector((0.0, 0.0, -1.0))
+                forward_dir = (destination - cam.location).normalized()
+                *_, straight_ahead_dist = scene_bvh.ray_cast(cam.location, forward_dir)
 
-            potential_views.append((criterion, deepcopy(props), straight_ahead_dist))
-            pbar.update(1)
+                potential_views.append(
+                    (criterion, deepcopy(props), straight_ahead_dist)
+                )
+                pbar.update(1)
+
+                if len(potential_views) >= n_min_candidates:
+                    break
 
             if len(potential_views) >= n_min_candidates:
                 break
@@ -597,8 +822,13 @@ def camera_selection_preprocessing(
             )
         )
         placeholders = [p for p in placeholders if p.type == "MESH"]
-        logger.info(f"Building placeholder kd for {len(placeholders)} objects")
-        placeholders_kd = butil.joined_kd(placeholders, include_origins=True)
+        stored = placeholder_store.stored_locations()
+        logger.info(
+            f"Building placeholder kd for {len(placeholders)} objects and {len(stored)} stored placeholders"
+        )
+        placeholders_kd = butil.joined_kd(
+            placeholders, include_origins=True, points=stored
+        )
 
     if terrain is None:
         scene_bvh, camera_selection_answers = build_bvh_and_attrs(
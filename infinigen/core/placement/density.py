@@ -6,14 +6,18 @@
 # - Zeyu Ma: Selection based on tag
 
 
+import hashlib
 import logging
+import zlib
 
+import bpy
 import mathutils
 import numpy as np
 
+from infinigen.core.nodes import node_info
 from infinigen.core.nodes import node_utils as nu
 from infinigen.core.nodes.node_wrangler import Nodes
-from infinigen.core.surface import eval_argument
+from infinigen.core.surface import eval_argument, write_attr_data
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +29,10 @@ def set_tag_dict(tag_dict_):
     tag_dict = tag_dict_
 
 
-def tag_mask(nw, tag):
+MASKS_PROP = "placement_masks"
+
+
+def _tag_keys(tag):
     keys = list(tag_dict.keys())
     tag_parts = tag.split(",")
     logger.debug(
@@ -36,6 +43,11 @@ def tag_mask(nw, tag):
             keys = [k for k in keys if part[1:] not in k.split(".")]
         else:
             keys = [k for k in keys if part in k.split(".")]
+    return keys
+
+
+def tag_mask(nw, tag):
+    keys = _tag_keys(tag)
     conditions = []
     for k in keys:
         comp = nw.new_node(
@@ -52,6 +64,133 @@ def tag_mask(nw, tag):
         return mask
 
 
+def tag_mask_np(masktag: np.ndarray, tag) -> np.ndarray:
+    keys = _tag_keys(tag)
+    if not len(keys):
+        return np.ones(len(masktag))
+    return np.isin(masktag, [tag_dict[k] for k in keys]).astype(np.float64)
+
+
+def _corner_values(mesh: bpy.types.Mesh, attr: str) -> np.ndarray:
+    """
+    Values of a POINT, FACE or CORNER attribute at each corner, as geometry nodes interpolates them
+    """
+    attribute = mesh.attributes[attr]
+    field = node_info.DATATYPE_FIELDS[attribute.data_type]
+    data = np.empty(len(attribute.data), dtype=np.float64)
+    attribute.data.foreach_get(field, data)
+
+    if attribute.domain == "CORNER":
+        return data
+    if attribute.domain == "POINT":
+        verts = np.empty(len(mesh.loops), dtype=np.int64)
+        mesh.loops.foreach_get("vertex_index", verts)
+        return data[verts]
+    if attribute.domain == "FACE":
+        totals = np.empty(len(mesh.polygons), dtype=np.int64)
+        mesh.polygons.foreach_get("loop_total", totals)
+        return np.repeat(data, totals)
+    raise ValueError(f"Cannot read {attr=} with {attribute.domain=} at corners")
+
+
+def static_mask_np(
+    obj: bpy.types.Object,
+    normal_thresh=0.5,
+    normal_thresh_high=2.0,
+    normal_dir=(0, 0, 1),
+    tag=None,
+    altitude_range=None,
+) -> np.ndarray:
+    """
+    Per-corner numpy equivalent of placement_mask's normal, tag and altitude terms, in world space.
+
+    DistributePointsOnFaces evaluates its selection on corners, so this uses the position of each
+    corner's vertex and the normal of its face, in float32 like the node graph
+    """
+
+    mesh = obj.data
+    n = len(mesh.loops)
+    M = np.array(obj.matrix_world, dtype=np.float32)
+    transformed = not np.array_equal(M, np.eye(4, dtype=np.float32))
+
+    verts = np.empty(n, dtype=np.int64)
+    mesh.loops.foreach_get("vertex_index", verts)
+    totals = np.empty(len(mesh.polygons), dtype=np.int64)
+    mesh.polygons.foreach_get("loop_total", totals)
+
+    mask = np.ones(n, dtype=np.float32)
+
+    if normal_thresh is not None:
+        # geometry nodes reads Normal on corners as the normal of their face
+        normals = np.empty(len(mesh.polygons) * 3, dtype=np.float32)
+        mesh.polygons.foreach_get("normal", normals)
+        normals = np.repeat(normals.reshape(-1, 3), totals, axis=0)
+        if transformed:
+            normals = normals @ np.linalg.inv(M[:3, :3])
+            normals /= np.linalg.norm(normals, axis=-1, keepdims=True).clip(1e-12)
+        d = np.asarray(normal_dir, dtype=np.float32)
+        # summed in the same order as the dot product node
+        facing = normals[:, 0] * d[0] + normals[:, 1] * d[1] + normals[:, 2] * d[2]
+        mask *= facing > np.float32(normal_thresh)
+        if normal_thresh_high is not None:
+            mask *= -facing > np.float32(-normal_thresh_high)
+
+    if tag is not None:
+        if "MaskTag" in mesh.attributes:
+            masktag = _corner_values(mesh, "MaskTag")
+        else:
+            masktag = np.zeros(n, dtype=np.int64)
+        mask *= tag_mask_np(masktag, tag)
+
+    if altitude_range is not None:
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        co = co.reshape(-1, 3)
+        z = co @ M[2, :3] + M[2, 3] if transformed else co[:, 2]
+        z = z[verts]
+        start, end = altitude_range
+        mask *= (z > np.float32(start)) & (z < np.float32(end))
+
+    return mask
+
+
+def _geometry_fingerprint(obj):
+    co = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+    obj.data.vertices.foreach_get("co", co)
+    M = np.array(obj.matrix_world, dtype=np.float32)
+    return (
+        f"{len(obj.data.polygons)}:{zlib.crc32(co.tobytes())}:{zlib.crc32(M.tobytes())}"
+    )
+
+
+def cached_static_mask(obj: bpy.types.Object, **mask_kwargs) -> str:
+    """
+    Store static_mask_np(obj, **mask_kwargs) as a CORNER attribute on obj and return its name.
+
+    Scatters with the same mask parameters on the same target reuse the attribute, until the
+    target's geometry or transform changes
+    """
+
+    params = repr(sorted(mask_kwargs.items())) + repr(
+        sorted(tag_dict.items()) if mask_kwargs.get("tag") and tag_dict else None
+    )
+    name = "placement_mask_" + hashlib.md5(params.encode()).hexdigest()[:12]
+
+    fingerprint = _geometry_fingerprint(obj)
+    cached = obj.data.get(MASKS_PROP, {})
+    if cached.get(name) == fingerprint and name in obj.data.attributes:
+        logger.debug(f"Reusing {name} on {obj.name=}")
+        return name
+
+    mask = static_mask_np(obj, **mask_kwargs)
+    write_attr_data(obj, name, mask, type="FLOAT", domain="CORNER")
+
+    cached = dict(cached)
+    cached[name] = fingerprint
+    obj.data[MASKS_PROP] = cached
+    return name
+
+
 def placement_mask(
     scale=0.05,
     select_thresh=0.55,
@@ -61,10 +200,31 @@ def placement_mask(
     tag=None,
     return_scalar=False,
     altitude_range=None,
+    target=None,
 ):
+    """
+    If target is given, the normal, tag and altitude terms are evaluated once with numpy and
+    read back from a cached attribute on target, rather than rebuilt as nodes for every scatter.
+    Only use target for selections applied to that object.
+    """
+
+    static_attr = None
+    if target is not None:
+        static_attr = cached_static_mask(
+            target,
+            normal_thresh=normal_thresh,
+            normal_thresh_high=normal_thresh_high,
+            normal_dir=tuple(normal_dir),
+            tag=tag,
+            altitude_range=None if altitude_range is None else tuple(altitude_range),
+        )
+
     def selection(nw):
-        mask = nw.new_node(Nodes.Value)
-        mask.outputs["Value"].default_value = 1
+        if static_attr is not None:
+            mask = eval_argument(nw, static_attr)
+        else:
+            mask = nw.new_node(Nodes.Value)
+            mask.outputs["Value"].default_value = 1
 
         if select_thresh is not None:
             mininum_val = nw.new_node(Nodes.Value)
@@ -79,7 +239,7 @@ def placement_mask(
             )
             mask = nw.scalar_multiply(mask, noise_mask)
 
-        if normal_thresh is not None:
+        if static_attr is None and normal_thresh is not None:
             facing_mask = nu.facing_mask(nw, normal_dir, thresh=normal_thresh)
             mask = nw.scalar_multiply(mask, facing_mask)
             if normal_thresh_high is not None:
@@ -88,9 +248,9 @@ def placement_mask(
                 )
                 mask = nw.scalar_multiply(mask, facing_mask)
 
-        if tag is not None:
+        if static_attr is None and tag is not None:
             mask = nw.scalar_multiply(mask, tag_mask(nw, tag))
-        if altitude_range is not None:
+        if static_attr is None and altitude_range is not None:
             z = (nw.new_node(Nodes.SeparateXYZ, [nw.new_node(Nodes.InputPosition)]), 2)
             start, end = altitude_range
             mask = nw.scalar_multiply(
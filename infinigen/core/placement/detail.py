@@ -4,7 +4,11 @@
 # Authors: Alexander Raistrick
 
 
+import functools
+import hashlib
 import logging
+from collections import OrderedDict
+from pathlib import Path
 
 import bpy
 import gin
@@ -20,6 +24,215 @@ logger = logging.getLogger(__name__)
 IS_COARSE = False  # Global VARIABLE, set by infinigen_examples/generate_nature.py and used only for whether to emit warnings
 
 
+# data_type -> (foreach field, components, dtype)
+_ATTR_FIELDS = {
+    "FLOAT": ("value", 1, np.float32),
+    "INT": ("value", 1, np.int32),
+    "INT8": ("value", 1, np.int32),
+    "BOOLEAN": ("value", 1, bool),
+    "FLOAT_VECTOR": ("vector", 3, np.float32),
+    "FLOAT2": ("vector", 2, np.float32),
+    "INT32_2D": ("value", 2, np.int32),
+    "FLOAT_COLOR": ("color", 4, np.float32),
+    "BYTE_COLOR": ("color", 4, np.float32),
+    "QUATERNION": ("value", 4, np.float32),
+}
+
+
+def _foreach_get(collection, field, n, dtype):
+    arr = np.empty(n, dtype=dtype)
+    collection.foreach_get(field, arr)
+    return arr
+
+
+def mesh_to_arrays(mesh: bpy.types.Mesh) -> dict[str, np.ndarray]:
+    """
+    Topology and every non-internal attribute of mesh, as flat numpy arrays
+    """
+
+    nv, ne, nl, np_ = (
+        len(mesh.vertices),
+        len(mesh.edges),
+        len(mesh.loops),
+        len(mesh.polygons),
+    )
+    arrays = {
+        "co": _foreach_get(mesh.vertices, "co", 3 * nv, np.float32),
+        "edges": _foreach_get(mesh.edges, "vertices", 2 * ne, np.int32),
+        "loop_verts": _foreach_get(mesh.loops, "vertex_index", nl, np.int32),
+        "loop_edges": _foreach_get(mesh.loops, "edge_index", nl, np.int32),
+        "loop_start": _foreach_get(mesh.polygons, "loop_start", np_, np.int32),
+        "loop_total": _foreach_get(mesh.polygons, "loop_total", np_, np.int32),
+    }
+    sizes = {"POINT": nv, "EDGE": ne, "CORNER": nl, "FACE": np_}
+
+    for attr in mesh.attributes:
+        if attr.name.startswith(".") or attr.name == "position":
+            continue
+        if attr.data_type not in _ATTR_FIELDS or attr.domain not in sizes:
+            logger.debug(f"mesh_to_arrays skipping {attr.name=} {attr.data_type=}")
+            continue
+        field, dim, dtype = _ATTR_FIELDS[attr.data_type]
+        n = sizes[attr.domain] * dim
+        key = f"attr:{attr.domain}:{attr.data_type}:{attr.name}"
+        arrays[key] = _foreach_get(attr.data, field, n, dtype)
+
+    return arrays
+
+
+def arrays_to_mesh(mesh: bpy.types.Mesh, arrays: dict[str, np.ndarray]):
+    """
+    Replace mesh's geometry with the output of mesh_to_arrays, keeping its materials
+    """
+
+    mesh.clear_geometry()
+    mesh.vertices.add(len(arrays["co"]) // 3)
+    mesh.vertices.foreach_set("co", arrays["co"])
+    mesh.edges.add(len(arrays["edges"]) // 2)
+    mesh.edges.foreach_set("vertices", arrays["edges"])
+    mesh.loops.add(len(arrays["loop_verts"]))
+    mesh.loops.foreach_set("vertex_index", arrays["loop_verts"])
+    mesh.loops.foreach_set("edge_index", arrays["loop_edges"])
+    mesh.polygons.add(len(arrays["loop_start"]))
+    mesh.polygons.foreach_set("loop_start", arrays["loop_start"])
+    mesh.polygons.foreach_set("loop_total", arrays["loop_total"])
+
+    for key, data in arrays.items():
+        if not key.startswith("attr:"):
+            continue
+        _, domain, data_type, name = key.split(":", 3)
+        attr = mesh.attributes.get(name)
+        if attr is None:
+            attr = mesh.attributes.new(name, data_type, domain)
+        attr.data.foreach_set(_ATTR_FIELDS[data_type][0], data)
+
+    mesh.update()
+
+
+@gin.configurable
+class DetailCache:
+    """
+    Content-addressed cache of the meshes produced by adapt_mesh_resolution and the remesh functions.
+
+    Entries are keyed on the input mesh's arrays, the object's scale, the function and its
+    arguments, and face_size quantized to `steps_per_octave` steps per doubling. The function is
+    run at that quantized face size, so a hit gives exactly the mesh a miss would have. Entries
+    are kept in memory and, if folder is set, as .npz files there, so they can be shared between
+    tasks
+    """
+
+    def __init__(
+        self,
+        enabled=False,
+        folder=None,
+        steps_per_octave=8,
+        max_memory_entries=32,
+    ):
+        self.enabled = enabled
+        self.folder = None if folder is None else Path(folder)
+        self.steps_per_octave = steps_per_octave
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+
+        if self.enabled and self.folder is not None:
+            self.folder.mkdir(parents=True, exist_ok=True)
+
+    def quantize(self, face_size: float) -> float:
+        # round down, ie towards finer detail
+        steps = np.floor(np.log2(face_size) * self.steps_per_octave)
+        return float(2 ** (steps / self.steps_per_octave))
+
+    def key(self, name: str, mesh: bpy.types.Mesh, face_size: float, args) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((name, face_size, args)).encode())
+        for k, v in sorted(mesh_to_arrays(mesh).items()):
+            h.update(k.encode())
+            h.update(np.ascontiguousarray(v).tobytes())
+        return h.hexdigest()
+
+    def _path(self, key):
+        return self.folder / f"{key}.npz"
+
+    def get(self, key: str) -> dict[str, np.ndarray] | None:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if self.folder is not None and self._path(key).exists():
+            with np.load(self._path(key)) as f:
+                arrays = dict(f)
+            self._remember(key, arrays)
+            return arrays
+        return None
+
+    def put(self, key: str, arrays: dict[str, np.ndarray]):
+        self._remember(key, arrays)
+        if self.folder is not None:
+            tmp = self.folder / f"{key}.tmp.npz"
+            np.savez_compressed(tmp, **arrays)
+            tmp.replace(self._path(key))
+
+    def _remember(self, key, arrays):
+        self._memory[key] = arrays
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+
+_detail_cache = None
+_cache_depth = 0
+
+
+def detail_cache() -> DetailCache:
+    global _detail_cache
+    if _detail_cache is None:
+        _detail_cache = DetailCache()
+    return _detail_cache
+
+
+def cached_detail(fn):
+    """
+    Serve fn(obj, face_size, ...) from detail_cache() when it is enabled.
+    Calls made from inside another cached call are not cached separately
+    """
+
+    @functools.wraps(fn)
+    def wrapper(obj, face_size, *args, **kwargs):
+        global _cache_depth
+
+        cache = detail_cache()
+        if (
+            not cache.enabled
+            or _cache_depth > 0
+            or obj.type != "MESH"
+            or kwargs.get("apply", True) is False
+        ):
+            return fn(obj, face_size, *args, **kwargs)
+
+        face_size = cache.quantize(face_size)
+        # the mesh alone is not enough, eg sharp_remesh_with_attrs sizes its octree from obj.dimensions
+        scale = tuple(obj.scale)
+        key = cache.key(fn.__name__, obj.data, face_size, (scale, args, kwargs))
+
+        arrays = cache.get(key)
+        if arrays is not None:
+            logger.debug(f"{fn.__name__} on {obj.name=} loaded from cache {key=}")
+            arrays_to_mesh(obj.data, arrays)
+            return obj if arrays["returns_obj"] else None
+
+        _cache_depth += 1
+        try:
+            res = fn(obj, face_size, *args, **kwargs)
+        finally:
+            _cache_depth -= 1
+
+        arrays = mesh_to_arrays(obj.data)
+        arrays["returns_obj"] = np.array(res is obj)
+        cache.put(key, arrays)
+        return res
+
+    return wrapper
+
+
 @gin.configurable
 def scatter_res_distance(dist=4):
     return dist
@@ -79,6 +292,7 @@ def target_face_size(
     return np.clip(global_multiplier * res, global_clip_min, global_clip_max)
 
 
+@cached_detail
 def remesh_with_attrs(
     obj, face_size, apply=True, min_remesh_size=None, attributes=None
 ):
@@ -104,6 +318,7 @@ def remesh_with_attrs(
     return obj
 
 
+@cached_detail
 def sharp_remesh_with_attrs(
     obj, face_size, apply=True, min_remesh_size=None, attributes=None
 ):
@@ -180,6 +395,7 @@ def min_max_edgelen(mesh):
         return lens[len(lens) // 4], lens[-len(lens) // 4]
 
 
+@cached_detail
 def adapt_mesh_resolution(obj, face_size, method, approx=0.2, **kwargs):
     assert obj.type == "MESH"
     assert 0 <= approx and approx <= 0.5
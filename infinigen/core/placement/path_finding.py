@@ -3,12 +3,11 @@
 
 # Authors: Zeyu Ma
 
-import itertools
-
+import gin
 import mathutils
-import networkx as nx
 import numpy as np
 from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
 
 
 def camera_rotation_matrix(pointing_direction, up_vector):
@@ -20,44 +19,111 @@ def camera_rotation_matrix(pointing_direction, up_vector):
     return np.column_stack((right, up, forward))
 
 
+# half of the 18-neighbourhood, each edge is added in both directions
+NEIGHBOR_OFFSETS = np.array(
+    [
+        [1, 0, 0],
+        [0, 1, 0],
+        [0, 0, 1],
+        [1, 1, 0],
+        [0, 1, 1],
+        [1, 0, 1],
+        [1, -1, 0],
+        [0, 1, -1],
+        [1, 0, -1],
+    ]
+)
+
+
+def freespace_ray_check(bvhtree, a, b, margin=0):
+    v = b - a
+    location, *_ = bvhtree.ray_cast(a, v, v.length)
+    if location is not None:
+        return False
+    if margin != 0:
+        if v[0] != 0:
+            perp = mathutils.Vector([v[1], -v[0], 0])
+        else:
+            perp = mathutils.Vector([0, v[2], -v[1]])
+        offset = v.cross(perp)
+        offset *= margin / offset.length
+        check_N = 10
+        angle = np.pi * 2 / check_N
+        for i in range(check_N):
+            location, *_ = bvhtree.ray_cast(a + offset, v, v.length)
+            if location is not None:
+                return False
+            tar_direction = offset.cross(v)
+            tar_direction *= margin / tar_direction.length
+            offset = offset * np.cos(angle) + tar_direction * np.sin(angle)
+    return True
+
+
+def grid_edges(N, penalty):
+    """
+    Every 18-neighbourhood edge of an N[0] x N[1] x N[2] grid, listed once,
+    weighted 1 if horizontal and `penalty` otherwise
+    """
+
+    index = np.arange(np.prod(N)).reshape(N)
+    row, col, data = [], [], []
+    for offset in NEIGHBOR_OFFSETS:
+        src = tuple(slice(max(0, -d), n - max(0, d)) for d, n in zip(offset, N))
+        dst = tuple(slice(max(0, d), n - max(0, -d)) for d, n in zip(offset, N))
+        row.append(index[src].reshape(-1))
+        col.append(index[dst].reshape(-1))
+        data.append(np.full(row[-1].shape, 1 if offset[2] == 0 else penalty))
+    return np.concatenate(row), np.concatenate(col), np.concatenate(data)
+
+
+def freespace_grid(bvhtree, points, clearance, sdf_fn=None):
+    """
+    True for every point with no surface within `clearance`, according to bvhtree
+    and, if given, sdf_fn (which maps an (n, 3) array to signed distances, positive in free space)
+    """
+
+    free = np.array(
+        [
+            bvhtree.find_nearest(mathutils.Vector(p), clearance)[0] is None
+            for p in points
+        ]
+    )
+    if sdf_fn is not None:
+        free &= np.asarray(sdf_fn(points)).reshape(-1) > clearance
+    return free
+
+
+@gin.configurable
 def path_finding(
-    bvhtree, bounding_box, start_pose, end_pose, resolution=100000, margin=0.1
+    bvhtree,
+    bounding_box,
+    start_pose,
+    end_pose,
+    resolution=100000,
+    margin=0.1,
+    engine="ray",
+    sdf_fn=None,
 ):
-    volume = np.product(bounding_box[1] - bounding_box[0])
+    """
+    Shortest collision-free path between two camera poses, as keyframed (length, location, rotation)
+    tuples, or None if there is none.
+
+    engine="ray" (the default) checks every grid edge with a ray cast. engine="grid", opt in via
+    gin, instead rasterizes the free space once, keeping only cells with no surface within half a
+    cell diagonal of their center, which makes every edge between two free cells collision-free,
+    and optionally also rejects cells by sdf_fn (eg terrain.compute_camera_space_sdf). Either way
+    the path is shortened with the same margin-aware ray casts.
+    """
+
+    volume = np.prod(bounding_box[1] - bounding_box[0])
     N = np.floor(
         (bounding_box[1] - bounding_box[0]) * (resolution / volume) ** (1 / 3)
     ).astype(np.int32)
-    NN = np.product(N)
+    NN = np.prod(N)
     # print(f"{N=}")
     start_location, start_rotation = start_pose
     end_location, end_rotation = end_pose
     margin_d = np.ceil((resolution / volume) ** (1 / 3) * margin)
-    row = []
-    col = []
-    data = []
-
-    def freespace_ray_check(a, b, margin=0):
-        v = b - a
-        location, *_ = bvhtree.ray_cast(a, v, v.length)
-        if location is not None:
-            return False
-        if margin != 0:
-            if v[0] != 0:
-                perp = mathutils.Vector([v[1], -v[0], 0])
-            else:
-                perp = mathutils.Vector([0, v[2], -v[1]])
-            offset = v.cross(perp)
-            offset *= margin / offset.length
-            check_N = 10
-            angle = np.pi * 2 / check_N
-            for i in range(check_N):
-                location, *_ = bvhtree.ray_cast(a + offset, v, v.length)
-                if location is not None:
-                    return False
-                tar_direction = offset.cross(v)
-                tar_direction *= margin / tar_direction.length
-                offset = offset * np.cos(angle) + tar_direction * np.sin(angle)
-        return True
 
     def index(i, j, k):
         return i * N[1] * N[2] + j * N[2] + k
@@ -102,60 +168,53 @@ def path_finding(
     x[end_index] = end_pose[0].x
     y[end_index] = end_pose[0].y
     z[end_index] = end_pose[0].z
+    points = np.stack([x, y, z], axis=-1)
+
+    def ray_connected(row, col):
+        return np.array(
+            [
+                freespace_ray_check(
+                    bvhtree,
+                    mathutils.Vector(points[a]),
+                    mathutils.Vector(points[b]),
+                )
+                for a, b in zip(row, col)
+            ],
+            dtype=bool,
+        )
 
     penalty = 99
-    for i, j, k in list(itertools.product(range(N[0]), range(N[1]), range(N[2]))):
-        index_ijk = index(i, j, k)
-        pos_from = mathutils.Vector([x[index_ijk], y[index_ijk], z[index_ijk]])
-        for di, dj, dk in [
-            [1, 0, 0],
-            [0, 1, 0],
-            [0, 0, 1],
-            [1, 1, 0],
-            [0, 1, 1],
-            [1, 0, 1],
-            [1, -1, 0],
-            [0, 1, -1],
-            [1, 0, -1],
-        ]:
-            ni, nj, nk = i + di, j + dj, k + dk
-            if (
-                ni >= 0
-                and nj >= 0
-                and nk >= 0
-                and ni < N[0]
-                and nj < N[1]
-                and nk < N[2]
-            ):
-                index_nijk = index(ni, nj, nk)
-                pos_to = mathutils.Vector([x[index_nijk], y[index_nijk], z[index_nijk]])
-                connected = freespace_ray_check(pos_from, pos_to)
-                if connected:
-                    row.append(index_ijk)
-                    col.append(index_nijk)
-                    data.append(1 if dk == 0 else penalty)
-                    row.append(index_nijk)
-                    col.append(index_ijk)
-                    data.append(1 if dk == 0 else penalty)
-
-    row = np.array(row)
-    col = np.array(col)
-    data = np.array(data)
+    row, col, data = grid_edges(N, penalty)
 
-    A = csr_matrix((data, (row, col)), shape=(NN, NN))
-    G = nx.from_scipy_sparse_array(A)
+    if engine == "ray":
+        connected = ray_connected(row, col)
+    elif engine == "grid":
+        cell_size = (bounding_box[1] - bounding_box[0]) / N
+        free = freespace_grid(
+            bvhtree, points, np.linalg.norm(cell_size) / 2, sdf_fn=sdf_fn
+        )
+        connected = free[row] & free[col]
+
+        # start and end are not at their cell centers, so the clearance argument doesnt apply
+        exact = np.isin(row, [start_index, end_index]) | np.isin(
+            col, [start_index, end_index]
+        )
+        connected[exact] = ray_connected(row[exact], col[exact])
+    else:
+        raise ValueError(f"Unrecognized {engine=}")
 
-    boundaries = []
-    n_neighbors = np.array(A.sum(axis=0))[0]
+    row, col, data = row[connected], col[connected], data[connected]
+    row, col = np.concatenate([row, col]), np.concatenate([col, row])
+    data = np.concatenate([data, data])
 
-    for i in range(NN):
-        if n_neighbors[i] != 8 + 10 * penalty:
-            boundaries.append(i)
+    n_neighbors = np.bincount(col, weights=data, minlength=NN)
+    boundaries = np.nonzero(n_neighbors != 8 + 10 * penalty)[0]
 
-    lengths_dict = nx.multi_source_dijkstra_path_length(G, boundaries, weight="weight")
-    lengths = np.zeros(NN) + np.inf
-    for n in lengths_dict:
-        lengths[n] = lengths_dict[n]
+    A = csr_matrix((data, (row, col)), shape=(NN, NN))
+    if len(boundaries):
+        lengths = dijkstra(A, indices=boundaries, min_only=True)
+    else:
+        lengths = np.zeros(NN) + np.inf
 
     mask1 = lengths[row] >= margin_d
     mask2 = lengths[col] >= margin_d
@@ -164,18 +223,21 @@ def path_finding(
     data = data[mask1 & mask2]
 
     A = csr_matrix((data, (row, col)), shape=(NN, NN))
-    G = nx.from_scipy_sparse_array(A)
-
-    try:
-        path = nx.shortest_path(G, start_index, end_index, weight="weight")
-    except Exception:
+    dists, predecessors = dijkstra(A, indices=start_index, return_predecessors=True)
+    if not np.isfinite(dists[end_index]):
         return None
 
+    path = [end_index]
+    while path[-1] != start_index:
+        path.append(predecessors[path[-1]])
+    path = path[::-1]
+
     stack = [start_index]
 
     for p in path[1:]:
         back = 0
         while freespace_ray_check(
+            bvhtree,
             mathutils.Vector(
                 [x[stack[-1 - back]], y[stack[-1 - back]], z[stack[-1 - back]]]
             ),
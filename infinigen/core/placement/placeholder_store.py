@@ -0,0 +1,165 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+"""
+Placeholders kept as numpy arrays on their placeholders:{factory} collection, rather than as one
+bpy object each. Only the placeholders which survive camera culling are ever turned into objects,
+via the same AssetFactory.spawn_placeholder call scatter_placeholders would have made.
+"""
+
+import logging
+from dataclasses import dataclass, field
+
+import bpy
+import numpy as np
+from scipy.spatial.transform import Rotation
+
+from infinigen.core.util import blender as butil
+
+from .factory import AssetFactory
+
+logger = logging.getLogger(__name__)
+
+PROP_NAME = "placeholder_store"
+
+# corners of the default AssetFactory.create_placeholder cube, at unit extent
+_UNIT_CUBE = np.stack(np.meshgrid([-1, 1], [-1, 1], [-1, 1]), axis=-1).reshape(-1, 3)
+
+
+def placeholder_extent(factory: AssetFactory) -> float:
+    """
+    Half-size of the cube bounding each of factory's placeholders, if it can be known without
+    spawning them
+    """
+    if type(factory).create_placeholder is AssetFactory.create_placeholder:
+        return 1.0
+    raise ValueError(
+        f"{factory} overrides create_placeholder, pass the extent of its placeholders explicitly"
+    )
+
+
+@dataclass
+class PlaceholderStore:
+    factories: list[str]  # repr of each AssetFactory
+    factory_ids: np.ndarray  # (N,) index into factories
+    inst_seeds: np.ndarray  # (N,) i passed to spawn_placeholder / spawn_asset
+    locs: np.ndarray  # (N, 3)
+    rots: np.ndarray  # (N, 3) XYZ euler
+    extent: float = (
+        1  # half-size of the cube used to cull each placeholder, 0 for points
+    )
+    dists: np.ndarray = field(default=None)  # (N,) filled in by culling
+    vis_dists: np.ndarray = field(default=None)
+
+    def __post_init__(self):
+        n = len(self.inst_seeds)
+        if self.dists is None:
+            self.dists = np.full(n, np.nan)
+        if self.vis_dists is None:
+            self.vis_dists = np.full(n, np.nan)
+
+    def __len__(self):
+        return len(self.inst_seeds)
+
+    @classmethod
+    def from_locations(
+        cls, factory: AssetFactory, locations: np.ndarray, rots=None, extent=None
+    ):
+        locations = np.asarray(locations, dtype=np.float64).reshape(-1, 3)
+        n = len(locations)
+        if rots is None:
+            rots = np.zeros((n, 3))
+            rots[:, 2] = np.random.uniform(0, 2 * np.pi, n)
+        if extent is None:
+            extent = placeholder_extent(factory)
+        return cls(
+            factories=[repr(factory)],
+            factory_ids=np.zeros(n, dtype=np.int32),
+            inst_seeds=np.arange(n, dtype=np.int32),
+            locs=locations,
+            rots=np.asarray(rots, dtype=np.float64).reshape(n, 3),
+            extent=extent,
+        )
+
+    def save(self, col: bpy.types.Collection):
+        col[PROP_NAME] = {
+            "factories": list(self.factories),
+            "factory_ids": self.factory_ids.astype(np.int32),
+            "inst_seeds": self.inst_seeds.astype(np.int32),
+            "locs": self.locs.reshape(-1),
+            "rots": self.rots.reshape(-1),
+            "extent": float(self.extent),
+            "dists": self.dists,
+            "vis_dists": self.vis_dists,
+        }
+
+    @classmethod
+    def load(cls, col: bpy.types.Collection):
+        props = col.get(PROP_NAME)
+        if props is None:
+            return None
+
+        def arr(key, dtype):
+            return np.array(props[key], dtype=dtype)
+
+        return cls(
+            factories=list(props["factories"]),
+            factory_ids=arr("factory_ids", np.int32),
+            inst_seeds=arr("inst_seeds", np.int32),
+            locs=arr("locs", np.float64).reshape(-1, 3),
+            rots=arr("rots", np.float64).reshape(-1, 3),
+            extent=float(props["extent"]),
+            dists=arr("dists", np.float64),
+            vis_dists=arr("vis_dists", np.float64),
+        )
+
+    def cull_points(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (N * 8, 3) corners of each placeholder's cube, and the (N,) offset of each one's first corner
+        """
+        if self.extent == 0:
+            return self.locs, np.arange(len(self))
+        corners = Rotation.from_euler("xyz", self.rots).as_matrix() @ (
+            self.extent * _UNIT_CUBE.T
+        )
+        points = self.locs[:, None] + corners.transpose(0, 2, 1)
+        return points.reshape(-1, 3), np.arange(len(self)) * len(_UNIT_CUBE)
+
+    def materialize(
+        self,
+        factory: AssetFactory,
+        idxs: np.ndarray,
+        col: bpy.types.Collection = None,
+    ) -> list[bpy.types.Object]:
+        """
+        Spawn the placeholder objects for rows idxs, all of which must belong to factory
+        """
+
+        fac_id = self.factories.index(repr(factory))
+        assert (self.factory_ids[idxs] == fac_id).all()
+
+        objs = []
+        for idx in idxs:
+            obj = factory.spawn_placeholder(
+                int(self.inst_seeds[idx]), self.locs[idx], self.rots[idx]
+            )
+            objs.append(obj)
+        if col is not None:
+            butil.group_in_collection(objs, col.name)
+        if len(objs):
+            factory.finalize_placeholders(objs)
+        return objs
+
+
+def stored_locations() -> np.ndarray:
+    """
+    Locations of every placeholder in a PlaceholderStore, from every placeholders: collection
+    """
+    locs = [
+        store.locs
+        for col in bpy.data.collections
+        if col.name.startswith("placeholders:")
+        and (store := PlaceholderStore.load(col)) is not None
+    ]
+    return np.concatenate(locs) if len(locs) else np.zeros((0, 3))
@@ -18,10 +18,11 @@ from infinigen.core.nodes.node_wrangler import (
     NodeWrangler,
     geometry_node_group_empty_new,
 )
-from infinigen.core.placement import detail, split_in_view
+from infinigen.core.placement import detail, spawn_pool, split_in_view
 from infinigen.core.util import blender as butil
 
 from .factory import AssetFactory
+from .placeholder_store import PlaceholderStore
 
 logger = logging.getLogger(__name__)
 
@@ -100,6 +101,8 @@ def scatter_placeholders_mesh(
     selection=None,
     distance_min=0,
     num_placeholders=None,
+    lazy=False,
+    extent=None,
     **kwargs,
 ):
     locations = placeholder_locs(
@@ -113,10 +116,26 @@ def scatter_placeholders_mesh(
                 f"Only returning {len(locations)} despite {num_placeholders=} requested. {base_mesh.name} had {area=} {overall_density=}"
             )
         locations = locations[:num_placeholders]
-    return scatter_placeholders(locations, factory)
+    return scatter_placeholders(locations, factory, lazy=lazy, extent=extent)
 
 
-def scatter_placeholders(locations, factory: AssetFactory):
+def scatter_placeholders(locations, factory: AssetFactory, lazy=False, extent=None):
+    """
+    lazy: keep the placeholders as a PlaceholderStore on the collection, and only spawn objects
+        for them in populate_collection once they survive culling. Only suitable for factories
+        whose placeholders are not otherwise needed before population
+    extent: half-size of a cube bounding every placeholder, used to cull lazy placeholders.
+        Defaults to that of the AssetFactory.create_placeholder cube, and must be given for
+        factories which override it
+    """
+
+    if lazy:
+        logger.info(f"Storing {len(locations)} lazy placeholders for {factory}")
+        store = PlaceholderStore.from_locations(factory, locations, extent=extent)
+        col = butil.get_collection("placeholders:" + repr(factory))
+        store.save(col)
+        return col
+
     logger.info(f"Placing {len(locations)} placeholders for {factory}")
     objs = []
     for i, loc in enumerate(tqdm(locations)):
@@ -148,43 +167,89 @@ def parse_asset_name(name):
     return list(match.groups())
 
 
-def populate_collection(
-    factory: AssetFactory,
-    placeholder_col: bpy.types.Collection,
-    asset_col_target=None,
-    cameras=None,
-    dist_cull=None,
-    vis_cull=None,
-    verbose=True,
-    cache_system=None,
-    **asset_kwargs,
+def grouped_inview_distances(
+    points: np.ndarray,
+    offsets: np.ndarray,
+    cameras: list[bpy.types.Object],
+    dist_max,
+    vis_margin,
+    verbose=False,
 ):
-    logger.info(f"Populating placeholders for {factory}")
+    """
+    In-view mask and min distances of each group of points, where group i starts at offsets[i]
+    """
 
-    if asset_col_target is None:
-        asset_col_target = butil.get_collection(f"unique_assets:{repr(factory)}")
+    inview = np.zeros(len(offsets), dtype=bool)
+    dists = np.full(len(offsets), 1e7)
+    vis_dists = np.full(len(offsets), 1e7)
+    if len(points) == 0:
+        return inview, dists, vis_dists
+
+    trajectory = split_in_view.get_camera_trajectory(cameras, verbose=verbose)
+    mask, min_dists, min_vis_dists = split_in_view.compute_inview_distances(
+        points,
+        cameras,
+        dist_max=dist_max,
+        vis_margin=vis_margin,
+        trajectory=trajectory,
+    )
 
-    all_objs = []
-    updated_pholders = []
+    counts = np.diff(np.append(offsets, len(points)))
+    nonempty = counts > 0
+    if nonempty.any():
+        inview[nonempty] = np.logical_or.reduceat(mask, offsets[nonempty])
+        dists[nonempty] = np.minimum.reduceat(min_dists, offsets[nonempty])
+        vis_dists[nonempty] = np.minimum.reduceat(min_vis_dists, offsets[nonempty])
+
+    return inview, dists, vis_dists
+
+
+def placeholder_inview_distances(
+    placeholders: list[bpy.types.Object],
+    cameras: list[bpy.types.Object],
+    dist_max,
+    vis_margin,
+    verbose=False,
+):
+    """
+    Per-placeholder in-view mask and min distances, from one batched query over all their points
+    """
+
+    points = [get_placeholder_points(p) for p in placeholders]
+    counts = np.array([len(p) for p in points], dtype=np.int64)
+    return grouped_inview_distances(
+        np.concatenate(points) if len(points) else np.zeros((0, 3)),
+        np.cumsum(counts) - counts,
+        cameras,
+        dist_max,
+        vis_margin,
+        verbose=verbose,
+    )
+
+
+def _collection_todo(placeholder_col, cameras, dist_cull, vis_cull, verbose):
     placeholders = [o for o in placeholder_col.objects if o.parent is None]
 
-    if verbose:
-        placeholders = tqdm(placeholders)
+    if cameras is not None:
+        inview, dists, vis_dists = placeholder_inview_distances(
+            placeholders,
+            cameras,
+            dist_max=1e7 if dist_cull is None else dist_cull,
+            vis_margin=1e7 if vis_cull is None else vis_cull,
+            verbose=verbose,
+        )
 
+    todo = []
     for i, p in enumerate(placeholders):
         classname, fac_seed, _, inst_seed = parse_asset_name(p.name)
         if classname is None:
             continue
 
         if cameras is not None:
-            mask, min_dists, min_vis_dists = split_in_view.compute_inview_distances(
-                get_placeholder_points(p), cameras, verbose=verbose
-            )
+            dist = dists[i]
+            vis_dist = vis_dists[i]
 
-            dist = min_dists.min()
-            vis_dist = min_vis_dists.min()
-
-            if not mask.any():
+            if not inview[i]:
                 logger.debug(
                     f"{p.name=} culled, not in view of any camera. {dist=} {vis_dist=}"
                 )
@@ -194,26 +259,99 @@ def populate_collection(
             dist = detail.scatter_res_distance()
             vis_dist = 0
 
-        if cache_system:
-            if (
+        todo.append((i, p, inst_seed, dist, vis_dist))
+
+    return todo
+
+
+def _store_todo(factory, store, placeholder_col, cameras, dist_cull, vis_cull, verbose):
+    rows = np.nonzero(store.factory_ids == store.factories.index(repr(factory)))[0]
+
+    if cameras is not None:
+        points, offsets = store.cull_points()
+        per_row = np.diff(np.append(offsets, len(points)))
+        keep_points = np.repeat(np.isin(np.arange(len(store)), rows), per_row)
+        inview, dists, vis_dists = grouped_inview_distances(
+            points[keep_points],
+            np.cumsum(per_row[rows]) - per_row[rows],
+            cameras,
+            dist_max=1e7 if dist_cull is None else dist_cull,
+            vis_margin=1e7 if vis_cull is None else vis_cull,
+            verbose=verbose,
+        )
+        store.dists[rows], store.vis_dists[rows] = dists, vis_dists
+        store.save(placeholder_col)
+        logger.debug(f"Culled {(~inview).sum()} of {len(rows)} stored placeholders")
+        rows, dists, vis_dists = rows[inview], dists[inview], vis_dists[inview]
+    else:
+        dists = np.full(len(rows), detail.scatter_res_distance())
+        vis_dists = np.zeros(len(rows))
+
+    placeholders = store.materialize(factory, rows, placeholder_col)
+    return [
+        (int(store.inst_seeds[r]), p, str(store.inst_seeds[r]), d, vd)
+        for r, p, d, vd in zip(rows, placeholders, dists, vis_dists)
+    ]
+
+
+def populate_collection(
+    factory: AssetFactory,
+    placeholder_col: bpy.types.Collection,
+    asset_col_target=None,
+    cameras=None,
+    dist_cull=None,
+    vis_cull=None,
+    verbose=True,
+    cache_system=None,
+    **asset_kwargs,
+):
+    logger.info(f"Populating placeholders for {factory}")
+
+    if asset_col_target is None:
+        asset_col_target = butil.get_collection(f"unique_assets:{repr(factory)}")
+
+    all_objs = []
+    updated_pholders = []
+
+    store = PlaceholderStore.load(placeholder_col)
+    if store is not None:
+        todo = _store_todo(
+            factory, store, placeholder_col, cameras, dist_cull, vis_cull, verbose
+        )
+    else:
+        todo = _collection_todo(placeholder_col, cameras, dist_cull, vis_cull, verbose)
+
+    if cache_system:
+        spawned = []
+        for i, p, inst_seed, dist, vis_dist in tqdm(todo, disable=not verbose):
+            if not (
                 sum(cache_system.n_placed.values()) < cache_system.max_fire_assets
                 and cache_system.n_placed[factory.__class__.__name__]
                 < cache_system.max_per_kind
             ):
-                i_list = cache_system.find_i_list(factory)
-                ind = np.random.choice(len(i_list))
-                i_chosen, full_sim_folder, sim_folder = i_list[ind]
-                obj = factory.spawn_asset(
-                    int(i_chosen), placeholder=p, distance=dist, vis_distance=vis_dist
-                )
-                cache_system.link_fire(full_sim_folder, sim_folder, obj, factory)
-            else:
                 break
-        else:
+            i_list = cache_system.find_i_list(factory)
+            ind = np.random.choice(len(i_list))
+            i_chosen, full_sim_folder, sim_folder = i_list[ind]
             obj = factory.spawn_asset(
-                i, placeholder=p, distance=dist, vis_distance=vis_dist, **asset_kwargs
+                int(i_chosen), placeholder=p, distance=dist, vis_distance=vis_dist
+            )
+            cache_system.link_fire(full_sim_folder, sim_folder, obj, factory)
+            spawned.append(obj)
+        todo = todo[: len(spawned)]
+    else:
+        specs = [
+            spawn_pool.SpawnSpec(
+                factory,
+                i,
+                placeholder=p.name,
+                kwargs=dict(distance=dist, vis_distance=vis_dist, **asset_kwargs),
             )
+            for i, p, inst_seed, dist, vis_dist in todo
+        ]
+        spawned = spawn_pool.spawn_assets(specs, verbose=verbose)
 
+    for (i, p, inst_seed, dist, vis_dist), obj in zip(todo, spawned):
         if p is not obj:
             p.hide_render = True
 
@@ -272,7 +410,7 @@ def populate_all(
             factory_class(int(fac_seed), **kwargs),
             col,
             asset_target_col,
-            camera=cameras,
+            cameras=cameras,
             dist_cull=dist_cull,
             vis_cull=vis_cull,
             cache_system=cache_system,
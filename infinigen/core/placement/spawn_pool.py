@@ -0,0 +1,295 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+"""
+Out-of-process AssetFactory.spawn_asset.
+
+Each worker is a fresh python process with its own bpy. It opens a copy of the current .blend,
+spawns a batch of assets, and writes them to a per-batch library .blend which the main process
+appends by name. spawn_asset seeds itself with int_hash((factory_seed, i)), so the result is the
+same as spawning in the main process.
+"""
+
+import importlib
+import logging
+import multiprocessing
+import pickle
+import sys
+import tempfile
+import typing
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import bpy
+import gin
+import mathutils
+from tqdm import tqdm
+
+from infinigen.core.util import blender as butil
+
+from .factory import AssetFactory
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SpawnSpec:
+    factory: AssetFactory
+    i: int
+    placeholder: str = None  # name of an existing object to pass as placeholder=
+    loc: typing.Any = (0, 0, 0)
+    rot: typing.Any = (0, 0, 0)
+    kwargs: dict = field(default_factory=dict)
+
+
+@dataclass
+class _SpawnResult:
+    objs: list[str]  # root object first, then its descendants
+    parent: str = None
+    parent_inverse: list = None
+
+
+def _spawn_local(spec: SpawnSpec):
+    placeholder = (
+        None if spec.placeholder is None else bpy.data.objects[spec.placeholder]
+    )
+    return spec.factory.spawn_asset(
+        spec.i, placeholder=placeholder, loc=spec.loc, rot=spec.rot, **spec.kwargs
+    )
+
+
+def _picklable(x):
+    try:
+        pickle.dumps(x)
+        return True
+    except Exception as e:
+        logger.debug(f"{x} cannot be sent to a spawn worker, {e=}")
+        return False
+
+
+@contextmanager
+def worker_sys_path():
+    """
+    bpy puts its own scripts/modules (which contains a pure-python bpy package) on sys.path.
+    Spawned workers inherit sys.path before they import anything, so hide those entries until
+    the workers have started, letting them import the real bpy module
+    """
+
+    scripts = bpy.utils.system_resource("SCRIPTS")
+    orig = list(sys.path)
+    sys.path[:] = [p for p in orig if not str(p).startswith(scripts)]
+    try:
+        yield
+    finally:
+        sys.path[:] = orig
+
+
+def worker_init(modules: list[str], gin_config: str):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning(f"Spawn worker failed to import {name}, {e=}")
+    gin.parse_config(gin_config, skip_unknown=True)
+
+
+def _warm_init(modules: list[str], gin_config: str, setup, setup_args):
+    worker_init(modules, gin_config)
+    if setup is not None:
+        setup(*setup_args)
+
+
+def _warm_job(payload):
+    fn, job = payload
+    butil.clear_scene()
+    bpy.data.orphans_purge(do_recursive=True)
+    return fn(job)
+
+
+class WarmPool:
+    """
+    Long-lived spawn workers for running many independent bpy jobs, eg one asset each.
+
+    Each worker imports infinigen and runs setup(*setup_args) once, then takes (fn, job) items
+    from the pool's task queue, resetting the scene with butil.clear_scene before every job, so
+    startup cost is paid per worker rather than per job. fn must be importable by name.
+    """
+
+    def __init__(
+        self,
+        n_workers: int,
+        setup: typing.Callable = None,
+        setup_args: tuple = (),
+        max_jobs_per_worker: int = None,
+    ):
+        modules = [m for m in sys.modules if m.startswith("infinigen")]
+        ctx = multiprocessing.get_context("spawn")
+        with worker_sys_path():
+            self.pool = ctx.Pool(
+                n_workers,
+                initializer=_warm_init,
+                initargs=(modules, gin.config_str(), setup, setup_args),
+                maxtasksperchild=max_jobs_per_worker,
+            )
+
+    def imap(self, fn: typing.Callable, jobs, ordered: bool = True):
+        payloads = [(fn, job) for job in jobs]
+        if ordered:
+            return self.pool.imap(_warm_job, payloads)
+        return self.pool.imap_unordered(_warm_job, payloads)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *_):
+        if exc_type is not None:
+            self.pool.terminate()
+        self.close()
+
+
+def _spawn_batch(args):
+    scene_path, out_path, specs = args
+
+    bpy.ops.wm.open_mainfile(filepath=str(scene_path))
+
+    results = []
+    objs = set()
+    for spec in specs:
+        if spec.placeholder is None:
+            placeholder = None
+            pose = dict(loc=mathutils.Vector(spec.loc), rot=mathutils.Euler(spec.rot))
+        else:
+            placeholder = bpy.data.objects[spec.placeholder]
+            pose = {}
+        obj = spec.factory.spawn_asset(
+            spec.i, placeholder=placeholder, **pose, **spec.kwargs
+        )
+
+        if obj is placeholder:
+            results.append(None)  # nothing new to transfer, caller spawns it locally
+            continue
+
+        res = _SpawnResult(objs=[o.name for o in butil.iter_object_tree(obj)])
+        if obj.parent is not None:
+            # keep the worker's copy of the placeholder out of the library
+            res.parent = obj.parent.name
+            res.parent_inverse = [list(row) for row in obj.matrix_parent_inverse]
+            obj.parent = None
+
+        objs.update(butil.iter_object_tree(obj))
+        results.append(res)
+
+    bpy.data.libraries.write(str(out_path), objs)
+    return results
+
+
+def _append_batch(out_path: Path, results: list[_SpawnResult]):
+    names = [n for res in results if res is not None for n in res.objs]
+    with bpy.data.libraries.load(str(out_path), link=False) as (_, data_to):
+        data_to.objects = list(names)
+    appended = dict(zip(names, data_to.objects))
+
+    for obj in appended.values():
+        bpy.context.scene.collection.objects.link(obj)
+
+    roots = []
+    for res in results:
+        if res is None:
+            roots.append(None)
+            continue
+        root = appended[res.objs[0]]
+        if res.parent is not None:
+            root.parent = bpy.data.objects[res.parent]
+            root.matrix_parent_inverse = mathutils.Matrix(res.parent_inverse)
+        roots.append(root)
+    return roots
+
+
+@gin.configurable
+def spawn_assets(
+    specs: list[SpawnSpec],
+    n_workers: int = 0,
+    batch_size: int = 8,
+    verbose: bool = False,
+) -> list[bpy.types.Object]:
+    """
+    Spawn one asset per spec, in worker processes if n_workers > 0.
+
+    Specs whose factory cannot be pickled, or whose asset turns out to be the placeholder
+    itself, are spawned in this process instead.
+    """
+
+    objs = [None] * len(specs)
+
+    remote = []
+    if n_workers > 0 and len(specs) > 0:
+        ok = {}
+        for idx, spec in enumerate(specs):
+            key = id(spec.factory)
+            if key not in ok:
+                ok[key] = _picklable(spec.factory)
+            if ok[key] and _picklable(spec.kwargs):
+                remote.append(idx)
+
+    if len(remote):
+        batches = [
+            remote[start : start + batch_size]
+            for start in range(0, len(remote), batch_size)
+        ]
+        logger.info(
+            f"Spawning {len(remote)} assets in {len(batches)} batches on {n_workers} workers"
+        )
+
+        with tempfile.TemporaryDirectory(prefix="spawn_pool_") as tmp:
+            tmp = Path(tmp)
+            scene_path = tmp / "scene.blend"
+            bpy.ops.wm.save_as_mainfile(filepath=str(scene_path), copy=True)
+
+            args = []
+            for bi, batch in enumerate(batches):
+                batch_specs = [
+                    SpawnSpec(
+                        factory=specs[idx].factory,
+                        i=specs[idx].i,
+                        placeholder=specs[idx].placeholder,
+                        loc=tuple(specs[idx].loc),
+                        rot=tuple(specs[idx].rot),
+                        kwargs=specs[idx].kwargs,
+                    )
+                    for idx in batch
+                ]
+                args.append((scene_path, tmp / f"batch_{bi}.blend", batch_specs))
+
+            modules = [m for m in sys.modules if m.startswith("infinigen")]
+            ctx = multiprocessing.get_context("spawn")
+            with worker_sys_path():
+                pool = ctx.Pool(
+                    n_workers,
+                    initializer=worker_init,
+                    initargs=(modules, gin.config_str()),
+                )
+            with pool:
+                batch_results = pool.imap(_spawn_batch, args)
+                if verbose:
+                    batch_results = tqdm(batch_results, total=len(args))
+
+                # append in batch order so datablock names dont depend on worker timing
+                for (_, out_path, _), batch, results in zip(
+                    args, batches, batch_results
+                ):
+                    for idx, obj in zip(batch, _append_batch(out_path, results)):
+                        objs[idx] = obj
+
+    local = [idx for idx, obj in enumerate(objs) if obj is None]
+    if verbose and len(local):
+        local = tqdm(local)
+    for idx in local:
+        objs[idx] = _spawn_local(specs[idx])
+
+    return objs
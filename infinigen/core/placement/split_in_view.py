@@ -8,11 +8,12 @@ import logging
 
 import bpy
 import numpy as np
-from mathutils import Matrix
+import trimesh
+from mathutils import Matrix, Vector
 from mathutils.bvhtree import BVHTree
 from tqdm import trange
 
-from infinigen.core.placement.camera import get_sensor_coords
+from infinigen.core.placement.camera import relative_sensor_coords, sensor_resolution
 from infinigen.core.util import blender as butil
 from infinigen.core.util import camera as cam_util
 from infinigen.core.util.logging import Suppress
@@ -21,41 +22,118 @@ from infinigen.core.util.math import dehomogenize, homogenize
 logger = logging.getLogger(__name__)
 
 
+def camera_pixel_rays(cam: bpy.types.Object, stride: int = 1):
+    """
+    World-space origin and unit directions of the rays through every `stride`-th
+    pixel of `cam`'s sensor, in each image dimension
+    """
+
+    H, W = sensor_resolution()
+    rel = relative_sensor_coords(cam, H, W)[::stride, ::stride].reshape(-1, 3)
+
+    M = np.array(cam.matrix_world)
+    dirs = rel @ M[:3, :3].T
+    dirs /= np.linalg.norm(dirs, axis=-1, keepdims=True)
+    return M[:3, 3], dirs
+
+
+def _polygon_vertex_mask(mesh: bpy.types.Mesh, poly_mask: np.ndarray):
+    starts = np.zeros(len(mesh.polygons), dtype=np.int64)
+    totals = np.zeros(len(mesh.polygons), dtype=np.int64)
+    mesh.polygons.foreach_get("loop_start", starts)
+    mesh.polygons.foreach_get("loop_total", totals)
+    loop_verts = np.zeros(len(mesh.loops), dtype=np.int64)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+
+    within = np.arange(totals.sum()) - np.repeat(np.cumsum(totals) - totals, totals)
+    loops = np.repeat(starts, totals) + within
+
+    mask = np.zeros(len(mesh.vertices), dtype=bool)
+    mask[loop_verts[loops[np.repeat(poly_mask, totals)]]] = True
+    return mask
+
+
+class _TrimeshCaster:
+    """
+    trimesh.Trimesh.ray, ie embree if it is installed, over obj's loop triangles
+    """
+
+    def __init__(self, obj: bpy.types.Object):
+        mesh = obj.data
+        mesh.calc_loop_triangles()
+        verts = np.zeros((len(mesh.vertices), 3))
+        mesh.vertices.foreach_get("co", verts.reshape(-1))
+        tris = np.zeros((len(mesh.loop_triangles), 3), dtype=np.int64)
+        mesh.loop_triangles.foreach_get("vertices", tris.reshape(-1))
+        self.tri_polys = np.zeros(len(mesh.loop_triangles), dtype=np.int64)
+        mesh.loop_triangles.foreach_get("polygon_index", self.tri_polys)
+        self.mesh = trimesh.Trimesh(verts, tris, process=False)
+
+    def __call__(self, origins, dirs):
+        tri = self.mesh.ray.intersects_first(origins, dirs)
+        return np.where(tri >= 0, self.tri_polys[tri], -1)
+
+
+class _BVHCaster:
+    def __init__(self, obj: bpy.types.Object):
+        self.bvh = BVHTree.FromObject(obj, bpy.context.evaluated_depsgraph_get())
+
+    def __call__(self, origins, dirs):
+        res = np.full(len(dirs), -1)
+        for i, (o, d) in enumerate(zip(origins, dirs)):
+            _, _, index, dist = self.bvh.ray_cast(Vector(o), Vector(d))
+            if dist is not None:
+                res[i] = index
+        return res
+
+
 def raycast_visiblity_mask(
     obj: bpy.types.Object,
     cameras: list[bpy.types.Object],
     start=None,
     end=None,
     verbose=True,
+    stride: int = 1,
+    engine: str = "auto",
+    chunk_size: int = 2**18,
 ):
-    bvh = BVHTree.FromObject(obj, bpy.context.evaluated_depsgraph_get())
+    """
+    Mask of obj's vertices which belong to a polygon seen by some pixel of some camera, on some frame.
+
+    engine="trimesh" casts each chunk of rays through trimesh's intersector (embree if available),
+    engine="bvh" through a mathutils BVHTree one ray at a time, and "auto" picks trimesh only
+    when embree is installed. Only every `stride`-th pixel in each dimension is cast.
+    """
+
+    if engine == "auto":
+        engine = "trimesh" if trimesh.ray.has_embree else "bvh"
+    if engine == "trimesh":
+        caster = _TrimeshCaster(obj)
+    elif engine == "bvh":
+        caster = _BVHCaster(obj)
+    else:
+        raise ValueError(f"Unrecognized {engine=}")
 
     if start is None:
         start = bpy.context.scene.frame_start
     if end is None:
         end = bpy.context.scene.frame_end
 
-    mask = np.zeros(len(obj.data.vertices), dtype=bool)
+    poly_mask = np.zeros(len(obj.data.polygons), dtype=bool)
     rangeiter = trange if verbose else range
     for i in rangeiter(start, end + 1):
         bpy.context.scene.frame_set(i)
-        invworld = obj.matrix_world.inverted()
+        invworld = np.array(obj.matrix_world.inverted())
         for cam in cameras:
-            sensor_coords, pix_it = get_sensor_coords(cam)
-            for x, y in pix_it:
-                direction = (
-                    sensor_coords[y, x] - cam.matrix_world.translation
-                ).normalized()
-                origin = cam.matrix_world.translation
-                _, _, index, dist = bvh.ray_cast(
-                    invworld @ origin, invworld.to_3x3() @ direction
-                )
-                if dist is None:
-                    continue
-                for vi in obj.data.polygons[index].vertices:
-                    mask[vi] = True
+            origin, dirs = camera_pixel_rays(cam, stride=stride)
+            origin = invworld[:3, :3] @ origin + invworld[:3, 3]
+            dirs = dirs @ invworld[:3, :3].T
+            for j in range(0, len(dirs), chunk_size):
+                chunk = dirs[j : j + chunk_size]
+                hits = caster(np.broadcast_to(origin, chunk.shape), chunk)
+                poly_mask[hits[hits >= 0]] = True
 
-    return mask
+    return _polygon_vertex_mask(obj.data, poly_mask)
 
 
 def select_vertmask(obj, mask):
@@ -104,6 +182,193 @@ def compute_vis_dists(points: np.array, cam: bpy.types.Object):
     return d, vis_dist
 
 
+class CameraTrajectory:
+    """
+    Projection matrices of every camera at every frame in [frame_start, frame_end].
+
+    Sampling these needs a bpy frame_set per frame, so it is done once up front and the
+    (F, C, ...) arrays are reused for any number of in-view queries.
+    """
+
+    def __init__(
+        self,
+        cameras: list[bpy.types.Object],
+        frame_start=None,
+        frame_end=None,
+        verbose=False,
+    ):
+        if frame_start is None:
+            frame_start = bpy.context.scene.frame_start
+        if frame_end is None:
+            frame_end = bpy.context.scene.frame_end
+        assert frame_start < frame_end + 1, (frame_start, frame_end)
+
+        self.camera_names = [cam.name for cam in cameras]
+        self.frames = np.arange(frame_start, frame_end + 1)
+        self.res = butil.get_camera_res()
+
+        rangeiter = trange if verbose else range
+        orig_frame = bpy.context.scene.frame_current
+
+        K = np.empty((len(self.frames), len(cameras), 3, 3))
+        RT = np.empty((len(self.frames), len(cameras), 3, 4))
+        for fi in rangeiter(len(self.frames)):
+            bpy.context.scene.frame_set(int(self.frames[fi]))
+            for ci, cam in enumerate(cameras):
+                _, k, rt = cam_util.get_3x4_P_matrix_from_blender(cam)
+                K[fi, ci], RT[fi, ci] = np.array(k), np.array(rt)
+
+        bpy.context.scene.frame_set(orig_frame)
+
+        self.K = K
+        self.RT = RT
+        self.P = K @ RT  # (F, C, 3, 4)
+
+        RT_4x4 = np.zeros(RT.shape[:-2] + (4, 4))
+        RT_4x4[..., :3, :] = RT
+        RT_4x4[..., 3, 3] = 1
+        self.K_inv = np.linalg.inv(K)
+        self.RT_inv = np.linalg.inv(RT_4x4)
+
+    def __len__(self):
+        return self.P.shape[0] * self.P.shape[1]
+
+    def vis_dists(self, points: np.array):
+        """
+        Vectorized compute_vis_dists for every (frame, camera) at once.
+
+        Returns (F, C, N) arrays of camera depth and distance to the view frustum
+        """
+
+        points = homogenize(points)
+        proj = np.einsum("fcij,nj->fcni", self.P, points)
+        d = proj[..., -1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            uv = dehomogenize(proj)
+
+        clamped_uv = np.clip(uv, [0, 0], self.res)
+        clamped_d = np.maximum(d, 0)
+
+        cam_pos = np.einsum(
+            "fcij,fcnj->fcni", self.K_inv, homogenize(clamped_uv) * clamped_d[..., None]
+        )
+        clipped_pos = np.einsum("fcij,fcnj->fcni", self.RT_inv, homogenize(cam_pos))
+
+        vis_dist = np.linalg.norm(points[:, :-1] - clipped_pos[..., :-1], axis=-1)
+
+        return d, vis_dist
+
+    def inview_distances(
+        self, points: np.array, dist_max, vis_margin, max_elements=2**22
+    ):
+        """
+        Same result as compute_inview_distances, for all frames and cameras in one pass
+        """
+
+        assert len(points.shape) == 2 and points.shape[-1] == 3
+
+        mask = np.zeros(len(points), dtype=bool)
+        min_dists = np.full(len(points), 1e7)
+        min_vis_dists = np.full(len(points), 1e7)
+
+        chunk = max(1, max_elements // max(len(self), 1))
+        for start in range(0, len(points), chunk):
+            end = start + chunk
+            dists, vis_dists = self.vis_dists(points[start:end])
+            dists = dists.reshape(len(self), -1)
+            vis_dists = vis_dists.reshape(len(self), -1)
+
+            # once a point has been in view of some (frame, camera), every later
+            # (frame, camera) contributes to its minimum distances
+            seen = np.logical_or.accumulate(
+                (dists < dist_max) & (vis_dists < vis_margin), axis=0
+            )
+            mask[start:end] = seen[-1]
+            min_dists[start:end] = np.where(seen, dists, 1e7).min(axis=0, initial=1e7)
+            min_vis_dists[start:end] = np.where(seen, vis_dists, 1e7).min(
+                axis=0, initial=1e7
+            )
+
+        return mask, min_dists, min_vis_dists
+
+
+_trajectory_cache = {}
+
+
+def _fcurves_key(idblock):
+    anim = idblock.animation_data
+    if anim is None:
+        return None
+
+    fcurves = list(anim.drivers)
+    if anim.action is not None:
+        fcurves += list(anim.action.fcurves)
+
+    key = []
+    for fc in fcurves:
+        points = np.empty(len(fc.keyframe_points) * 6, dtype=np.float32)
+        for i, attr in enumerate(["co", "handle_left", "handle_right"]):
+            fc.keyframe_points.foreach_get(attr, points[i::3])
+        key.append((fc.data_path, fc.array_index, len(fc.modifiers), points.tobytes()))
+    return tuple(key)
+
+
+def _camera_animation_key(cam: bpy.types.Object):
+    """
+    Everything CameraTrajectory reads from cam that can change between calls, without a frame_set
+    """
+
+    key = [
+        cam.name,
+        tuple(getattr(cam.data, k) for k in ["lens", "sensor_width", "sensor_height"]),
+        cam.data.sensor_fit,
+        _fcurves_key(cam.data),
+    ]
+    obj = cam
+    while obj is not None:
+        key += [
+            obj.name,
+            tuple(tuple(row) for row in obj.matrix_basis),
+            tuple((c.type, c.influence, c.mute) for c in obj.constraints),
+            _fcurves_key(obj),
+        ]
+        obj = obj.parent
+    return tuple(key)
+
+
+def get_camera_trajectory(
+    cameras: list[bpy.types.Object], frame_start=None, frame_end=None, verbose=False
+) -> CameraTrajectory:
+    """
+    CameraTrajectory for these cameras, shared between all callers for the rest of the task.
+
+    Cached on the cameras' animation (and their parents'), so re-animating them or loading
+    another scene gives a new trajectory
+    """
+
+    if frame_start is None:
+        frame_start = bpy.context.scene.frame_start
+    if frame_end is None:
+        frame_end = bpy.context.scene.frame_end
+
+    key = (
+        bpy.context.scene.name,
+        tuple(_camera_animation_key(cam) for cam in cameras),
+        frame_start,
+        frame_end,
+        tuple(butil.get_camera_res()),
+    )
+    if key not in _trajectory_cache:
+        _trajectory_cache[key] = CameraTrajectory(
+            cameras, frame_start, frame_end, verbose=verbose
+        )
+    return _trajectory_cache[key]
+
+
+def clear_camera_trajectories():
+    _trajectory_cache.clear()
+
+
 def compute_inview_distances(
     points: np.array,
     cameras: list[bpy.types.Object],
@@ -112,6 +377,7 @@ def compute_inview_distances(
     frame_start=None,
     frame_end=None,
     verbose=False,
+    trajectory: CameraTrajectory = None,
 ):
     """
     Compute the minimum distance of each point to any of the cameras in the scene.
@@ -121,6 +387,7 @@ def compute_inview_distances(
     - cameras: a list of cameras in the scene
     - dist_max: the maximum distance to consider a point "in view"
     - vis_margin: how far outside the view frustum to consider a point "in view"
+    - trajectory: precomputed camera matrices, if None they are sampled from `cameras`
 
     Returns:
     - mask: boolean array of whether each point is within within vis_margin and dist_max of any frame of any camera
@@ -130,31 +397,13 @@ def compute_inview_distances(
 
     assert len(points.shape) == 2 and points.shape[-1] == 3
 
-    if frame_start is None:
-        frame_start = bpy.context.scene.frame_start
-    if frame_end is None:
-        frame_end = bpy.context.scene.frame_end
-
-    points = homogenize(points)
+    if trajectory is None:
+        trajectory = CameraTrajectory(cameras, frame_start, frame_end, verbose=verbose)
 
-    mask = np.zeros(len(points), dtype=bool)
-    min_dists = np.full(len(points), 1e7)
-    min_vis_dists = np.full(len(points), 1e7)
-
-    rangeiter = trange if verbose else range
-
-    assert frame_start < frame_end + 1, (frame_start, frame_end)
-
-    for frame in rangeiter(frame_start, frame_end + 1):
-        bpy.context.scene.frame_set(frame)
-        for cam in cameras:
-            dists, vis_dists = compute_vis_dists(points, cam)
-            mask |= (dists < dist_max) & (vis_dists < vis_margin)
-            if mask.any():
-                min_vis_dists[mask] = np.minimum(vis_dists[mask], min_vis_dists[mask])
-                min_dists[mask] = np.minimum(dists[mask], min_dists[mask])
-
-            logger.debug(f"Computed dists for {frame=} {cam.name} {mask.mean()=:.2f}")
+    mask, min_dists, min_vis_dists = trajectory.inview_distances(
+        points, dist_max, vis_margin
+    )
+    logger.debug(f"Computed dists for {len(trajectory)} views {mask.mean()=:.2f}")
 
     return mask, min_dists, min_vis_dists
 
@@ -165,6 +414,7 @@ def split_inview(
     dist_max: float = 1e7,
     vis_margin: float = 0,
     raycast: bool = False,
+    raycast_stride: int = 1,
     dilate: float = 0,
     outofview=True,
     verbose=False,
@@ -191,7 +441,9 @@ def split_inview(
     logger.debug(f"split_inview {suffix=} {dist_max=} {vis_margin=} {mask.mean()=:.2f}")
 
     if raycast:
-        mask *= raycast_visiblity_mask(obj, cameras)
+        mask *= raycast_visiblity_mask(
+            obj, cameras, verbose=verbose, stride=raycast_stride
+        )
 
     inview = duplicate_mask(obj, mask, dilate=dilate)
 
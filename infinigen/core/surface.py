@@ -83,6 +83,8 @@ def read_attr_data(obj, attr, domain="POINT", result_dtype=None) -> np.array:
         n = len(obj.data.edges)
     elif domain == "FACE":
         n = len(obj.data.polygons)
+    elif domain == "CORNER":
+        n = len(obj.data.loops)
     else:
         raise ValueError(f"Unknown domain {domain}")
 
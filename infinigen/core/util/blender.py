@@ -783,12 +783,14 @@ def save_blend(path, autopack=False, verbose=False):
             bpy.ops.file.autopack_toggle()
 
 
-def joined_kd(objs, include_origins=False):
+def joined_kd(objs, include_origins=False, points=None):
     if not isinstance(objs, list):
         objs = objs
     objs = [o for o in objs if o.type == "MESH"]
+    if points is None:
+        points = []
 
-    size = sum(len(o.data.vertices) for o in objs)
+    size = sum(len(o.data.vertices) for o in objs) + len(points)
     if include_origins:
         size += len(objs)
     kd = mathutils.kdtree.KDTree(size)
@@ -802,6 +804,9 @@ def joined_kd(objs, include_origins=False):
         if include_origins:
             kd.insert(o.location, i)
             i += 1
+    for p in points:
+        kd.insert(p, i)
+        i += 1
 
     kd.balance()
 
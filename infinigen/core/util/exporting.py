@@ -4,8 +4,15 @@
 # Authors: Lahav Lipson
 
 
+import hashlib
 import json
+import logging
+import os
+import queue
 import re
+import threading
+import typing
+from dataclasses import dataclass, field
 from itertools import chain, product
 from pathlib import Path
 from uuid import uuid4
@@ -18,6 +25,9 @@ from bpy.types import DepsgraphObjectInstance
 from tqdm import tqdm
 
 from infinigen.core.util.math import int_hash
+from infinigen.tools import mesh_index
+
+logger = logging.getLogger(__name__)
 
 
 def get_mesh_data(obj):
@@ -80,7 +90,63 @@ def get_id(i: DepsgraphObjectInstance):
     return (a, b, parent_hash)
 
 
-def get_all_instances():
+@dataclass
+class ObjectClasses:
+    """
+    Per-object facts which hold for every frame of save_meshes, computed once up front
+    """
+
+    static: set[str]  # saved once, hidden while other frames are extracted
+    rigid: set[str]  # animated by transform only, so their mesh data is extracted once
+    particles: set[str]  # have particle systems, never saved as meshes themselves
+    mesh_cache: dict = field(default_factory=dict)  # rigid object name -> get_mesh_data
+
+    @classmethod
+    def from_scene(cls, is_static: typing.Callable):
+        static, rigid, particles = set(), set(), set()
+        for obj in bpy.data.objects:
+            if any(m.type == "PARTICLE_SYSTEM" for m in obj.modifiers):
+                particles.add(obj.name)
+            if is_static(obj):
+                static.add(obj.name)
+            elif (
+                obj.type == "MESH"
+                and len(obj.modifiers) == 0
+                and obj.data.shape_keys is None
+                and obj.data.animation_data is None
+            ):
+                rigid.add(obj.name)
+        return cls(static=static, rigid=rigid, particles=particles)
+
+    def has_particles(self, obj) -> bool:
+        return obj.name in self.particles
+
+    def mesh_data(self, obj):
+        if obj.name not in self.rigid:
+            return get_mesh_data(obj)
+        if obj.name not in self.mesh_cache:
+            self.mesh_cache[obj.name] = get_mesh_data(obj)
+        return self.mesh_cache[obj.name]
+
+
+class _PerFrameClasses:
+    # fallback when no ObjectClasses are given: particle check memoized per object, no caching
+    def __init__(self):
+        self._particles = {}
+
+    def has_particles(self, obj) -> bool:
+        if obj.name not in self._particles:
+            self._particles[obj.name] = any(
+                m.type == "PARTICLE_SYSTEM" for m in obj.modifiers
+            )
+        return self._particles[obj.name]
+
+    def mesh_data(self, obj):
+        return get_mesh_data(obj)
+
+
+def get_all_instances(classes: ObjectClasses = None):
+    classes = classes or _PerFrameClasses()
     vertex_info = {}
     pbar = tqdm(bpy.context.evaluated_depsgraph_get().object_instances)
     for deps_instance in pbar:
@@ -89,11 +155,11 @@ def get_all_instances():
         if (
             (obj.type == "MESH")
             and (deps_instance.is_instance)
-            and ("PARTICLE_SYSTEM" not in {m.type for m in obj.modifiers})
+            and not classes.has_particles(obj)
         ):
             mat = np.asarray(deps_instance.matrix_world, dtype=np.float32).copy()
             if obj.data not in vertex_info:
-                vert_lookup, indices, loop_totals, masktag = get_mesh_data(obj)
+                vert_lookup, indices, loop_totals, masktag = classes.mesh_data(obj)
                 vertex_info[obj.data] = dict(
                     vertex_lookup=vert_lookup,
                     is_instance=True,
@@ -111,18 +177,17 @@ def get_all_instances():
     )
 
 
-def get_all_non_instances():
+def get_all_non_instances(classes: ObjectClasses = None):
+    classes = classes or _PerFrameClasses()
     pbar = tqdm(bpy.context.evaluated_depsgraph_get().object_instances)
     for deps_instance in pbar:
         obj = deps_instance.object
         pbar.set_description(f"Finding Non-Instances: {obj.name[:20].ljust(20)}")
         mat = np.asarray(deps_instance.matrix_world, dtype=np.float32).copy()[None]
         if obj.type == "MESH":
-            if (not deps_instance.is_instance) and (
-                "PARTICLE_SYSTEM" not in {m.type for m in obj.modifiers}
-            ):
+            if (not deps_instance.is_instance) and not classes.has_particles(obj):
                 yield (len(obj.data.vertices), obj.name)
-                vert_lookup, indices, loop_totals, masktag = get_mesh_data(obj)
+                vert_lookup, indices, loop_totals, masktag = classes.mesh_data(obj)
                 yield dict(
                     vertex_lookup=vert_lookup,
                     indices=indices,
@@ -178,6 +243,10 @@ def calc_instance_bbox(matrices, verts):
     return combined_bbox, single_bbox
 
 
+def _nbytes(arrays: dict):
+    return sum(np.asarray(v).nbytes for v in arrays.values())
+
+
 def get_mesh_id_if_cached(name, num_verts, current_ids, previous_frame_mapping):
     assert isinstance(current_ids, frozenset)
     if releveant_entries := previous_frame_mapping.get(name):
@@ -190,10 +259,171 @@ def get_mesh_id_if_cached(name, num_verts, current_ids, previous_frame_mapping):
     return None
 
 
+@gin.configurable
+class NpzWriter:
+    """
+    Saves npz files on a background thread, so mesh extraction continues while earlier batches are
+    written. Batches waiting or being written hold at most max_queued_bytes between them; save()
+    blocks until a new batch fits, but always accepts one batch when none are queued.
+    compress uses np.savez_compressed (zip deflate), which customgt's cnpy reader inflates on load.
+    """
+
+    def __init__(self, compress=False, max_queued_bytes=int(2e8)):
+        self.compress = compress
+        self.max_queued_bytes = max_queued_bytes
+        self.queue = queue.Queue()
+        self.queued_bytes = 0
+        self.space = threading.Condition()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                filename, arrays = item
+                if self.error is None:
+                    save = np.savez_compressed if self.compress else np.savez
+                    save(filename, **arrays)
+                    logger.info(f"Saved {len(arrays)} arrays to {filename}")
+            except Exception as e:
+                self.error = e
+            finally:
+                if item is not None:
+                    with self.space:
+                        self.queued_bytes -= _nbytes(item[1])
+                        self.space.notify_all()
+                self.queue.task_done()
+
+    def _check(self):
+        if self.error is not None:
+            raise RuntimeError(f"{self.__class__.__name__} failed") from self.error
+
+    def save(self, filename, arrays: dict):
+        self._check()
+        nbytes = _nbytes(arrays)
+        with self.space:
+            self.space.wait_for(
+                lambda: (
+                    self.queued_bytes == 0
+                    or self.queued_bytes + nbytes <= self.max_queued_bytes
+                )
+            )
+            self.queued_bytes += nbytes
+        self.queue.put((Path(filename), dict(arrays)))
+
+    def join(self):
+        """Wait until everything saved so far is on disk"""
+        self.queue.join()
+        self._check()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self._check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class MeshStore:
+    """
+    Content-addressed arrays shared by every saved_mesh.json written during one save_meshes call.
+
+    Each distinct array is written once, into a store_XXXX.npz in folder. Json entries then refer to
+    it by (filename relative to the json, key), so geometry which is unchanged between frames or
+    shared between objects is not rewritten into every frame's npz.
+
+    Up to max_pending_bytes are held until the next store file is saved. With a writer, peak memory
+    is therefore about max_pending_bytes + save_obj_and_instances' max_npz_bytes +
+    writer.max_queued_bytes, 6e8 bytes with the defaults (plus any single larger object)
+    """
+
+    def __init__(self, folder, max_pending_bytes=int(2e8), writer: NpzWriter = None):
+        self.folder = Path(folder)
+        self.writer = writer
+        self.folder.mkdir(exist_ok=True, parents=True)
+        self.max_pending_bytes = max_pending_bytes
+        self.locations = {}  # key -> path of the store npz containing it
+        self.pending = {}
+        self.pending_bytes = 0
+        self.file_idx = 1
+        self.n_added = 0
+        self.n_reused = 0
+
+    def _filename(self):
+        return self.folder / f"store_{self.file_idx:04d}.npz"
+
+    @staticmethod
+    def content_key(arr: np.ndarray) -> str:
+        h = hashlib.blake2b(digest_size=12)
+        h.update(f"{arr.dtype.str}{arr.shape}".encode())
+        h.update(arr.tobytes())
+        return h.hexdigest()
+
+    def add(self, arr: np.ndarray) -> tuple[Path, str]:
+        arr = np.ascontiguousarray(arr)
+        key = self.content_key(arr)
+        if key in self.locations:
+            self.n_reused += 1
+            return self.locations[key], key
+
+        if len(self.pending) and (
+            self.pending_bytes + arr.nbytes > self.max_pending_bytes
+        ):
+            self.flush()
+        self.pending[key] = arr
+        self.pending_bytes += arr.nbytes
+        self.locations[key] = self._filename()
+        self.n_added += 1
+        return self.locations[key], key
+
+    def flush(self):
+        if len(self.pending) == 0:
+            return
+        filename = self._filename()
+        if self.writer is not None:
+            self.writer.save(filename, self.pending)
+        else:
+            np.savez(filename, **self.pending)
+            logger.info(f"Saving {len(self.pending)} arrays to {filename}")
+        self.pending = {}
+        self.pending_bytes = 0
+        self.file_idx += 1
+
+
 @gin.configurable
 def save_obj_and_instances(
-    output_folder, previous_frame_mesh_id_mapping, current_frame_mesh_id_mapping
+    output_folder,
+    previous_frame_mesh_id_mapping,
+    current_frame_mesh_id_mapping,
+    mesh_store: MeshStore = None,
+    writer: NpzWriter = None,
+    max_npz_bytes=int(2e8),
+    classes: ObjectClasses = None,
+    write_index: bool = True,
 ):
+    """
+    mesh_store: if given, vertices/indices/etc are written to it and referenced from the json's
+        "store" field, leaving only transformations and instance_ids in this folder's npz files
+    writer: NpzWriter to save through. If None, one is created and closed before returning;
+        otherwise the caller must close it before reading the npz files
+    max_npz_bytes: start a new saved_mesh_XXXX.npz once the current one holds this many bytes
+    classes: ObjectClasses shared between the calls for each frame, see ObjectClasses.from_scene
+    write_index: also write the json's entries as a binary mesh_index.FILENAME
+    """
+
+    own_writer = writer is None
+    if own_writer:
+        writer = NpzWriter()
+
     output_folder = Path(output_folder)
     output_folder.mkdir(exist_ok=True, parents=True)
     for atm_name in ["atmosphere", "atmosphere_fine", "KoleClouds"]:
@@ -201,12 +431,11 @@ def save_obj_and_instances(
             bpy.data.objects.remove(bpy.data.objects[atm_name])
 
     json_data = []
-    instance_mesh_data = get_all_instances()
-    singleton_mesh_data = get_all_non_instances()
+    instance_mesh_data = get_all_instances(classes)
+    singleton_mesh_data = get_all_non_instances(classes)
     npz_number = 1
     filename = output_folder / f"saved_mesh_{npz_number:04d}.npz"
-    MAX_NUM_VERTS = int(5e6)  # lower if OOM
-    running_total_verts = 0
+    running_total_bytes = 0
     current_obj_num_verts = None
     npz_data = {}
     object_names_mapping = {}
@@ -219,21 +448,13 @@ def save_obj_and_instances(
                 object_names_mapping[object_name] = len(object_names_mapping) + 1
 
             # Flush the .npz to avoid OOM
-            if (len(npz_data) > 0) and (
-                (running_total_verts + current_obj_num_verts) >= MAX_NUM_VERTS
-            ):
-                np.savez(filename, **npz_data)
-                print(f"Saving to {filename}")
-                npz_data.clear()
-                running_total_verts = 0
+            if (len(npz_data) > 0) and (running_total_bytes >= max_npz_bytes):
+                writer.save(filename, npz_data)
+                npz_data = {}
+                running_total_bytes = 0
                 npz_number += 1
                 filename = output_folder / f"saved_mesh_{npz_number:04d}.npz"
 
-            if current_obj_num_verts > MAX_NUM_VERTS:
-                print(
-                    f"WARNING: Object {object_name} is very large, with {current_obj_num_verts} vertices."
-                )
-
         else:
             is_instance = item["is_instance"]
             if is_instance:
@@ -252,14 +473,23 @@ def save_obj_and_instances(
             else:
                 mesh_id = str(hex(int_hash(object_name)))[:12]
 
+            geometry = {"vertices": item["vertex_lookup"]}
             if "indices" in item:
-                npz_data[f"{mesh_id}_indices"] = item["indices"]
-                npz_data[f"{mesh_id}_loop_totals"] = item["loop_totals"]
-                npz_data[f"{mesh_id}_masktag"] = item["masktag"]
+                geometry["indices"] = item["indices"]
+                geometry["loop_totals"] = item["loop_totals"]
+                geometry["masktag"] = item["masktag"]
             else:
-                npz_data[f"{mesh_id}_radii"] = item["radii"]
-            assert f"{mesh_id}_vertices" not in npz_data
-            npz_data[f"{mesh_id}_vertices"] = item["vertex_lookup"]
+                geometry["radii"] = item["radii"]
+            assert f"{mesh_id}_transformations" not in npz_data
+            store_refs = {}
+            item_bytes = 0
+            for k, arr in geometry.items():
+                if mesh_store is None:
+                    npz_data[f"{mesh_id}_{k}"] = arr
+                    item_bytes += arr.nbytes
+                else:
+                    path, key = mesh_store.add(arr)
+                    store_refs[k] = [os.path.relpath(path, output_folder), key]
             matrices = np.asarray(item["matrices"], dtype=np.float32)
             npz_data[f"{mesh_id}_transformations"] = matrices
             instance_ids_array = np.asarray(item["instance_ids"], dtype=np.int32)
@@ -268,6 +498,7 @@ def save_obj_and_instances(
             )
             assert instance_ids_array.shape[1] == 3
             npz_data[f"{mesh_id}_instance_ids"] = instance_ids_array
+            item_bytes += matrices.nbytes + instance_ids_array.nbytes
             obj = bpy.data.objects[object_name]
             json_val = {
                 "filename": filename.name,
@@ -279,6 +510,8 @@ def save_obj_and_instances(
                 "num_instances": matrices.shape[0],
                 "object_idx": object_names_mapping[object_name],
             }
+            if len(store_refs):
+                json_val["store"] = store_refs
             if obj.type == "MESH":
                 json_val["num_verts"] = len(obj.data.vertices)
                 json_val["num_faces"] = len(obj.data.polygons)
@@ -306,11 +539,19 @@ def save_obj_and_instances(
                     object_names_mapping[child_obj.name] = len(object_names_mapping) + 1
                 json_val["children"].append(object_names_mapping[child_obj.name])
             json_data.append(json_val)
-            running_total_verts += current_obj_num_verts
+
+            if item_bytes > max_npz_bytes:
+                logger.warning(
+                    f"Object {object_name} is very large, with {current_obj_num_verts} vertices."
+                )
+            running_total_bytes += item_bytes
 
     if len(npz_data) > 0:
-        np.savez(filename, **npz_data)
-        print(f"Saving to {filename}")
+        writer.save(filename, npz_data)
+    if mesh_store is not None:
+        mesh_store.flush()
+    if own_writer:
+        writer.close()
 
     for obj in bpy.data.objects:
         if obj.hide_viewport:
@@ -337,3 +578,5 @@ def save_obj_and_instances(
 
     # Save JSON
     (output_folder / "saved_mesh.json").write_text(json.dumps(json_data, indent=4))
+    if write_index:
+        mesh_index.write_index(output_folder / mesh_index.FILENAME, json_data)
@@ -65,8 +65,8 @@ class Suppress:
         logging.disable(logging.CRITICAL)
 
     def __exit__(self, type, value, traceback):
-        os.close(1)
-        os.dup(self.old)
+        # dup2, unlike dup, leaves fd 1 inheritable so subprocesses still get a stdout
+        os.dup2(self.old, 1)
         os.close(self.old)
         logging.disable(self.level)
 
@@ -0,0 +1,106 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+"""
+Opt-in instrumentation for the constraint solver.
+
+While a profile is active (see start / stop), the evaluator times every node impl call by
+constraint / score term name and node class, and the solver's caches (eval_memo, bvh_cache,
+Planes) count their hits and misses. When no profile is active every hook returns immediately.
+"""
+
+import logging
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+class SolverProfile:
+    def __init__(self):
+        self.term = None
+
+        # (term, node class name) -> [n_calls, total_seconds]
+        self.impls = defaultdict(lambda: [0, 0.0])
+
+        # move type name -> [n_moves, total_seconds]
+        self.moves = defaultdict(lambda: [0, 0.0])
+
+        # cache name -> [hits, misses]
+        self.caches = defaultdict(lambda: [0, 0])
+
+    def records(self, **extra) -> list[dict]:
+        records = []
+        for (term, name), (n, dt) in self.impls.items():
+            records.append(
+                dict(extra, kind="impl", term=term, name=name, count=n, seconds=dt)
+            )
+        for name, (n, dt) in self.moves.items():
+            records.append(dict(extra, kind="move", name=name, count=n, seconds=dt))
+        for name, (hits, misses) in self.caches.items():
+            records.append(
+                dict(
+                    extra,
+                    kind="cache",
+                    name=name,
+                    count=hits + misses,
+                    hits=hits,
+                    misses=misses,
+                    hit_rate=hits / max(hits + misses, 1),
+                )
+            )
+        return records
+
+
+_profile: SolverProfile | None = None
+
+
+def start() -> SolverProfile:
+    global _profile
+    _profile = SolverProfile()
+    return _profile
+
+
+def stop() -> SolverProfile | None:
+    global _profile
+    profile, _profile = _profile, None
+    return profile
+
+
+def active() -> SolverProfile | None:
+    return _profile
+
+
+def set_term(name):
+    """
+    Attribute subsequent impl calls to constraint / score term `name`
+    """
+    if _profile is not None:
+        _profile.term = name
+
+
+def call_impl(impl, node, *args, **kwargs):
+    if _profile is None:
+        return impl(node, *args, **kwargs)
+    start_time = time.perf_counter()
+    try:
+        return impl(node, *args, **kwargs)
+    finally:
+        rec = _profile.impls[_profile.term, node.__class__.__name__]
+        rec[0] += 1
+        rec[1] += time.perf_counter() - start_time
+
+
+def record_move(name: str, dt: float):
+    if _profile is None:
+        return
+    rec = _profile.moves[name]
+    rec[0] += 1
+    rec[1] += dt
+
+
+def record_cache(name: str, hit: bool):
+    if _profile is None:
+        return
+    _profile.caches[name][0 if hit else 1] += 1
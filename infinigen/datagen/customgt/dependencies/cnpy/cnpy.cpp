@@ -227,6 +227,28 @@ cnpy::NpyArray load_the_npz_array(FILE* fp, uint32_t compr_bytes, uint32_t uncom
     return array;
 }
 
+// np.savez writes each member with force_zip64, so sizes of 0xFFFFFFFF in the local header
+// are stored as 64 bit values in the zip64 extra field (id 0x0001) instead
+void read_zip64_sizes(const std::vector<char>& extra, uint32_t& compr_bytes, uint32_t& uncompr_bytes) {
+    size_t pos = 0;
+    while(pos + 4 <= extra.size()) {
+        uint16_t id = *reinterpret_cast<const uint16_t*>(&extra[pos]);
+        uint16_t len = *reinterpret_cast<const uint16_t*>(&extra[pos+2]);
+        if(id == 0x0001) {
+            size_t field = pos + 4;
+            uint64_t uncompr64 = uncompr_bytes, compr64 = compr_bytes;
+            if(uncompr_bytes == 0xFFFFFFFF) { uncompr64 = *reinterpret_cast<const uint64_t*>(&extra[field]); field += 8; }
+            if(compr_bytes == 0xFFFFFFFF) { compr64 = *reinterpret_cast<const uint64_t*>(&extra[field]); field += 8; }
+            if(compr64 > 0xFFFFFFFF || uncompr64 > 0xFFFFFFFF)
+                throw std::runtime_error("npz_load: arrays over 4GB are not supported");
+            compr_bytes = compr64;
+            uncompr_bytes = uncompr64;
+            return;
+        }
+        pos += 4 + len;
+    }
+}
+
 cnpy::npz_t cnpy::npz_load(std::string fname) {
     FILE* fp = fopen(fname.c_str(),"rb");
 
@@ -255,6 +277,10 @@ cnpy::npz_t cnpy::npz_load(std::string fname) {
         //erase the lagging .npy        
         varname.erase(varname.end()-4,varname.end());
 
+        uint16_t compr_method = *reinterpret_cast<uint16_t*>(&local_header[0]+8);
+        uint32_t compr_bytes = *reinterpret_cast<uint32_t*>(&local_header[0]+18);
+        uint32_t uncompr_bytes = *reinterpret_cast<uint32_t*>(&local_header[0]+22);
+
         //read in the extra field
         uint16_t extra_field_len = *(uint16_t*) &local_header[28];
         if(extra_field_len > 0) {
@@ -262,12 +288,9 @@ cnpy::npz_t cnpy::npz_load(std::string fname) {
             size_t efield_res = fread(&buff[0],sizeof(char),extra_field_len,fp);
             if(efield_res != extra_field_len)
                 throw std::runtime_error("npz_load: failed fread");
+            read_zip64_sizes(buff, compr_bytes, uncompr_bytes);
         }
 
-        uint16_t compr_method = *reinterpret_cast<uint16_t*>(&local_header[0]+8);
-        uint32_t compr_bytes = *reinterpret_cast<uint32_t*>(&local_header[0]+18);
-        uint32_t uncompr_bytes = *reinterpret_cast<uint32_t*>(&local_header[0]+22);
-
         if(compr_method == 0) {arrays[varname] = load_the_npy_file(fp);}
         else {arrays[varname] = load_the_npz_array(fp,compr_bytes,uncompr_bytes);}
     }
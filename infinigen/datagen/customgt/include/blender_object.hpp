@@ -20,6 +20,8 @@ struct ObjectInfo
     std::string name, type, mesh_id, npz_filename;
     std::vector<int> children;
     std::vector<std::string> materials, unapplied_modifiers;
+    // array name -> (npz filename relative to the json, key), for arrays saved in a MeshStore
+    std::unordered_map<std::string, std::pair<std::string, std::string>> store;
 
     ObjectInfo(){}
 
@@ -34,7 +36,11 @@ struct ObjectInfo
     materials(instance_item["materials"]),
     unapplied_modifiers(instance_item["unapplied_modifiers"]),
     mesh_id(instance_item["mesh_id"]),
-    npz_filename(instance_item["filename"]){}
+    npz_filename(instance_item["filename"]){
+        if (instance_item.contains("store"))
+            for (const auto &[k, v] : instance_item["store"].items())
+                store[k] = {v[0].get<std::string>(), v[1].get<std::string>()};
+    }
 
 };
 
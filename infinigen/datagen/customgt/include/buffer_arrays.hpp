@@ -63,6 +63,9 @@ public:
 
 };
 
+// array name -> (npz, key) for arrays which live outside the object's own npz
+using StoredArrays = std::unordered_map<std::string, std::pair<const npz *, std::string>>;
+
 class BufferArrays
 {
 public:
@@ -73,7 +76,7 @@ public:
 
     BufferArrays(){}
 
-    BufferArrays(const npz &my_npz, std::string mesh_id, std::string obj_type, bool skip_indices=false);
+    BufferArrays(const npz &my_npz, std::string mesh_id, std::string obj_type, bool skip_indices=false, const StoredArrays &stored={});
 
     size_t sizeof_instance() const {
         return indices.size();
@@ -106,8 +106,18 @@ std::vector<unsigned int> generate_buffer(const std::vector<unsigned int> &indic
     return vertices;
 }
 
+template <typename T>
+std::vector<T> read_array(const npz &my_npz, const std::string &mesh_id, const std::string &name,
+                          const StoredArrays &stored)
+{
+    const auto it = stored.find(name);
+    if (it != stored.end())
+        return it->second.first->read_data<T>(it->second.second);
+    return my_npz.read_data<T>(mesh_id + "_" + name);
+}
+
 BufferArrays::BufferArrays(const npz &my_npz, std::string mesh_id, std::string obj_type,
-                           bool skip_indices)
+                           bool skip_indices, const StoredArrays &stored)
 {
     {
         const std::vector<int> instance_ids = my_npz.read_data<int>(mesh_id + "_instance_ids");
@@ -120,20 +130,20 @@ BufferArrays::BufferArrays(const npz &my_npz, std::string mesh_id, std::string o
 
     if (obj_type == "MESH")
     {
-        lookup = my_npz.read_data<float>(mesh_id + "_vertices");
+        lookup = read_array<float>(my_npz, mesh_id, "vertices", stored);
         // const auto face_tag_lookup = my_npz.read_data<int>(mesh_id +
         // "_masktag"); tag_lookup.resize(lookup.size());
-        tag_lookup = my_npz.read_data<int>(mesh_id + "_masktag");
+        tag_lookup = read_array<int>(my_npz, mesh_id, "masktag", stored);
 
         if (skip_indices)
             return;
 
-        const auto loop_totals = my_npz.read_data<int>(mesh_id + "_loop_totals");
+        const auto loop_totals = read_array<int>(my_npz, mesh_id, "loop_totals", stored);
         // MRASSERT(loop_totals.size() == face_tag_lookup.size(),
         // "loop_totals.size() ["+std::to_string(loop_totals.size())+"] !=
         // tag_lookup.size() ["+std::to_string(face_tag_lookup.size())+"]");
 
-        const auto npy_data = my_npz.read_data<int>(mesh_id + "_indices");
+        const auto npy_data = read_array<int>(my_npz, mesh_id, "indices", stored);
         auto it = npy_data.begin();
         int face_index = 0;
         for (const int &polygon_size : loop_totals)
@@ -152,8 +162,8 @@ BufferArrays::BufferArrays(const npz &my_npz, std::string mesh_id, std::string o
     }
     else if (obj_type == "CURVES")
     {
-        const auto vert_data = my_npz.read_data<float>(mesh_id + "_vertices");
-        const auto radii_data = my_npz.read_data<float>(mesh_id + "_radii");
+        const auto vert_data = read_array<float>(my_npz, mesh_id, "vertices", stored);
+        const auto radii_data = read_array<float>(my_npz, mesh_id, "radii", stored);
         const size_t num_hairs = vert_data.size() / (5 * 3);
         // std::cout << "We've got hair!: " << num_hairs << std::endl;
         for (int hair_idx = 0; hair_idx < num_hairs; hair_idx++)
@@ -34,6 +34,23 @@ auto parse_json(const fs::path json_path)
     return output;
 }
 
+const npz &lookup_npz(std::unordered_map<std::string, npz> &npz_lookup, const fs::path &path)
+{
+    if (npz_lookup.count(path.string()) == 0)
+        npz_lookup[path.string()] = path;
+    return npz_lookup.at(path.string());
+}
+
+StoredArrays stored_arrays(std::unordered_map<std::string, npz> &npz_lookup,
+                           const ObjectInfo &info, const fs::path &json_dir)
+{
+    StoredArrays stored;
+    for (const auto &[name, loc] : info.store)
+        stored[name] = {&lookup_npz(npz_lookup, (json_dir / loc.first).lexically_normal()),
+                        loc.second};
+    return stored;
+}
+
 std::shared_ptr<BaseBlenderObject> load_blender_mesh(const fs::path src_json_path,
                                                      const fs::path dst_json_path)
 {
@@ -68,10 +85,10 @@ std::shared_ptr<BaseBlenderObject> load_blender_mesh(const fs::path src_json_pat
         // Current frame
         current_obj = it->second;
         const fs::path current_npz_path = src_json_path.parent_path() / current_obj.npz_filename;
-        if (npz_lookup.count(current_npz_path.string()) == 0)
-            npz_lookup[current_npz_path.string()] = current_npz_path;
-        const npz &current_npz = npz_lookup.at(current_npz_path.string());
-        current_buf = BufferArrays(current_npz, current_mesh_id, current_obj.type);
+        const npz &current_npz = lookup_npz(npz_lookup, current_npz_path);
+        current_buf = BufferArrays(
+            current_npz, current_mesh_id, current_obj.type, false,
+            stored_arrays(npz_lookup, current_obj, src_json_path.parent_path()));
 
         std::cout << "Loading " << truncate(current_obj.name, 20) << " ";
         std::cout << std::to_string(object_idx++) << "/" << std::to_string(info_lookup.size())
@@ -82,10 +99,10 @@ std::shared_ptr<BaseBlenderObject> load_blender_mesh(const fs::path src_json_pat
             next_obj = next_info_lookup.at(current_mesh_id);
             const fs::path next_npz_path =
                 fs::path(dst_json_path.parent_path()) / next_obj.npz_filename;
-            if (npz_lookup.count(next_npz_path.string()) == 0)
-                npz_lookup[next_npz_path.string()] = next_npz_path;
-            const npz &next_npz = npz_lookup.at(next_npz_path.string());
-            next_buf = BufferArrays(next_npz, current_mesh_id, next_obj.type, true);
+            const npz &next_npz = lookup_npz(npz_lookup, next_npz_path);
+            next_buf = BufferArrays(
+                next_npz, current_mesh_id, next_obj.type, true,
+                stored_arrays(npz_lookup, next_obj, dst_json_path.parent_path()));
         }
         else
         {
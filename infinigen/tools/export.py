@@ -4,16 +4,27 @@
 
 
 import argparse
+import hashlib
+import json
 import logging
 import math
+import multiprocessing
 import shutil
 import subprocess
+import sys
+import tempfile
 from pathlib import Path
 
+import bmesh
 import bpy
 import gin
+import numpy as np
 
+from infinigen.core.placement import spawn_pool
+from infinigen.core.placement.detail import mesh_to_arrays
 from infinigen.core.util import blender as butil
+from infinigen.core.util.math import int_hash
+from infinigen.tools import fracture
 
 FORMAT_CHOICES = ["fbx", "obj", "usdc", "usda", "stl", "ply"]
 BAKE_TYPES = {
@@ -56,6 +67,24 @@ def realizeInstances(obj):
         geo_group.links.new(outputNode.inputs[0], realizeNode.outputs[0])
 
 
+def scatter_instancers() -> set:
+    """
+    Objects whose evaluated geometry instances other mesh objects, eg scatters built with
+    Object/Collection Info and Instance on Points. Objects which also instance geometry created
+    inside their own node tree are left out, since that geometry has no prototype to reference
+    """
+    instancers, own = set(), set()
+    for inst in bpy.context.evaluated_depsgraph_get().object_instances:
+        if not inst.is_instance or inst.parent is None or inst.object.type != "MESH":
+            continue
+        parent = inst.parent.original
+        if inst.object.original == parent:
+            own.add(parent)
+        else:
+            instancers.add(parent)
+    return instancers - own
+
+
 def remove_shade_smooth(obj):
     for mod in obj.modifiers:
         if mod is None or mod.type != "NODES":
@@ -418,7 +447,9 @@ def process_glass_materials(obj, export_usd):
             create_glass_shader(mat.node_tree, export_usd)
 
 
-def bake_pass(obj, dest: Path, img_size, bake_type, export_usd):
+def bake_pass(
+    obj, dest: Path, img_size, bake_type, export_usd, bake_cache=None, cache_key=None
+):
     img = bpy.data.images.new(f"{obj.name}_{bake_type}", img_size, img_size)
     clean_name = (obj.name).replace(" ", "_").replace(".", "_")
     file_path = dest / f"{clean_name}_{bake_type}.png"
@@ -472,14 +503,27 @@ def bake_pass(obj, dest: Path, img_size, bake_type, export_usd):
     else:
         internal_bake_type = bake_type
 
-    if bake_obj:
+    cached = None
+    if bake_obj and bake_cache is not None:
+        cached = bake_cache.lookup(cache_key, bake_type)
+
+    if cached is not None:
+        logging.info(f"Reusing {cached} for {bake_type} pass")
+        if cached != file_path:
+            shutil.copyfile(cached, file_path)
+        img.source = "FILE"
+        img.filepath = str(file_path)
+        img.reload()
+    elif bake_obj:
         logging.info(f"Baking {bake_type} pass")
         bpy.ops.object.bake(
             type=internal_bake_type, pass_filter={"COLOR"}, save_mode="EXTERNAL"
         )
         img.filepath_raw = str(file_path)
-        if not export_usd:
+        if not export_usd or bake_cache is not None:
             img.save()
+        if bake_cache is not None:
+            bake_cache.store(cache_key, bake_type, file_path)
         logging.info(f"Saving to {file_path}")
     else:
         logging.info(f"No necessary materials to bake on {obj.name}, skipping bake")
@@ -489,7 +533,7 @@ def bake_pass(obj, dest: Path, img_size, bake_type, export_usd):
 
 
 def bake_metal(
-    obj, dest, img_size, export_usd
+    obj, dest, img_size, export_usd, bake_cache=None, cache_key=None
 ):  # metal baking is not really set up for node graphs w/ 2 mixed BSDFs.
     metal_map_mats = []
     for slot in obj.material_slots:
@@ -513,7 +557,7 @@ def bake_metal(
             metal_map_mats.append(mat)
 
     if len(metal_map_mats) != 0:
-        bake_pass(obj, dest, img_size, "METAL", export_usd)
+        bake_pass(obj, dest, img_size, "METAL", export_usd, bake_cache, cache_key)
 
     for mat in metal_map_mats:
         nodes = mat.node_tree.nodes
@@ -523,7 +567,7 @@ def bake_metal(
         links.new(outputNode.inputs[0], principled_bsdf_node.outputs[0])
 
 
-def bake_normals(obj, dest, img_size, export_usd):
+def bake_normals(obj, dest, img_size, export_usd, bake_cache=None, cache_key=None):
     bake_obj = False
     for slot in obj.material_slots:
         mat = slot.material
@@ -539,7 +583,7 @@ def bake_normals(obj, dest, img_size, export_usd):
             bake_obj = True
 
     if bake_obj:
-        bake_pass(obj, dest, img_size, "NORMAL", export_usd)
+        bake_pass(obj, dest, img_size, "NORMAL", export_usd, bake_cache, cache_key)
 
 
 def remove_params(mat, node_tree):
@@ -602,21 +646,64 @@ def skipBake(obj):
     return False
 
 
+def triangulate_mesh(mesh: bpy.types.Mesh):
+    """
+    Same result as quads_convert_to_tris on every face in edit mode, but via bmesh so no mode
+    switches or object selection are needed. Meshes which are already all triangles are untouched
+    """
+    n = len(mesh.polygons)
+    if n == 0:
+        return False
+    loop_total = np.empty(n, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    if (loop_total == 3).all():
+        return False
+
+    bm = bmesh.new()
+    try:
+        bm.from_mesh(mesh)
+        bmesh.ops.triangulate(
+            bm, faces=bm.faces[:], quad_method="BEAUTY", ngon_method="BEAUTY"
+        )
+        bm.to_mesh(mesh)
+    finally:
+        bm.free()
+    mesh.update()
+    return True
+
+
 def triangulate_meshes():
     logging.debug("Triangulating Meshes")
-    for obj in bpy.context.scene.objects:
-        if obj.type == "MESH":
-            view_state = obj.hide_viewport
-            obj.hide_viewport = False
-            bpy.context.view_layer.objects.active = obj
-            obj.select_set(True)
-            bpy.ops.object.mode_set(mode="EDIT")
-            bpy.ops.mesh.select_all(action="SELECT")
-            logging.debug(f"Triangulating {obj}")
-            bpy.ops.mesh.quads_convert_to_tris()
-            bpy.ops.object.mode_set(mode="OBJECT")
-            obj.select_set(False)
-            obj.hide_viewport = view_state
+    meshes = {obj.data for obj in bpy.context.scene.objects if obj.type == "MESH"}
+    n = sum(triangulate_mesh(mesh) for mesh in meshes)
+    logging.debug(f"Triangulated {n} of {len(meshes)} meshes")
+
+
+def fracture_inputs(seed: int) -> list[tuple]:
+    """
+    (name, world space verts, triangles, seed) of each visible mesh, for fracture.fracture_meshes
+    """
+    view_layer_objs = set(bpy.context.view_layer.objects)
+    res = []
+    for obj in bpy.data.objects:
+        if (
+            obj.type != "MESH"
+            or obj.hide_render
+            or len(obj.data.polygons) == 0
+            or obj not in view_layer_objs
+        ):
+            continue
+        mesh = obj.data
+        mesh.calc_loop_triangles()
+        faces = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int64)
+        mesh.loop_triangles.foreach_get("vertices", faces)
+        co = np.empty(len(mesh.vertices) * 3)
+        mesh.vertices.foreach_get("co", co)
+        M = np.array(obj.matrix_world)
+        verts = co.reshape(-1, 3) @ M[:3, :3].T + M[:3, 3]
+        name = obj.name.replace("/", "_")
+        res.append((name, verts, faces.reshape(-1, 3), int_hash((seed, obj.name))))
+    return res
 
 
 def adjust_wattages():
@@ -647,12 +734,264 @@ def set_center_of_mass():
             obj.hide_viewport = view_state
 
 
-def bake_object(obj, dest, img_size, export_usd):
+def _hash_value(h, value):
+    if isinstance(value, (str, bool, int, float)) or value is None:
+        h.update(repr(value).encode())
+    elif isinstance(value, set):
+        h.update(repr(sorted(value)).encode())
+    else:
+        h.update(repr(tuple(value)).encode())
+
+
+_FINGERPRINT_SKIP = {
+    "rna_type",
+    "label",
+    "location",
+    "width",
+    "width_hidden",
+    "height",
+    "dimensions",
+    "select",
+    "show_options",
+    "show_preview",
+    "show_texture",
+    "hide",
+    "use_custom_color",
+    "color",
+    "bl_idname",
+    "bl_label",
+    "bl_description",
+    "bl_icon",
+    "bl_static_type",
+    "bl_width_default",
+    "bl_width_min",
+    "bl_width_max",
+    "bl_height_default",
+    "bl_height_min",
+    "bl_height_max",
+}
+
+
+def _hash_node_tree(h, node_tree, seen):
+    # key on the pointer, every material's embedded tree is named "Shader Nodetree"
+    if node_tree.as_pointer() in seen:
+        return
+    seen.add(node_tree.as_pointer())
+
+    for node in sorted(node_tree.nodes, key=lambda n: n.name):
+        h.update(f"{node.bl_idname}:{node.name}".encode())
+        for prop in node.bl_rna.properties:
+            if prop.identifier in _FINGERPRINT_SKIP or prop.type not in {
+                "BOOLEAN",
+                "INT",
+                "FLOAT",
+                "STRING",
+                "ENUM",
+            }:
+                continue
+            h.update(prop.identifier.encode())
+            _hash_value(h, getattr(node, prop.identifier))
+        for socket in node.inputs:
+            if hasattr(socket, "default_value"):
+                _hash_value(h, socket.default_value)
+
+        if getattr(node, "node_tree", None) is not None:
+            _hash_node_tree(h, node.node_tree, seen)
+        if getattr(node, "image", None) is not None:
+            h.update(f"{node.image.name}:{node.image.filepath}".encode())
+        if getattr(node, "color_ramp", None) is not None:
+            h.update(node.color_ramp.interpolation.encode())
+            for e in node.color_ramp.elements:
+                _hash_value(h, (e.position, *e.color))
+        if getattr(node, "mapping", None) is not None:
+            for curve in node.mapping.curves:
+                for point in curve.points:
+                    _hash_value(h, (*point.location, point.handle_type))
+
+    for link in node_tree.links:
+        h.update(
+            f"{link.from_node.name}:{link.from_socket.identifier}>"
+            f"{link.to_node.name}:{link.to_socket.identifier}".encode()
+        )
+
+
+def bake_cache_key(obj, img_size, export_usd) -> str:
+    """
+    Hash of everything a baked texture of obj depends on: its mesh (including the ExportUV
+    layout), transform, material node graphs, resolution and export mode
+    """
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{img_size}:{export_usd}".encode())
+    _hash_value(h, np.array(obj.matrix_world).reshape(-1))
+    _hash_mesh_and_materials(h, obj)
+    return h.hexdigest()
+
+
+def _hash_mesh_and_materials(h, obj):
+    for k, arr in sorted(mesh_to_arrays(obj.data).items()):
+        h.update(k.encode())
+        h.update(arr.tobytes())
+    for slot in obj.material_slots:
+        mat = slot.material
+        if mat is None or not mat.use_nodes:
+            h.update(b"none")
+            continue
+        _hash_node_tree(h, mat.node_tree, set())
+
+
+# shader node outputs which differ between objects with the same local mesh, None for all outputs
+_OBJECT_DEPENDENT_OUTPUTS = {
+    "ShaderNodeNewGeometry": {
+        "Position",
+        "Normal",
+        "Tangent",
+        "True Normal",
+        "Incoming",
+    },
+    "ShaderNodeTexCoord": {"Camera", "Window", "Reflection"},
+    "ShaderNodeObjectInfo": None,
+    "ShaderNodeVectorTransform": None,
+    "ShaderNodeParticleInfo": None,
+    "ShaderNodeAmbientOcclusion": None,  # depends on the surrounding scene
+}
+
+
+def _node_tree_object_dependent(node_tree, seen) -> bool:
+    if node_tree.as_pointer() in seen:
+        return False
+    seen.add(node_tree.as_pointer())
+
+    for node in node_tree.nodes:
+        if node.bl_idname in _OBJECT_DEPENDENT_OUTPUTS:
+            outputs = _OBJECT_DEPENDENT_OUTPUTS[node.bl_idname]
+            if any(
+                o.is_linked and (outputs is None or o.name in outputs)
+                for o in node.outputs
+            ):
+                return True
+        if node.bl_idname == "ShaderNodeTexCoord" and node.object is not None:
+            return True
+        if (
+            node.bl_idname == "ShaderNodeAttribute"
+            and node.attribute_type != "GEOMETRY"
+        ):
+            return True
+        if getattr(node, "node_tree", None) is not None:
+            if _node_tree_object_dependent(node.node_tree, seen):
+                return True
+    return False
+
+
+def bake_group_key(obj) -> str:
+    """
+    Objects with equal bake_group_key bake to identical textures on identical UV layouts: same
+    local mesh and material graphs, and a transform only matters if a material reads it
+    """
+
+    h = hashlib.blake2b(digest_size=16)
+    _hash_mesh_and_materials(h, obj)
+
+    seen = set()
+    if any(
+        _node_tree_object_dependent(slot.material.node_tree, seen)
+        for slot in obj.material_slots
+        if slot.material is not None and slot.material.use_nodes
+    ):
+        h.update(obj.name.encode())
+    return h.hexdigest()
+
+
+def group_shared_bakes(objs) -> dict:
+    """
+    Map the first object of each bake_group_key group to the rest of its group
+    """
+    groups = {}
+    for obj in objs:
+        groups.setdefault(bake_group_key(obj), []).append(obj)
+    return {g[0]: g[1:] for g in groups.values()}
+
+
+def share_baked(source, target):
+    """
+    Give target the ExportUV layout and baked materials of source, which has an identical mesh
+    """
+
+    uv = source.data.uv_layers.get("ExportUV")
+    if uv is None:
+        return  # source failed to unwrap, so was not baked either
+
+    if target.data is not source.data:
+        data = np.empty(len(uv.data) * 2, dtype=np.float32)
+        uv.data.foreach_get("uv", data)
+        for layer in reversed(target.data.uv_layers):
+            target.data.uv_layers.remove(layer)
+        target_uv = target.data.uv_layers.new(name="ExportUV")
+        target_uv.data.foreach_set("uv", data)
+        target_uv.active = True
+        target_uv.active_render = True
+
+    for slot, source_slot in zip(target.material_slots, source.material_slots):
+        slot.link = source_slot.link
+        slot.material = source_slot.material
+
+    target.hide_render = True
+    target.hide_viewport = True
+
+
+class BakeCache:
+    """
+    Textures baked so far, keyed on bake_cache_key and bake type, recorded in
+    bake_cache.json next to the textures so that later exports to the same folder can skip them.
+
+    reuse=False only records new bakes
+    """
+
+    FILENAME = "bake_cache.json"
+
+    def __init__(self, folder: Path, reuse=True):
+        self.folder = Path(folder)
+        self.folder.mkdir(exist_ok=True, parents=True)
+        self.reuse = reuse
+        self.entries = {}
+        self.new_entries = {}
+
+        path = self.folder / self.FILENAME
+        if reuse and path.exists():
+            self.entries = json.loads(path.read_text())
+
+    def lookup(self, key, bake_type) -> Path | None:
+        if not self.reuse or key is None:
+            return None
+        filename = self.entries.get(f"{key}_{bake_type}")
+        if filename is None or not (self.folder / filename).exists():
+            return None
+        return self.folder / filename
+
+    def store(self, key, bake_type, file_path: Path):
+        if key is None:
+            return
+        entry = {f"{key}_{bake_type}": Path(file_path).name}
+        self.entries.update(entry)
+        self.new_entries.update(entry)
+
+    def save(self):
+        path = self.folder / self.FILENAME
+        entries = json.loads(path.read_text()) if path.exists() else {}
+        entries.update(self.entries)
+        path.write_text(json.dumps(entries, indent=4))
+
+
+def bake_object(obj, dest, img_size, export_usd, bake_cache=None):
     if not uv_unwrap(obj):
         return
 
     bpy.ops.object.select_all(action="DESELECT")
 
+    cache_key = None
+    if bake_cache is not None:
+        cache_key = bake_cache_key(obj, img_size, export_usd)
+
     with butil.SelectObjects(obj):
         for slot in obj.material_slots:
             mat = slot.material
@@ -662,21 +1001,23 @@ def bake_object(obj, dest, img_size, export_usd):
                 )  # we duplicate in the case of distinct meshes sharing materials
 
         process_glass_materials(obj, export_usd)
-        bake_metal(obj, dest, img_size, export_usd)
-        bake_normals(obj, dest, img_size, export_usd)
+        bake_metal(obj, dest, img_size, export_usd, bake_cache, cache_key)
+        bake_normals(obj, dest, img_size, export_usd, bake_cache, cache_key)
         paramDict = process_interfering_params(obj)
         for bake_type in BAKE_TYPES:
-            bake_pass(obj, dest, img_size, bake_type, export_usd)
+            bake_pass(obj, dest, img_size, bake_type, export_usd, bake_cache, cache_key)
 
         apply_baked_tex(obj, paramDict)
 
 
-def bake_scene(folderPath: Path, image_res, vertex_colors, export_usd):
+def bake_targets():
+    targets = []
+    view_layer_objs = set(bpy.context.view_layer.objects)
     for obj in bpy.data.objects:
         logging.info("---------------------------")
         logging.info(obj.name)
 
-        if obj.type != "MESH" or obj not in list(bpy.context.view_layer.objects):
+        if obj.type != "MESH" or obj not in view_layer_objs:
             logging.info("Not mesh, skipping ...")
             continue
 
@@ -686,20 +1027,192 @@ def bake_scene(folderPath: Path, image_res, vertex_colors, export_usd):
         if format == "stl":
             continue
 
-        obj.hide_render = False
-        obj.hide_viewport = False
+        targets.append(obj)
+    return targets
 
-        if vertex_colors:
-            bakeVertexColors(obj)
-        else:
-            bake_object(obj, folderPath, image_res, export_usd)
+
+def bake_scene_object(
+    obj, folderPath: Path, image_res, vertex_colors, export_usd, bake_cache=None
+):
+    obj.hide_render = False
+    obj.hide_viewport = False
+
+    if vertex_colors:
+        bakeVertexColors(obj)
+    else:
+        bake_object(obj, folderPath, image_res, export_usd, bake_cache)
+
+    obj.hide_render = True
+    obj.hide_viewport = True
+
+
+def _bake_shard(args):
+    (
+        scene_path,
+        out_path,
+        names,
+        folderPath,
+        image_res,
+        vertex_colors,
+        export_usd,
+        reuse_cache,
+    ) = args
+
+    bpy.ops.wm.open_mainfile(filepath=str(scene_path))
+    bake_cache = BakeCache(folderPath, reuse=reuse_cache)
+
+    objs = [bpy.data.objects[n] for n in names]
+    for obj in objs:
+        bake_scene_object(
+            obj, folderPath, image_res, vertex_colors, export_usd, bake_cache
+        )
+
+    bpy.data.libraries.write(str(out_path), set(objs))
+    return bake_cache.new_entries
+
+
+def _shard_objects(objs, n_shards):
+    # longest-processing-time-first, using polygon count as the cost
+    shards = [[] for _ in range(n_shards)]
+    loads = np.zeros(n_shards)
+    for obj in sorted(objs, key=lambda o: len(o.data.polygons), reverse=True):
+        i = loads.argmin()
+        shards[i].append(obj.name)
+        loads[i] += len(obj.data.polygons) + 1
+    return [s for s in shards if len(s)]
+
+
+def _relink_baked(out_path: Path, names: list[str]):
+    with bpy.data.libraries.load(str(out_path), link=False) as (_, data_to):
+        data_to.objects = list(names)
+
+    for name, baked in zip(names, data_to.objects):
+        obj = bpy.data.objects[name]
+        old_mesh = obj.data
+        mesh_name = old_mesh.name
+        obj.data = baked.data
+        for slot, baked_slot in zip(obj.material_slots, baked.material_slots):
+            if baked_slot.link == "OBJECT":
+                slot.link = "OBJECT"
+                slot.material = baked_slot.material
+        bpy.data.objects.remove(baked, do_unlink=True)
+        if old_mesh.users == 0:
+            bpy.data.meshes.remove(old_mesh)
+            obj.data.name = mesh_name
 
         obj.hide_render = True
         obj.hide_viewport = True
 
 
+def _bake_parallel(
+    targets, folderPath, image_res, vertex_colors, export_usd, n_workers, reuse_cache
+):
+    shards = _shard_objects(targets, n_workers)
+    logging.info(
+        f"Baking {len(targets)} objects in {len(shards)} shards on {n_workers} workers"
+    )
+
+    new_entries = {}
+    with tempfile.TemporaryDirectory(prefix="bake_pool_") as tmp:
+        tmp = Path(tmp)
+        scene_path = tmp / "scene.blend"
+        bpy.ops.wm.save_as_mainfile(filepath=str(scene_path), copy=True)
+
+        args = [
+            (
+                scene_path,
+                tmp / f"shard_{i}.blend",
+                names,
+                folderPath,
+                image_res,
+                vertex_colors,
+                export_usd,
+                reuse_cache,
+            )
+            for i, names in enumerate(shards)
+        ]
+
+        modules = [m for m in sys.modules if m.startswith("infinigen")]
+        ctx = multiprocessing.get_context("spawn")
+        with spawn_pool.worker_sys_path():
+            pool = ctx.Pool(
+                n_workers,
+                initializer=spawn_pool.worker_init,
+                initargs=(modules, gin.config_str()),
+            )
+        with pool:
+            for (_, out_path, names, *_), entries in zip(
+                args, pool.imap(_bake_shard, args)
+            ):
+                _relink_baked(out_path, names)
+                new_entries.update(entries)
+
+    return new_entries
+
+
+def bake_scene(
+    folderPath: Path,
+    image_res,
+    vertex_colors,
+    export_usd,
+    n_workers=0,
+    bake_cache=False,
+    share_bakes=True,
+    exclude=(),
+):
+    """
+    n_workers: if > 0, bake shards of the objects in that many worker processes, each working on
+        a copy of the current scene. The baked meshes and materials are then relinked here
+    bake_cache: skip bakes whose result is already recorded in folderPath's BakeCache
+    share_bakes: bake each group_shared_bakes group once, and give the rest of the group the
+        same UVs and baked materials
+    exclude: objects not to bake
+    """
+
+    targets = [obj for obj in bake_targets() if obj not in exclude]
+
+    shared = {}
+    if share_bakes and not vertex_colors:
+        shared = group_shared_bakes(targets)
+        targets = list(shared.keys())
+        n_shared = sum(len(v) for v in shared.values())
+        logging.info(f"Sharing bakes for {n_shared} objects")
+
+    cache = None
+    if bake_cache or n_workers > 0:
+        cache = BakeCache(folderPath, reuse=bake_cache)
+
+    if n_workers > 0 and len(targets) > 1:
+        new_entries = _bake_parallel(
+            targets,
+            folderPath,
+            image_res,
+            vertex_colors,
+            export_usd,
+            n_workers,
+            bake_cache,
+        )
+        cache.entries.update(new_entries)
+    else:
+        for obj in targets:
+            bake_scene_object(
+                obj, folderPath, image_res, vertex_colors, export_usd, cache
+            )
+
+    for source, others in shared.items():
+        for obj in others:
+            share_baked(source, obj)
+
+    if cache is not None:
+        cache.save()
+
+
 def run_blender_export(
-    exportPath: Path, format: str, vertex_colors: bool, individual_export: bool
+    exportPath: Path,
+    format: str,
+    vertex_colors: bool,
+    individual_export: bool,
+    usd_instancing: bool = False,
 ):
     assert exportPath.parent.exists()
     exportPath = str(exportPath)
@@ -747,10 +1260,11 @@ def run_blender_export(
         bpy.ops.wm.usd_export(
             filepath=exportPath,
             export_textures=True,
-            # use_instancing=True,
+            use_instancing=usd_instancing,
             overwrite_textures=True,
             selected_objects_only=individual_export,
-            root_prim_path="/World",
+            # blender 4.2 writes instance references without the root prim, so they only resolve without one
+            root_prim_path="" if usd_instancing else "/World",
         )
 
 
@@ -799,7 +1313,7 @@ def export_single_obj(
     bpy.context.scene.cycles.tile_x = image_res
     bpy.context.scene.cycles.tile_y = image_res
 
-    if obj.type != "MESH" or obj not in list(bpy.context.view_layer.objects):
+    if obj.type != "MESH" or obj.name not in bpy.context.view_layer.objects:
         raise ValueError("Object not mesh")
 
     if export_usd:
@@ -833,7 +1347,7 @@ def export_single_obj(
         obj.type != "MESH"
         or obj.hide_render
         or len(obj.data.vertices) == 0
-        or obj not in list(bpy.context.view_layer.objects)
+        or obj.name not in bpy.context.view_layer.objects
     ):
         raise ValueError("Object is not mesh or hidden from render")
 
@@ -861,8 +1375,25 @@ def export_curr_scene(
     omniverse_export=False,
     pipeline_folder=None,
     task_uniqname=None,
+    bake_workers=0,
+    bake_cache=False,
+    share_bakes=True,
+    usd_instancing=False,
+    fracture_pieces=0,
+    fracture_seed=0,
+    fracture_workers=0,
 ) -> Path:
+    """
+    usd_instancing: for usd formats, keep the modifiers of scatter_instancers live so each
+        scattered instance is written as a reference to one prototype mesh rather than as its
+        own copy of the geometry
+    fracture_pieces: if > 0, also write a seeded Voronoi fracture of each exported mesh to
+        output_folder/fracture, see fracture.save_fracture. Meant for closed assets which feed a
+        destruction simulation, eg ice fruit, rather than whole scenes
+    """
+
     export_usd = format in ["usda", "usdc"]
+    usd_instancing = usd_instancing and export_usd
 
     export_folder = output_folder
     export_folder.mkdir(exist_ok=True)
@@ -897,10 +1428,16 @@ def export_curr_scene(
     #             logging.info(f"{obj.name} has no faces, removing...")
     #             bpy.data.objects.remove(obj, do_unlink=True)
 
+    instancers = set()
+    if usd_instancing:
+        instancers = scatter_instancers()
+        logging.info(f"Keeping instances of {len(instancers)} scatter objects")
+
     collection_views, obj_views = update_visibility()
 
+    view_layer_objs = set(bpy.context.view_layer.objects)
     for obj in bpy.data.objects:
-        if obj.type != "MESH" or obj not in list(bpy.context.view_layer.objects):
+        if obj.type != "MESH" or obj not in view_layer_objs or obj in instancers:
             continue
         if export_usd:
             apply_all_modifiers(obj)
@@ -921,6 +1458,10 @@ def export_curr_scene(
         image_res=image_res,
         vertex_colors=vertex_colors,
         export_usd=export_usd,
+        n_workers=bake_workers,
+        bake_cache=bake_cache,
+        share_bakes=share_bakes,
+        exclude=instancers,
     )
 
     for collection, status in collection_views.items():
@@ -943,16 +1484,28 @@ def export_curr_scene(
                 logging.info(f"{obj.name} has no faces, removing...")
                 bpy.data.objects.remove(obj, do_unlink=True)
 
+    if fracture_pieces > 0:
+        inputs = fracture_inputs(fracture_seed)
+        logging.info(f"Fracturing {len(inputs)} meshes into {fracture_pieces} pieces")
+        with spawn_pool.worker_sys_path():
+            fracture.fracture_meshes(
+                inputs,
+                export_folder / "fracture",
+                fracture_pieces,
+                n_workers=fracture_workers,
+            )
+
     if individual_export:
         bpy.ops.object.select_all(action="SELECT")
         bpy.ops.object.location_clear()  # send all objects to (0,0,0)
         bpy.ops.object.select_all(action="DESELECT")
+        view_layer_objs = set(bpy.context.view_layer.objects)
         for obj in bpy.data.objects:
             if (
                 obj.type != "MESH"
                 or obj.hide_render
                 or len(obj.data.vertices) == 0
-                or obj not in list(bpy.context.view_layer.objects)
+                or obj not in view_layer_objs
             ):
                 continue
 
@@ -964,15 +1517,45 @@ def export_curr_scene(
             logging.info(f"Exporting file to {export_file=}")
             obj.hide_viewport = False
             obj.select_set(True)
-            run_blender_export(export_file, format, vertex_colors, individual_export)
+            run_blender_export(
+                export_file, format, vertex_colors, individual_export, usd_instancing
+            )
             obj.select_set(False)
     else:
         logging.info(f"Exporting file to {export_file=}")
-        run_blender_export(export_file, format, vertex_colors, individual_export)
+        run_blender_export(
+            export_file, format, vertex_colors, individual_export, usd_instancing
+        )
 
         return export_file
 
 
+def export_blend(blendfile: Path, args) -> Path:
+    bpy.ops.wm.open_mainfile(filepath=str(blendfile))
+
+    folder = export_scene(
+        blendfile,
+        args.output_folder,
+        format=args.format,
+        image_res=args.resolution,
+        vertex_colors=args.vertex_colors,
+        individual_export=args.individual,
+        omniverse_export=args.omniverse,
+        bake_workers=args.bake_workers,
+        bake_cache=args.bake_cache,
+        usd_instancing=args.usd_instancing,
+        fracture_pieces=args.fracture_pieces,
+        fracture_workers=args.fracture_workers,
+    )
+    # wanted to use shutil here but kept making corrupted files
+    subprocess.call(["zip", "-r", str(folder.with_suffix(".zip")), str(folder)])
+    return folder
+
+
+def _export_blend_job(job):
+    return export_blend(*job)
+
+
 def main(args):
     args.output_folder.mkdir(exist_ok=True)
     logging.basicConfig(
@@ -982,6 +1565,7 @@ def main(args):
     )
 
     targets = sorted(list(args.input_folder.iterdir()))
+    blendfiles = []
     for blendfile in targets:
         if blendfile.stem == "solve_state":
             shutil.copy(blendfile, args.output_folder / "solve_state.json")
@@ -990,19 +1574,16 @@ def main(args):
             print(f"Skipping non-blend file {blendfile}")
             continue
 
-        bpy.ops.wm.open_mainfile(filepath=str(blendfile))
+        blendfiles.append(blendfile)
 
-        folder = export_scene(
-            blendfile,
-            args.output_folder,
-            format=args.format,
-            image_res=args.resolution,
-            vertex_colors=args.vertex_colors,
-            individual_export=args.individual,
-            omniverse_export=args.omniverse,
-        )
-        # wanted to use shutil here but kept making corrupted files
-        subprocess.call(["zip", "-r", str(folder.with_suffix(".zip")), str(folder)])
+    if args.n_workers > 0 and len(blendfiles) > 1:
+        with spawn_pool.WarmPool(args.n_workers) as pool:
+            jobs = [(blendfile, args) for blendfile in blendfiles]
+            for folder in pool.imap(_export_blend_job, jobs, ordered=False):
+                logging.info(f"Finished export {folder}")
+    else:
+        for blendfile in blendfiles:
+            export_blend(blendfile, args)
 
     bpy.ops.wm.quit_blender()
 
@@ -1019,6 +1600,17 @@ def make_args():
     parser.add_argument("-r", "--resolution", default=1024, type=int)
     parser.add_argument("-i", "--individual", action="store_true")
     parser.add_argument("-o", "--omniverse", action="store_true")
+    parser.add_argument("--bake_workers", default=0, type=int)
+    parser.add_argument("--bake_cache", action="store_true")
+    parser.add_argument("--usd_instancing", action="store_true")
+    parser.add_argument("--fracture_pieces", default=0, type=int)
+    parser.add_argument("--fracture_workers", default=0, type=int)
+    parser.add_argument(
+        "--n_workers",
+        default=0,
+        type=int,
+        help="Export this many input .blend files at once in long-lived worker processes",
+    )
 
     args = parser.parse_args()
 
@@ -1031,6 +1623,12 @@ def make_args():
     if args.format == "ply" and not args.vertex_colors:
         raise ValueError(".ply export must use vertex colors.")
 
+    if args.n_workers > 0 and (args.bake_workers > 0 or args.fracture_workers > 0):
+        # WarmPool workers are daemonic and cannot start pools of their own
+        raise ValueError(
+            "--n_workers cannot be combined with --bake_workers or --fracture_workers."
+        )
+
     return args
 
 
@@ -0,0 +1,332 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+"""
+Seeded Voronoi fracture of closed triangle meshes, precomputed at export time so destruction
+simulations can load the pieces instead of fracturing each asset themselves.
+
+Each piece is the mesh clipped to one Voronoi cell of seeds sampled inside the mesh. The outer
+surface is clipped with vectorized numpy, and the interior faces capping each cut are the mesh's
+cross-section on the bisector plane intersected with the cell's face, triangulated by shapely.
+Only depends on numpy, scipy, shapely and trimesh so it can run in light worker processes.
+"""
+
+import logging
+import multiprocessing
+from pathlib import Path
+
+import gin
+import numpy as np
+import shapely
+import trimesh
+from scipy.spatial import HalfspaceIntersection
+
+logger = logging.getLogger(__name__)
+
+ICE_DENSITY = 917.0  # kg/m^3
+
+
+def winding_numbers(points: np.ndarray, tris: np.ndarray, max_elements=2**22):
+    """
+    Generalized winding number of each point wrt the (T, 3, 3) triangle soup, ~1 inside a closed
+    mesh and ~0 outside (Jacobson et al. 2013)
+    """
+
+    res = np.empty(len(points))
+    step = max(1, max_elements // max(len(tris), 1))
+    for start in range(0, len(points), step):
+        d = tris[None] - points[start : start + step, None, None]
+        a, b, c = d[:, :, 0], d[:, :, 1], d[:, :, 2]
+        la, lb, lc = (np.linalg.norm(x, axis=-1) for x in (a, b, c))
+        det = np.einsum("ptk,ptk->pt", a, np.cross(b, c))
+        denom = (
+            la * lb * lc
+            + np.einsum("ptk,ptk->pt", a, b) * lc
+            + np.einsum("ptk,ptk->pt", b, c) * la
+            + np.einsum("ptk,ptk->pt", c, a) * lb
+        )
+        res[start : start + step] = np.arctan2(det, denom).sum(-1) / (2 * np.pi)
+    return res
+
+
+def sample_interior(tris: np.ndarray, n: int, rng: np.random.Generator, max_tries=50):
+    lo, hi = tris.reshape(-1, 3).min(0), tris.reshape(-1, 3).max(0)
+    found = []
+    for _ in range(max_tries):
+        cand = rng.uniform(lo, hi, size=(4 * n, 3))
+        found.append(cand[winding_numbers(cand, tris) > 0.5])
+        if sum(len(f) for f in found) >= n:
+            break
+    points = np.concatenate(found)[:n]
+    if len(points) < n:
+        logger.warning(f"Only found {len(points)} of {n} interior fracture seeds")
+    return points
+
+
+def clip_triangles(tris: np.ndarray, normal: np.ndarray, offset: float):
+    """
+    Clip a (T, 3, 3) triangle soup to the halfspace normal @ x <= offset, keeping winding
+    """
+
+    d = tris @ normal - offset
+    inside = d <= 0
+    n_in = inside.sum(axis=1)
+
+    def roll(mask, first):
+        # cyclically rotate each masked triangle so its vertex `first` comes first
+        idx = (first[:, None] + np.arange(3)) % 3
+        t = np.take_along_axis(tris[mask], idx[..., None], 1)
+        return t, np.take_along_axis(d[mask], idx, 1)
+
+    def lerp(t, dd, i, j):
+        w = (dd[:, i] / (dd[:, i] - dd[:, j]))[:, None]
+        return t[:, i] + w * (t[:, j] - t[:, i])
+
+    res = [tris[n_in == 3]]
+
+    one = n_in == 1
+    t, dd = roll(one, np.argmax(inside[one], axis=1))
+    res.append(np.stack([t[:, 0], lerp(t, dd, 0, 1), lerp(t, dd, 0, 2)], axis=1))
+
+    two = n_in == 2
+    t, dd = roll(two, np.argmin(inside[two], axis=1))
+    p01, p02 = lerp(t, dd, 0, 1), lerp(t, dd, 0, 2)
+    res.append(np.stack([p01, t[:, 1], t[:, 2]], axis=1))
+    res.append(np.stack([p01, t[:, 2], p02], axis=1))
+
+    return np.concatenate(res)
+
+
+def _plane_basis(normal):
+    u = np.cross(normal, [1, 0, 0] if abs(normal[0]) < 0.9 else [0, 1, 0])
+    u /= np.linalg.norm(u)
+    return u, np.cross(normal, u)
+
+
+def cross_section(verts, faces, edges, normal, offset, basis):
+    """
+    2D (in basis) area of the closed mesh verts/faces on the plane normal @ x == offset.
+    edges is the (F, 3, 2) sorted vertex pairs of each face, so every crossing point is computed
+    once per mesh edge and segments from neighbouring faces share exact endpoints
+    """
+
+    d = verts @ normal - offset
+    above = d > 0
+    face_above = above[faces]
+    crossing = face_above.any(1) & ~face_above.all(1)
+    if not crossing.any():
+        return shapely.Polygon()
+
+    e = edges[crossing]  # (C, 3, 2)
+    cut = above[e[..., 0]] != above[e[..., 1]]  # exactly two per face
+    e = e[cut].reshape(-1, 2, 2)
+    da, db = d[e[..., 0]], d[e[..., 1]]
+    w = (da / (da - db))[..., None]
+    pa, pb = verts[e[..., 0]], verts[e[..., 1]]
+    points = pa + w * (pb - pa)  # (C, 2, 3)
+
+    u, v = basis
+    segs = np.stack([points @ u, points @ v], axis=-1)
+    return shapely.build_area(shapely.multilinestrings(segs))
+
+
+def _cell_faces(seeds, i, lo, hi):
+    """
+    Bisector planes (normal, offset) between seed i and each other seed, and the polygon of the
+    Voronoi cell of seed i lying on each one (empty if that plane does not bound the cell)
+    """
+
+    others = np.delete(np.arange(len(seeds)), i)
+    normals = seeds[others] - seeds[i]
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    offsets = np.einsum("ij,ij->i", normals, (seeds[others] + seeds[i]) / 2)
+
+    box_normals = np.concatenate([np.eye(3), -np.eye(3)])
+    box_offsets = np.concatenate([hi, -lo])
+    halfspaces = np.concatenate(
+        [
+            np.concatenate([normals, -offsets[:, None]], axis=1),
+            np.concatenate([box_normals, -box_offsets[:, None]], axis=1),
+        ]
+    )
+    cell = HalfspaceIntersection(halfspaces, seeds[i]).intersections
+
+    eps = 1e-6 * np.linalg.norm(hi - lo)
+    faces = []
+    for normal, offset in zip(normals, offsets):
+        basis = _plane_basis(normal)
+        on_plane = cell[np.abs(cell @ normal - offset) < eps]
+        if len(on_plane) < 3:
+            faces.append((normal, offset, basis, shapely.Polygon()))
+            continue
+        poly = shapely.MultiPoint(
+            np.stack([on_plane @ basis[0], on_plane @ basis[1]], -1)
+        ).convex_hull
+        faces.append((normal, offset, basis, poly))
+    return faces
+
+
+def _triangulate_cap(poly, normal, offset, basis):
+    tris = shapely.get_parts(shapely.constrained_delaunay_triangles(poly))
+    if len(tris) == 0:
+        return np.zeros((0, 3, 3))
+    uv = shapely.get_coordinates(shapely.get_exterior_ring(tris)).reshape(-1, 4, 2)[
+        :, :3
+    ]
+
+    # caps face out of the cell, ie along normal, which is u x v
+    e1, e2 = uv[:, 1] - uv[:, 0], uv[:, 2] - uv[:, 0]
+    cw = e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0] < 0
+    uv[cw] = uv[cw][:, ::-1]
+
+    u, v = basis
+    return uv[..., :1] * u + uv[..., 1:] * v + offset * normal
+
+
+def volume_centroid(tris: np.ndarray):
+    vols = np.einsum("ij,ij->i", tris[:, 0], np.cross(tris[:, 1], tris[:, 2])) / 6
+    volume = vols.sum()
+    if abs(volume) < 1e-12:
+        return 0.0, tris.reshape(-1, 3).mean(0)
+    centroid = (vols[:, None] * tris.sum(1) / 4).sum(0) / volume
+    return volume, centroid
+
+
+def fracture(
+    verts: np.ndarray,
+    faces: np.ndarray,
+    n_pieces: int,
+    seed: int = 0,
+    density: float = ICE_DENSITY,
+) -> dict:
+    """
+    Voronoi fracture of the closed triangle mesh verts/faces into up to n_pieces pieces.
+
+    Returns arrays for every non-empty piece: seeds, centroids, volumes, masses, plus the pieces'
+    concatenated vertices/faces with face_piece (index of each face's piece) and interior (True
+    for cap faces created by the fracture)
+    """
+
+    verts = np.asarray(verts, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    tris = verts[faces]
+    rng = np.random.default_rng(seed)
+    seeds = sample_interior(tris, n_pieces, rng)
+
+    edges = np.sort(np.stack([faces, np.roll(faces, -1, axis=1)], axis=-1), axis=-1)
+    margin = 1e-3 * np.ptp(verts, axis=0).max()
+    lo, hi = verts.min(0) - margin, verts.max(0) + margin
+
+    sections = {}
+    pieces = []
+    for i in range(len(seeds)):
+        shell = tris
+        caps = []
+        for normal, offset, basis, face_poly in _cell_faces(seeds, i, lo, hi):
+            shell = clip_triangles(shell, normal, offset)
+            if face_poly.is_empty or face_poly.area == 0:
+                continue
+            key = tuple(np.round(np.append(normal, offset), 12))
+            if key not in sections:
+                sections[key] = cross_section(
+                    verts, faces, edges, normal, offset, basis
+                )
+            cap = sections[key].intersection(face_poly)
+            if not cap.is_empty and cap.area > 0:
+                caps.append(_triangulate_cap(cap, normal, offset, basis))
+
+        if len(shell) == 0:
+            continue
+        caps = np.concatenate(caps) if len(caps) else np.zeros((0, 3, 3))
+        pieces.append((seeds[i], shell, caps))
+
+    res = dict(
+        seeds=np.zeros((len(pieces), 3)),
+        centroids=np.zeros((len(pieces), 3)),
+        volumes=np.zeros(len(pieces)),
+        masses=np.zeros(len(pieces)),
+        density=np.float64(density),
+    )
+    all_verts, all_faces, face_piece, interior = [], [], [], []
+    n_verts = 0
+    for p, (s, shell, caps) in enumerate(pieces):
+        piece_tris = np.concatenate([shell, caps])
+        volume, centroid = volume_centroid(piece_tris)
+        res["seeds"][p] = s
+        res["centroids"][p] = centroid
+        res["volumes"][p] = volume
+        res["masses"][p] = volume * density
+
+        mesh = trimesh.Trimesh(
+            vertices=piece_tris.reshape(-1, 3),
+            faces=np.arange(3 * len(piece_tris)).reshape(-1, 3),
+            process=False,
+        )
+        mesh.merge_vertices()
+        all_verts.append(mesh.vertices)
+        all_faces.append(mesh.faces + n_verts)
+        n_verts += len(mesh.vertices)
+        face_piece.append(np.full(len(piece_tris), p))
+        interior.append(np.arange(len(piece_tris)) >= len(shell))
+
+    res["vertices"] = np.concatenate(all_verts) if pieces else np.zeros((0, 3))
+    res["faces"] = (
+        np.concatenate(all_faces) if pieces else np.zeros((0, 3), dtype=np.int64)
+    )
+    res["face_piece"] = (
+        np.concatenate(face_piece) if pieces else np.zeros(0, dtype=np.int64)
+    )
+    res["interior"] = np.concatenate(interior) if pieces else np.zeros(0, dtype=bool)
+    return res
+
+
+def piece_meshes(res: dict) -> list[trimesh.Trimesh]:
+    meshes = []
+    for p in range(len(res["volumes"])):
+        mask = res["face_piece"] == p
+        mesh = trimesh.Trimesh(
+            vertices=res["vertices"], faces=res["faces"][mask], process=False
+        )
+        mesh.remove_unreferenced_vertices()
+        meshes.append(mesh)
+    return meshes
+
+
+def save_fracture(res: dict, folder: Path, name: str):
+    """
+    Write folder/{name}.npz with every array of res, plus folder/{name}/piece_XXXX.obj
+    """
+    folder.mkdir(exist_ok=True, parents=True)
+    np.savez(folder / f"{name}.npz", **res)
+    piece_folder = folder / name
+    piece_folder.mkdir(exist_ok=True)
+    for p, mesh in enumerate(piece_meshes(res)):
+        mesh.export(piece_folder / f"piece_{p:04d}.obj")
+
+
+def _fracture_job(args):
+    name, verts, faces, folder, n_pieces, seed, density = args
+    res = fracture(verts, faces, n_pieces, seed=seed, density=density)
+    save_fracture(res, folder, name)
+    logger.info(f"Fractured {name} into {len(res['volumes'])} pieces")
+    return name, len(res["volumes"])
+
+
+@gin.configurable
+def fracture_meshes(
+    meshes: list[tuple], folder: Path, n_pieces, density=ICE_DENSITY, n_workers=0
+) -> dict:
+    """
+    meshes: (name, verts, faces, seed) per asset. Returns the number of pieces saved per name
+    """
+
+    args = [
+        (name, verts, faces, folder, n_pieces, seed, density)
+        for name, verts, faces, seed in meshes
+    ]
+    if n_workers > 0 and len(args) > 1:
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(n_workers) as pool:
+            return dict(pool.imap_unordered(_fracture_job, args))
+    return dict(_fracture_job(a) for a in args)
@@ -0,0 +1,264 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+"""
+saved_mesh.idx, a binary index of the entries of a saved_mesh.json manifest.
+
+The file holds a header, then 8-byte aligned sections read as numpy arrays straight from a memory
+map: one fixed-width record per entry, an open-addressing hash table from mesh_id to record, the
+children lists, and a utf-8 string table. Strings are stored as (offset, length) into the table,
+as are the less common fields (materials, store, ...) which go in a compact json blob per entry.
+Looking up a mesh_id reads one bucket chain rather than parsing the whole manifest.
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FILENAME = "saved_mesh.idx"
+MAGIC = b"IGMSHIDX"
+VERSION = 1
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("n_records", "<u4"),
+        ("n_buckets", "<u4"),
+        ("n_children", "<u4"),
+        ("strings_len", "<u8"),
+    ]
+)
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("mesh_id", "S16"),  # empty for entries without one, eg lights
+        ("filename", "<u4", 2),  # (offset, length) into the string table
+        ("object_name", "<u4", 2),
+        ("object_type", "S16"),
+        ("object_idx", "<i4"),
+        ("num_verts", "<i8"),  # -1 if absent
+        ("num_faces", "<i8"),
+        ("num_instances", "<i8"),
+        ("children", "<u4", 2),  # (offset, count) into the children table
+        ("bbox", "<f8", (8, 3)),  # nan if absent
+        ("instance_bbox", "<f8", (8, 3)),
+        ("extra", "<u4", 2),  # (offset, length) of a json object with all other fields
+    ]
+)
+
+_STR_FIELDS = ["filename", "object_name"]
+_INT_FIELDS = ["num_verts", "num_faces", "num_instances"]
+_BBOX_FIELDS = ["bbox", "instance_bbox"]
+_FIXED_FIELDS = {
+    "mesh_id",
+    "object_type",
+    "object_idx",
+    "children",
+    *_STR_FIELDS,
+    *_INT_FIELDS,
+    *_BBOX_FIELDS,
+}
+
+
+def fnv1a(data: bytes) -> int:
+    # 64 bit FNV-1a, simple to reimplement in any reader
+    h = 0xCBF29CE484222325
+    for b in data:
+        h = ((h ^ b) * 0x100000001B3) & 0xFFFFFFFFFFFFFFFF
+    return h
+
+
+def _align(n: int) -> int:
+    return (n + 7) // 8 * 8
+
+
+def _layout(header):
+    offsets = {}
+    pos = _align(HEADER_DTYPE.itemsize)
+    sizes = [
+        ("records", int(header["n_records"]) * RECORD_DTYPE.itemsize),
+        ("buckets", int(header["n_buckets"]) * 4),
+        ("children", int(header["n_children"]) * 4),
+        ("strings", int(header["strings_len"])),
+    ]
+    for name, size in sizes:
+        offsets[name] = (pos, size)
+        pos = _align(pos + size)
+    return offsets, pos
+
+
+def write_index(path: Path, entries: list[dict]):
+    records = np.zeros(len(entries), dtype=RECORD_DTYPE)
+    children = []
+    strings = bytearray()
+
+    def add_string(s: str):
+        b = s.encode()
+        offset = len(strings)
+        strings.extend(b)
+        return offset, len(b)
+
+    for rec, entry in zip(records, entries):
+        mesh_id = entry.get("mesh_id", "")
+        assert len(mesh_id.encode()) <= 16, mesh_id
+        rec["mesh_id"] = mesh_id.encode()
+        for k in _STR_FIELDS:
+            rec[k] = add_string(entry[k]) if k in entry else (0, 0)
+        rec["object_type"] = entry.get("object_type", "").encode()
+        rec["object_idx"] = entry.get("object_idx", -1)
+        for k in _INT_FIELDS:
+            rec[k] = entry.get(k, -1)
+        rec["children"] = (len(children), len(entry.get("children", [])))
+        children.extend(entry.get("children", []))
+        for k in _BBOX_FIELDS:
+            rec[k] = entry[k] if k in entry else np.nan
+        extra = {k: v for k, v in entry.items() if k not in _FIXED_FIELDS}
+        rec["extra"] = add_string(json.dumps(extra, separators=(",", ":")))
+
+    n_buckets = 1 << max(1, int(2 * len(entries) - 1).bit_length())
+    buckets = np.full(n_buckets, -1, dtype=np.int32)
+    for i, rec in enumerate(records):
+        if len(rec["mesh_id"]) == 0:
+            continue
+        b = fnv1a(rec["mesh_id"]) & (n_buckets - 1)
+        while buckets[b] != -1:
+            b = (b + 1) & (n_buckets - 1)
+        buckets[b] = i
+
+    header = np.zeros((), dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["n_records"] = len(records)
+    header["n_buckets"] = n_buckets
+    header["n_children"] = len(children)
+    header["strings_len"] = len(strings)
+
+    offsets, total = _layout(header)
+    data = np.zeros(total, dtype=np.uint8)
+    data[: HEADER_DTYPE.itemsize] = np.frombuffer(header.tobytes(), dtype=np.uint8)
+    sections = {
+        "records": records.tobytes(),
+        "buckets": buckets.tobytes(),
+        "children": np.asarray(children, dtype=np.int32).tobytes(),
+        "strings": bytes(strings),
+    }
+    for name, (offset, size) in offsets.items():
+        data[offset : offset + size] = np.frombuffer(sections[name], dtype=np.uint8)
+
+    tmp = Path(path).with_suffix(".idx.tmp")
+    data.tofile(tmp)
+    tmp.replace(path)
+
+
+class MeshIndex:
+    """
+    Memory-mapped reader for a saved_mesh.idx file
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        data = np.memmap(self.path, dtype=np.uint8, mode="r")
+        header = data[: HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} mesh index")
+
+        offsets, _ = _layout(header)
+
+        def section(name, dtype):
+            offset, size = offsets[name]
+            return data[offset : offset + size].view(dtype)
+
+        self.records = section("records", RECORD_DTYPE)
+        self._buckets = section("buckets", np.int32)
+        self._children = section("children", np.int32)
+        self._strings = section("strings", np.uint8)
+
+    def __len__(self):
+        return len(self.records)
+
+    def _string(self, span) -> str:
+        offset, length = int(span[0]), int(span[1])
+        return self._strings[offset : offset + length].tobytes().decode()
+
+    def find(self, mesh_id: str) -> int:
+        """
+        Index of the record with mesh_id, or -1
+        """
+        key = mesh_id.encode()
+        mask = len(self._buckets) - 1
+        b = fnv1a(key) & mask
+        while (i := int(self._buckets[b])) != -1:
+            if self.records[i]["mesh_id"] == key:
+                return i
+            b = (b + 1) & mask
+        return -1
+
+    def filename(self, i: int) -> str:
+        return self._string(self.records[i]["filename"])
+
+    def object_name(self, i: int) -> str:
+        return self._string(self.records[i]["object_name"])
+
+    def children(self, i: int) -> np.ndarray:
+        offset, count = self.records[i]["children"]
+        return self._children[offset : offset + count]
+
+    def entry(self, i: int) -> dict:
+        """
+        The saved_mesh.json entry record i was made from
+        """
+        rec = self.records[i]
+        entry = {}
+        if len(rec["mesh_id"]):
+            entry["mesh_id"] = rec["mesh_id"].decode()
+        for k in _STR_FIELDS:
+            if rec[k][1] > 0:
+                entry[k] = self._string(rec[k])
+        entry["object_type"] = rec["object_type"].decode()
+        entry["object_idx"] = int(rec["object_idx"])
+        for k in _INT_FIELDS:
+            if rec[k] != -1:
+                entry[k] = int(rec[k])
+        entry["children"] = self.children(i).tolist()
+        for k in _BBOX_FIELDS:
+            if not np.isnan(rec[k]).all():
+                entry[k] = rec[k].tolist()
+        entry.update(json.loads(self._string(rec["extra"])))
+        return entry
+
+    def __getitem__(self, mesh_id: str) -> dict:
+        i = self.find(mesh_id)
+        if i == -1:
+            raise KeyError(mesh_id)
+        return self.entry(i)
+
+
+def convert_json(json_path: Path, index_path: Path = None) -> Path:
+    json_path = Path(json_path)
+    if index_path is None:
+        index_path = json_path.with_name(FILENAME)
+    write_index(index_path, json.loads(json_path.read_text()))
+    return index_path
+
+
+def main(args):
+    paths = sorted(args.input_folder.rglob("saved_mesh.json"))
+    for path in paths:
+        convert_json(path)
+    logger.info(f"Wrote {len(paths)} {FILENAME} files under {args.input_folder}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write a saved_mesh.idx next to every saved_mesh.json below input_folder"
+    )
+    parser.add_argument("input_folder", type=Path)
+    logging.basicConfig(level=logging.INFO)
+    main(parser.parse_args())
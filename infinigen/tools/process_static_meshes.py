@@ -8,6 +8,8 @@ import json
 import os
 from pathlib import Path
 
+from infinigen.tools import mesh_index
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("target_frames_dir", type=Path)
@@ -39,6 +41,10 @@ if __name__ == "__main__":
             args.target_frames_dir / frame_folder / "mesh/saved_mesh.json", "w"
         ) as f:
             json.dump(current_json, f)
+        mesh_index.write_index(
+            args.target_frames_dir / frame_folder / "mesh" / mesh_index.FILENAME,
+            current_json,
+        )
         for npz_path in os.listdir(static_mesh_folder):
             if npz_path.endswith(".npz"):
                 os.symlink(
@@ -17,7 +17,6 @@ import re
 import subprocess
 import traceback
 from itertools import product
-from multiprocessing import Pool
 from pathlib import Path
 
 import bpy
@@ -54,7 +53,7 @@ from infinigen.assets.utils.decorate import read_base_co, read_co
 from infinigen.assets.utils.misc import assign_material
 from infinigen.core import init, surface
 from infinigen.core.init import configure_cycles_devices
-from infinigen.core.placement import density
+from infinigen.core.placement import density, spawn_pool
 from infinigen.core.tagging import tag_system
 
 # noinspection PyUnresolvedReferences
@@ -229,20 +228,15 @@ def build_scene_surface(args, factory_name, idx):
     return asset
 
 
-def build_and_save_asset(payload: dict):
-    # unpack payload - args are packed into payload for compatibility with slurm/multiprocessing
-    factory_name = payload["fac"]
-    args = payload["args"]
-    idx = payload["idx"]
+_worker_ready = False
 
-    output_folder = args.output_folder / f"{factory_name}_{idx:03d}"
 
-    if output_folder.exists() and args.skip_existing:
-        print(f"Skipping {output_folder}")
+def setup_worker(args):
+    # gin configs and blender settings are the same for every asset, so only apply them once per process
+    global _worker_ready
+    if _worker_ready:
         return
 
-    output_folder.mkdir(exist_ok=True)
-
     init.apply_gin_configs(
         ["infinigen_examples/configs_indoor", "infinigen_examples/configs_nature"],
         configs=args.configs,
@@ -262,13 +256,31 @@ def build_and_save_asset(payload: dict):
     if args.gpu:
         init.configure_render_cycles()
 
+    surface.registry.initialize_from_gin()
+    _worker_ready = True
+
+
+def build_and_save_asset(payload: dict):
+    # unpack payload - args are packed into payload for compatibility with slurm/multiprocessing
+    factory_name = payload["fac"]
+    args = payload["args"]
+    idx = payload["idx"]
+
+    output_folder = args.output_folder / f"{factory_name}_{idx:03d}"
+
+    if output_folder.exists() and args.skip_existing:
+        print(f"Skipping {output_folder}")
+        return
+
+    output_folder.mkdir(exist_ok=True)
+
+    setup_worker(args)
+
     logger.info(f"Building scene for {factory_name} {idx}")
 
     if args.seed > 0:
         idx = args.seed
 
-    surface.registry.initialize_from_gin()
-
     scene = bpy.context.scene
     scene.render.engine = "CYCLES"
     scene.render.resolution_x, scene.render.resolution_y = map(
@@ -448,12 +460,18 @@ def mapfunc(
     its,
     args,
     slurm_nodelist=None,
+    max_jobs_per_worker=None,
 ):
     if args.n_workers == 1:
         return [f(i) for i in its]
     elif not args.slurm:
-        with Pool(args.n_workers) as p:
-            return list(p.imap(f, its))
+        with spawn_pool.WarmPool(
+            args.n_workers,
+            setup=setup_worker,
+            setup_args=(args,),
+            max_jobs_per_worker=max_jobs_per_worker,
+        ) as pool:
+            return list(pool.imap(f, its))
     else:
         if submitit is None:
             raise ValueError("submitit not imported, cannot use --slurm")
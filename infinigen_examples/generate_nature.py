@@ -230,6 +230,10 @@ def compose_nature(output_folder, scene_seed, **params):
     def add_kelp(terrain_mesh):
         fac = monocot.KelpMonocotFactory(int_hash((scene_seed, 0)), coarse=True)
         selection = density.placement_mask(scale=0.05, tag=underwater_domain)
+        # kelp placeholders are only needed by populate, unless a river uses them as obstacles
+        rivers = params.get("simulated_river_enabled") or params.get(
+            "tilted_river_enabled"
+        )
         placement.scatter_placeholders_mesh(
             terrain_mesh,
             fac,
@@ -237,6 +241,7 @@ def compose_nature(output_folder, scene_seed, **params):
             overall_density=params.get("kelp_density", uniform(0.2, 1)),
             selection=selection,
             distance_min=3,
+            lazy=not rivers,
         )
 
     p.run_stage("kelp", add_kelp, terrain_mesh)
@@ -413,7 +418,7 @@ def compose_nature(output_folder, scene_seed, **params):
         n = random_general(params.get("max_fish_schools", 3))
         for i in range(n):
             selection = density.placement_mask(
-                0.1, select_thresh=0, tag=underwater_domain
+                0.1, select_thresh=0, tag=underwater_domain, target=terrain_near
             )
             fac = creatures.FishSchoolFactory(randint(1e7), bvh=terrain_inview_bvh)
             col = placement.scatter_placeholders_mesh(
@@ -430,7 +435,9 @@ def compose_nature(output_folder, scene_seed, **params):
 
     def add_bug_swarm():
         n = randint(1, params.get("max_bug_swarms", 3) + 1)
-        selection = density.placement_mask(0.1, select_thresh=0, tag=land_domain)
+        selection = density.placement_mask(
+            0.1, select_thresh=0, tag=land_domain, target=terrain_inview
+        )
         fac = creatures.AntSwarmFactory(
             randint(1e7), bvh=terrain_inview_bvh, coarse=True
         )
@@ -453,6 +460,7 @@ def compose_nature(output_folder, scene_seed, **params):
             normal_thresh=0.7,
             return_scalar=True,
             tag=nonliving_domain,
+            target=target,
         )
         _, rock_col = pebbles.apply(target, selection=selection)
         return rock_col
@@ -466,6 +474,7 @@ def compose_nature(output_folder, scene_seed, **params):
             normal_thresh=0.7,
             return_scalar=True,
             tag=land_domain,
+            target=target,
         )
         ground_leaves.apply(target, selection=selection, season=season)
 
@@ -479,6 +488,7 @@ def compose_nature(output_folder, scene_seed, **params):
             normal_thresh=0.7,
             return_scalar=True,
             tag=nonliving_domain,
+            target=target,
         )
         ground_twigs.apply(target, selection=selection, use_leaves=use_leaves)
 
@@ -491,6 +501,7 @@ def compose_nature(output_folder, scene_seed, **params):
             normal_thresh=0.7,
             return_scalar=True,
             tag=nonliving_domain,
+            target=target,
         )
         chopped_trees.apply(target, selection=selection)
 
@@ -504,6 +515,7 @@ def compose_nature(output_folder, scene_seed, **params):
             tag=land_domain,
             return_scalar=True,
             select_thresh=uniform(select_max / 2, select_max),
+            target=target,
         )
         grass.apply(target, selection=selection)
 
@@ -511,7 +523,7 @@ def compose_nature(output_folder, scene_seed, **params):
 
     def add_monocots(target):
         selection = density.placement_mask(
-            normal_dir=(0, 0, 1), scale=0.2, tag=land_domain
+            normal_dir=(0, 0, 1), scale=0.2, tag=land_domain, target=target
         )
         monocots.apply(terrain_inview, grass=True, selection=selection)
         selection = density.placement_mask(
@@ -519,6 +531,7 @@ def compose_nature(output_folder, scene_seed, **params):
             scale=0.2,
             select_thresh=0.55,
             tag=params.get("grass_habitats", None),
+            target=target,
         )
         monocots.apply(target, grass=False, selection=selection)
 
@@ -531,6 +544,7 @@ def compose_nature(output_folder, scene_seed, **params):
             select_thresh=0.6,
             return_scalar=True,
             tag=land_domain,
+            target=target,
         )
         fern.apply(target, selection=selection)
 
@@ -543,6 +557,7 @@ def compose_nature(output_folder, scene_seed, **params):
             select_thresh=0.6,
             return_scalar=True,
             tag=land_domain,
+            target=target,
         )
         flowerplant.apply(target, selection=selection)
 
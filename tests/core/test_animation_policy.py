@@ -0,0 +1,50 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+import bpy
+import numpy as np
+from mathutils.bvhtree import BVHTree
+
+from infinigen.core.placement import animation_policy
+from infinigen.core.util import blender as butil
+
+
+def make_scene(end_loc):
+    butil.clear_scene()
+    wall = butil.spawn_cube(size=1, location=(5, 0, 1))
+    wall.scale = (0.2, 4, 2)
+    butil.apply_transform(wall, loc=True)
+    bpy.context.view_layer.update()
+    bvh = BVHTree.FromObject(wall, bpy.context.evaluated_depsgraph_get())
+
+    obj = butil.spawn_empty("mover")
+    obj.location = (0, 0, 1)
+    animation_policy.keyframe(obj, obj.location, obj.rotation_euler, 1)
+    animation_policy.keyframe(obj, end_loc, None, 30)
+    return obj, bvh
+
+
+def test_sample_locations_match_frame_set():
+    obj, _ = make_scene((10, 3, 2))
+    frames = [1, 4, 15, 29, 30]
+    sampled = animation_policy.sample_locations(obj, frames)
+    for frame, loc in zip(frames, sampled):
+        bpy.context.scene.frame_set(frame)
+        np.testing.assert_allclose(loc, obj.location, atol=1e-6)
+
+
+def test_validate_keyframe_range():
+    obj, bvh = make_scene((10, 0, 1))
+    bpy.context.scene.frame_set(1)
+    assert not animation_policy.validate_keyframe_range(obj, 1, 30, bvh)
+
+    obj, bvh = make_scene((4, 0, 1))
+    bpy.context.scene.frame_set(1)
+    assert animation_policy.validate_keyframe_range(obj, 1, 30, bvh)
+    assert not animation_policy.validate_keyframe_range(
+        obj, 1, 30, bvh, min_altitude=0.5
+    )
+
+    path = np.array([[0, 0, 1], [4, 0, 1], [4, 5, 1], [6, 5, 1], [6, 0, 1]])
+    assert animation_policy.first_blocked_segment(bvh, path) is None
+    assert animation_policy.first_blocked_segment(bvh, path[[0, 1, 4]]) == 1
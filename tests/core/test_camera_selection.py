@@ -0,0 +1,67 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+import bpy
+import numpy as np
+from mathutils.bvhtree import BVHTree
+
+from infinigen.core.placement import camera as cam_util
+from infinigen.core.util import blender as butil
+
+
+def make_scene():
+    butil.clear_scene()
+    scene = bpy.context.scene
+    scene.render.resolution_x, scene.render.resolution_y = 160, 90
+    scene.render.resolution_percentage = 100
+
+    ground = butil.spawn_cube(size=1, location=(0, 0, -0.5))
+    ground.scale = (200, 200, 1)
+    butil.apply_transform(ground)
+    placeholder = butil.spawn_cube(size=2, location=(0, 0, 1))
+    bpy.context.view_layer.update()
+
+    bvh = BVHTree.FromObject(ground, bpy.context.evaluated_depsgraph_get())
+    kd = butil.joined_kd([placeholder], include_origins=True)
+    (rig,) = cam_util.spawn_camera_rigs(
+        [dict(loc=(0, 0, 0), rot_euler=(0, 0, 0))], n_camera_rigs=1
+    )
+    return rig, bvh, kd
+
+
+def base_views(batch_size, seed=0):
+    rig, bvh, kd = make_scene()
+    np.random.seed(seed)
+    return cam_util.compute_base_views(
+        rig,
+        n_views=3,
+        terrain=None,
+        scene_bvh=bvh,
+        location_sample=lambda: np.random.uniform((-6, -6, 0), (6, 6, 0)),
+        placeholders_kd=kd,
+        min_candidates_ratio=2,
+        max_tries=500,
+        batch_size=batch_size,
+        camera_selection_answers={},
+        vertexwise_min_dist=None,
+        camera_selection_ratio={},
+        min_placeholder_dist=3,
+        terrain_coverage_range=(0.2, 1),
+    )
+
+
+def test_batched_base_views_deterministic():
+    serial = base_views(batch_size=None)
+    assert len(serial) == 3
+
+    views = base_views(batch_size=8)
+    assert len(views) == 3
+    for score, props, _ in views:
+        assert np.linalg.norm(np.array(props.loc)[:2]) > 1.5
+        assert np.isfinite(score)
+
+    again = base_views(batch_size=8)
+    for (s1, p1, d1), (s2, p2, d2) in zip(views, again):
+        assert s1 == s2 and d1 == d2
+        np.testing.assert_array_equal(p1.loc, p2.loc)
+        np.testing.assert_array_equal(p1.rot, p2.rot)
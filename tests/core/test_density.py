@@ -0,0 +1,103 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+import bpy
+import numpy as np
+import pytest
+
+from infinigen.core import surface
+from infinigen.core.nodes.node_wrangler import Nodes
+from infinigen.core.placement import density
+from infinigen.core.util import blender as butil
+from infinigen.core.util.math import FixedSeed
+
+
+def make_target():
+    butil.clear_scene()
+    bpy.ops.mesh.primitive_grid_add(x_subdivisions=16, y_subdivisions=16, size=8)
+    obj = bpy.context.active_object
+
+    # a smooth shaded, bumpy terrain, so corner normals differ from face normals
+    rng = np.random.default_rng(0)
+    co = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+    obj.data.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    co[:, 2] = np.sin(co[:, 0]) * np.cos(co[:, 1] * 0.7) + rng.uniform(0, 0.3, len(co))
+    obj.data.vertices.foreach_set("co", co.reshape(-1))
+    obj.data.shade_smooth()
+    obj.data.update()
+
+    n = len(obj.data.polygons)
+    masktag = rng.integers(0, 4, n)
+    surface.write_attr_data(obj, "MaskTag", masktag, type="INT", domain="FACE")
+    density.set_tag_dict({"land": 1, "land.rock": 2, "water": 3})
+    return obj
+
+
+def geo_scatter(nw, selection):
+    geometry = nw.new_node(
+        Nodes.GroupInput, expose_input=[("NodeSocketGeometry", "Geometry", None)]
+    )
+    points = nw.new_node(
+        Nodes.DistributePointsOnFaces,
+        [geometry],
+        input_kwargs={
+            "Density": 100,
+            "Selection": surface.eval_argument(nw, selection),
+            "Seed": 0,
+        },
+    )
+    verts = nw.new_node(Nodes.PointsToVertices, [points])
+    nw.new_node(Nodes.GroupOutput, input_kwargs={"Geometry": verts})
+
+
+def scatter(obj, **mask_kwargs):
+    target = mask_kwargs.pop("target", None)
+    with FixedSeed(0):
+        selection = density.placement_mask(**mask_kwargs, target=target)
+    pts = butil.deep_clone_obj(obj)
+    with FixedSeed(0):
+        surface.add_geomod(
+            pts, geo_scatter, apply=True, input_kwargs=dict(selection=selection)
+        )
+    co = np.empty(len(pts.data.vertices) * 3, dtype=np.float32)
+    pts.data.vertices.foreach_get("co", co)
+    bpy.data.objects.remove(pts, do_unlink=True)
+    return co.reshape(-1, 3)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(select_thresh=None, normal_thresh=0.8),
+        dict(select_thresh=None, normal_thresh=0.7, tag="land,-rock"),
+        dict(normal_thresh=0.5, normal_thresh_high=0.9, altitude_range=(-0.2, 0.8)),
+    ],
+)
+def test_static_mask_matches_scatter(kwargs):
+    obj = make_target()
+
+    expected = scatter(obj, **kwargs)
+    assert (
+        0
+        < len(expected)
+        < scatter(obj, select_thresh=None, normal_thresh=None).shape[0]
+    )
+
+    res = scatter(obj, **kwargs, target=obj)
+    np.testing.assert_array_equal(res, expected)
+
+
+def test_static_mask_cached():
+    obj = make_target()
+    a = density.cached_static_mask(obj, normal_thresh=0.5, tag="water")
+    assert obj.data.attributes[a].domain == "CORNER"
+    data = surface.read_attr_data(obj, a).copy()
+    assert density.cached_static_mask(obj, normal_thresh=0.5, tag="water") == a
+    assert density.cached_static_mask(obj, normal_thresh=0.6, tag="water") != a
+
+    # moving the target invalidates the cached mask
+    obj.data.transform(np.diag([1, 1, -1, 1]))
+    obj.data.flip_normals()
+    assert density.cached_static_mask(obj, normal_thresh=0.5, tag="water") == a
+    assert not (surface.read_attr_data(obj, a) == data).all()
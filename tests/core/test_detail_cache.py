@@ -0,0 +1,86 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+import bpy
+import numpy as np
+
+from infinigen.core.placement import detail
+from infinigen.core.util import blender as butil
+
+
+def make_obj():
+    butil.clear_scene()
+    obj = butil.spawn_cube(size=2)
+    butil.modify_mesh(obj, "SUBSURF", levels=2)
+    vals = np.arange(len(obj.data.vertices), dtype=np.float32)
+    attr = obj.data.attributes.new("weight", "FLOAT", "POINT")
+    attr.data.foreach_set("value", vals)
+    return obj
+
+
+def assert_same_arrays(a, b):
+    assert a.keys() == b.keys()
+    for k in a:
+        np.testing.assert_array_equal(a[k], b[k], err_msg=k)
+
+
+def test_mesh_arrays_roundtrip():
+    obj = make_obj()
+    arrays = detail.mesh_to_arrays(obj.data)
+    assert "attr:POINT:FLOAT:weight" in arrays
+    assert any(k.startswith("attr:CORNER:FLOAT2:") for k in arrays)
+
+    mesh = bpy.data.meshes.new("copy")
+    detail.arrays_to_mesh(mesh, arrays)
+    assert not mesh.validate()
+    assert_same_arrays(detail.mesh_to_arrays(mesh), arrays)
+
+
+def test_detail_cache_hit(tmp_path):
+    orig = detail._detail_cache
+    try:
+        detail._detail_cache = detail.DetailCache(enabled=True, folder=tmp_path)
+        cache = detail._detail_cache
+
+        first = make_obj()
+        assert detail.remesh_with_attrs(first, 0.13) is first
+        assert len(cache._memory) == 1
+        assert len(list(tmp_path.glob("*.npz"))) == 1
+        expected = detail.mesh_to_arrays(first.data)
+
+        # face sizes within the same quantization step share an entry
+        second = make_obj()
+        cache._memory.clear()  # force a load from disk
+        assert detail.remesh_with_attrs(second, 0.131) is second
+        assert len(list(tmp_path.glob("*.npz"))) == 1
+        assert_same_arrays(detail.mesh_to_arrays(second.data), expected)
+        assert "weight" in second.data.attributes
+
+        # disabled cache runs at the requested face size
+        detail._detail_cache = detail.DetailCache(enabled=False)
+        third = make_obj()
+        detail.remesh_with_attrs(third, 0.131)
+        assert len(third.data.vertices) > 0
+    finally:
+        detail._detail_cache = orig
+
+
+def test_detail_cache_scale():
+    orig = detail._detail_cache
+    try:
+        detail._detail_cache = detail.DetailCache(enabled=True)
+        cache = detail._detail_cache
+
+        first = make_obj()
+        detail.sharp_remesh_with_attrs(first, 0.05)
+        n_verts = len(first.data.vertices)
+
+        # same mesh data, but a larger object needs a deeper octree
+        second = make_obj()
+        second.scale = (4, 4, 4)
+        bpy.context.view_layer.update()
+        detail.sharp_remesh_with_attrs(second, 0.05)
+        assert len(cache._memory) == 2
+        assert len(second.data.vertices) > n_verts
+    finally:
+        detail._detail_cache = orig
@@ -0,0 +1,166 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+import json
+from collections import defaultdict
+
+import bpy
+import numpy as np
+import pytest
+
+from infinigen.core.util import blender as butil
+from infinigen.core.util import exporting
+from infinigen.tools import mesh_index
+
+
+def load_array(folder, entry, name):
+    if name in entry.get("store", {}):
+        filename, key = entry["store"][name]
+        return np.load(folder / filename)[key]
+    return np.load(folder / entry["filename"])[f"{entry['mesh_id']}_{name}"]
+
+
+def save_frames(output_folder, n_frames, mesh_store):
+    previous, current = dict(), defaultdict(dict)
+    for frame in range(n_frames):
+        bpy.data.objects["moving"].location.x = frame
+        bpy.data.objects["deforming"].data.vertices[0].co.z = frame
+        bpy.context.view_layer.update()
+        exporting.save_obj_and_instances(
+            output_folder / f"frame_{frame:04d}" / "mesh",
+            previous,
+            current,
+            mesh_store=mesh_store,
+        )
+        previous = dict(current)
+        current.clear()
+
+
+def test_mesh_store_dedups_frames(tmp_path):
+    butil.clear_scene()
+    butil.spawn_cube(name="moving")
+    butil.spawn_cube(name="deforming")
+
+    store = exporting.MeshStore(tmp_path / "mesh_store")
+    save_frames(tmp_path, 3, store)
+
+    # both cubes share topology, so the first frame stores their 2 vertex arrays plus
+    # one copy of indices/loop_totals/masktag, later frames only the deformed vertices
+    assert store.n_added == 5 + 2
+    assert len(list((tmp_path / "mesh_store").glob("*.npz"))) == 3
+
+    for frame in range(3):
+        folder = tmp_path / f"frame_{frame:04d}" / "mesh"
+        entries = json.loads((folder / "saved_mesh.json").read_text())
+        entries = {e["object_name"]: e for e in entries}
+
+        frame_npz = np.load(folder / entries["moving"]["filename"])
+        assert not any(k.endswith("_vertices") for k in frame_npz.keys())
+        transforms = load_array(folder, entries["moving"], "transformations")
+        assert transforms[0, 0, 3] == frame
+
+        verts = load_array(folder, entries["deforming"], "vertices")
+        assert verts[0, 2] == frame
+        assert len(load_array(folder, entries["deforming"], "indices")) == 24
+
+
+def test_mesh_store_matches_plain(tmp_path):
+    butil.clear_scene()
+    butil.spawn_cube(name="moving")
+    butil.spawn_cube(name="deforming")
+
+    save_frames(tmp_path / "plain", 2, None)
+    save_frames(tmp_path / "store", 2, exporting.MeshStore(tmp_path / "mesh_store"))
+
+    for frame in range(2):
+        plain = tmp_path / "plain" / f"frame_{frame:04d}" / "mesh"
+        stored = tmp_path / "store" / f"frame_{frame:04d}" / "mesh"
+        plain_entries = json.loads((plain / "saved_mesh.json").read_text())
+        stored_entries = json.loads((stored / "saved_mesh.json").read_text())
+        for a, b in zip(plain_entries, stored_entries):
+            assert "store" not in a
+            assert a["mesh_id"] == b["mesh_id"]
+            for name in ["vertices", "indices", "loop_totals", "masktag"]:
+                np.testing.assert_array_equal(
+                    load_array(plain, a, name), load_array(stored, b, name)
+                )
+
+
+def test_npz_writer(tmp_path):
+    arrays = {"a": np.arange(1000), "b": np.ones((3, 4), dtype=np.float32)}
+    with exporting.NpzWriter(compress=True, max_queued_bytes=1) as writer:
+        for i in range(4):
+            writer.save(tmp_path / f"{i}.npz", {k: v * i for k, v in arrays.items()})
+            # batches over the budget are queued one at a time
+            assert writer.queued_bytes <= sum(v.nbytes for v in arrays.values())
+
+    for i in range(4):
+        res = np.load(tmp_path / f"{i}.npz")
+        for k, v in arrays.items():
+            np.testing.assert_array_equal(res[k], v * i)
+
+    writer = exporting.NpzWriter()
+    writer.save(tmp_path / "missing" / "x.npz", arrays)
+    with pytest.raises(RuntimeError):
+        writer.close()
+
+
+def test_save_splits_by_bytes(tmp_path):
+    butil.clear_scene()
+    for i in range(3):
+        butil.spawn_cube(name=f"cube_{i}")
+
+    exporting.save_obj_and_instances(
+        tmp_path, dict(), defaultdict(dict), max_npz_bytes=1
+    )
+    entries = json.loads((tmp_path / "saved_mesh.json").read_text())
+    assert len({e["filename"] for e in entries}) == 3
+    for e in entries:
+        assert len(load_array(tmp_path, e, "vertices")) == 8
+
+    index = mesh_index.MeshIndex(tmp_path / mesh_index.FILENAME)
+    assert [index.entry(i) for i in range(len(index))] == entries
+
+
+def test_object_classes(tmp_path):
+    butil.clear_scene()
+    static = butil.spawn_cube(name="static")
+    moving = butil.spawn_cube(name="moving")
+    deforming = butil.spawn_cube(name="deforming")
+    for frame, x in [(1, 0), (3, 2)]:
+        moving.location.x = x
+        moving.keyframe_insert("location", frame=frame)
+    deforming.shape_key_add(name="Basis")
+    key = deforming.shape_key_add(name="up")
+    key.data[0].co.z = 5
+    for frame, value in [(1, 0), (3, 1)]:
+        key.value = value
+        key.keyframe_insert("value", frame=frame)
+
+    def is_static(obj):
+        return obj.animation_data is None and obj.data.shape_keys is None
+
+    classes = exporting.ObjectClasses.from_scene(is_static)
+    assert classes.static == {"static"}
+    assert classes.rigid == {"moving"}
+    static.hide_viewport = True
+
+    for frame in range(1, 4):
+        bpy.context.scene.frame_set(frame)
+        for name, kw in [("plain", {}), ("classes", {"classes": classes})]:
+            exporting.save_obj_and_instances(
+                tmp_path / name / str(frame), dict(), defaultdict(dict), **kw
+            )
+
+        plain = tmp_path / "plain" / str(frame)
+        cached = tmp_path / "classes" / str(frame)
+        plain_entries = json.loads((plain / "saved_mesh.json").read_text())
+        cached_entries = json.loads((cached / "saved_mesh.json").read_text())
+        assert plain_entries == cached_entries
+        for e in plain_entries:
+            for name in ["vertices", "indices", "transformations"]:
+                np.testing.assert_array_equal(
+                    load_array(plain, e, name), load_array(cached, e, name)
+                )
+
+    assert list(classes.mesh_cache.keys()) == ["moving"]
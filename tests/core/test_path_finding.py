@@ -0,0 +1,53 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+import bpy
+import numpy as np
+import pytest
+from mathutils import Euler, Vector
+from mathutils.bvhtree import BVHTree
+
+from infinigen.core.placement import path_finding as pf
+from infinigen.core.util import blender as butil
+
+
+def wall_scene():
+    butil.clear_scene()
+    wall = butil.spawn_cube(size=1, location=(0, 0, 1))
+    wall.scale = (0.2, 4, 2)
+    butil.apply_transform(wall)
+    bpy.context.view_layer.update()
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    return BVHTree.FromObject(wall, depsgraph)
+
+
+def test_grid_edges():
+    N = np.array([3, 4, 3])
+    row, col, data = pf.grid_edges(N, penalty=99)
+    assert (row < col).all()
+    assert len(set(zip(row, col))) == len(row)
+
+    degree = np.bincount(np.concatenate([row, col]), minlength=np.prod(N))
+    assert degree.max() == 18
+
+    _, _, k_row = np.unravel_index(row, N)
+    _, _, k_col = np.unravel_index(col, N)
+    assert ((data == 1) == (k_row == k_col)).all()
+
+
+@pytest.mark.parametrize("engine", ["grid", "ray"])
+def test_path_around_wall(engine):
+    bvh = wall_scene()
+    bbox = (np.array([-4, -4, 0]), np.array([4, 4, 2]))
+    start = (Vector((-2, 0, 1)), Euler((np.pi / 2, 0, 0)))
+    end = (Vector((2, 0, 1)), Euler((np.pi / 2, 0, 0)))
+
+    poses = pf.path_finding(bvh, bbox, start, end, resolution=4000, engine=engine)
+    assert poses is not None
+    assert poses[-1][0] > 4  # straight line is blocked
+
+    locs = [p[1] for p in poses]
+    assert (locs[0] - start[0]).length < 1e-6
+    assert (locs[-1] - end[0]).length < 1e-6
+    for a, b in zip(locs[:-1], locs[1:]):
+        assert pf.freespace_ray_check(bvh, a, b)
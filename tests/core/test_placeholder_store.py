@@ -0,0 +1,98 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+import bpy
+import numpy as np
+import pytest
+
+from infinigen.core.placement import camera as cam_util
+from infinigen.core.placement import placement
+from infinigen.core.placement.factory import AssetFactory
+from infinigen.core.placement.placeholder_store import PlaceholderStore
+from infinigen.core.util import blender as butil
+
+
+class SmallCubeFactory(AssetFactory):
+    def create_asset(self, i, placeholder=None, **params):
+        return butil.spawn_cube(size=0.5)
+
+
+class BigPlaceholderFactory(SmallCubeFactory):
+    def create_placeholder(self, **kwargs):
+        return butil.spawn_cube(size=8)
+
+
+def make_camera():
+    scene = bpy.context.scene
+    scene.render.resolution_x, scene.render.resolution_y = 160, 90
+    scene.frame_start, scene.frame_end = 1, 1
+    cam = cam_util.spawn_camera()
+    cam.rotation_euler = (np.pi / 2, 0, 0)
+    return cam
+
+
+def populate(lazy, fac=None, extent=None):
+    butil.clear_scene()
+    cam = make_camera()
+    np.random.seed(0)
+    locs = np.random.uniform((-40, -20, -2), (40, 60, 2), size=(200, 3))
+    fac = fac or SmallCubeFactory(0)
+    col = placement.scatter_placeholders(locs, fac, lazy=lazy, extent=extent)
+    assert (len(col.objects) == 0) == lazy
+    bpy.context.view_layer.update()
+
+    objs, pholders = placement.populate_collection(
+        fac, col, cameras=[cam], dist_cull=50, vis_cull=1, verbose=False
+    )
+    return col, {o.name: (np.array(o.matrix_world), o["dist"]) for _, o in objs}
+
+
+def test_store_roundtrip():
+    butil.clear_scene()
+    store = PlaceholderStore.from_locations(
+        SmallCubeFactory(3), np.random.uniform(size=(10, 3))
+    )
+    store.dists[:5] = 2
+    col = butil.get_collection("placeholders:test")
+    store.save(col)
+
+    loaded = PlaceholderStore.load(col)
+    assert loaded.factories == ["SmallCubeFactory(3)"]
+    for k in ["factory_ids", "inst_seeds", "locs", "rots", "dists", "vis_dists"]:
+        np.testing.assert_array_equal(getattr(loaded, k), getattr(store, k))
+
+
+def test_store_extent():
+    store = PlaceholderStore.from_locations(SmallCubeFactory(0), np.zeros((1, 3)))
+    assert store.extent == 1
+
+    with pytest.raises(ValueError):
+        PlaceholderStore.from_locations(BigPlaceholderFactory(0), np.zeros((1, 3)))
+    store = PlaceholderStore.from_locations(
+        BigPlaceholderFactory(0), np.zeros((1, 3)), extent=4
+    )
+    points, _ = store.cull_points()
+    np.testing.assert_allclose(np.linalg.norm(points, axis=-1), 4 * np.sqrt(3))
+
+
+def test_lazy_populate_extent():
+    fac = BigPlaceholderFactory(0)
+    _, expected = populate(lazy=False, fac=fac)
+    _, lazy = populate(lazy=True, fac=fac, extent=4)
+    assert lazy.keys() == expected.keys()
+
+
+def test_lazy_populate_matches_objects():
+    _, expected = populate(lazy=False)
+    col, lazy = populate(lazy=True)
+
+    assert 0 < len(lazy) < 200
+    assert lazy.keys() == expected.keys()
+    for name, (matrix, dist) in lazy.items():
+        np.testing.assert_allclose(matrix, expected[name][0], atol=1e-5)
+        assert np.isclose(dist, expected[name][1])
+
+    # only placeholders which survived culling became objects
+    assert len([o for o in col.objects if o.parent is None]) == len(lazy)
+    store = PlaceholderStore.load(col)
+    assert (store.dists < 1e7).sum() == len(lazy)
@@ -0,0 +1,83 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+import os
+
+import bpy
+import numpy as np
+
+from infinigen.core.placement import spawn_pool
+from infinigen.core.placement.factory import AssetFactory
+from infinigen.core.util import blender as butil
+
+
+class JitteredCubeFactory(AssetFactory):
+    def create_asset(self, i, placeholder=None, **params):
+        obj = butil.spawn_cube(size=np.random.uniform(0.5, 2))
+        child = butil.spawn_cube(size=0.1, location=np.random.uniform(-1, 1, 3))
+        child.parent = obj
+        return obj
+
+
+def vertex_coords(obj):
+    return np.array([obj.matrix_world @ v.co for v in obj.data.vertices])
+
+
+def spawn(n_workers):
+    butil.clear_scene()
+    fac = JitteredCubeFactory(0)
+    pholder = fac.spawn_placeholder(3, loc=(5, 0, 0), rot=(0, 0, 1))
+
+    specs = [
+        spawn_pool.SpawnSpec(fac, i, loc=(i, 0, 0), rot=(0, 0, 0.1 * i))
+        for i in range(3)
+    ]
+    specs.append(spawn_pool.SpawnSpec(fac, 3, placeholder=pholder.name))
+
+    objs = spawn_pool.spawn_assets(specs, n_workers=n_workers, batch_size=2)
+    bpy.context.view_layer.update()
+    return objs, pholder
+
+
+def test_spawn_pool_matches_local():
+    expected, _ = spawn(n_workers=0)
+    expected = [
+        (o.name, vertex_coords(o), [vertex_coords(c) for c in o.children])
+        for o in expected
+    ]
+
+    objs, pholder = spawn(n_workers=2)
+    assert objs[-1].parent is pholder
+
+    for obj, (name, coords, child_coords) in zip(objs, expected):
+        assert obj.name == name
+        assert obj.name in bpy.context.scene.objects
+        np.testing.assert_allclose(vertex_coords(obj), coords, atol=1e-5)
+        assert len(obj.children) == len(child_coords) == 1
+        np.testing.assert_allclose(
+            vertex_coords(obj.children[0]), child_coords[0], atol=1e-5
+        )
+
+
+_setup_calls = []
+
+
+def _setup(tag):
+    _setup_calls.append(tag)
+
+
+def _cube_job(size):
+    n_before = len(bpy.data.objects)
+    butil.spawn_cube(size=size)
+    return os.getpid(), list(_setup_calls), n_before
+
+
+def test_warm_pool():
+    with spawn_pool.WarmPool(2, setup=_setup, setup_args=("ready",)) as pool:
+        results = list(pool.imap(_cube_job, range(1, 9)))
+
+    pids = {pid for pid, _, _ in results}
+    assert 1 <= len(pids) <= 2
+    for _, setup_calls, n_before in results:
+        assert setup_calls == ["ready"]
+        assert n_before == 0
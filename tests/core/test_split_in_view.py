@@ -0,0 +1,152 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+import bpy
+import gin
+import numpy as np
+
+from infinigen.core.placement import camera as cam_util
+from infinigen.core.placement import placement, split_in_view
+from infinigen.core.util import blender as butil
+from infinigen.core.util.math import homogenize
+
+
+def make_camera():
+    gin.clear_config()  # eg test_gins leaves a get_sensor_coords.H / .W binding behind
+    butil.clear_scene()
+    scene = bpy.context.scene
+    scene.render.resolution_x, scene.render.resolution_y = 160, 90
+    scene.render.resolution_percentage = 100
+    scene.frame_start, scene.frame_end = 1, 5
+
+    cam = cam_util.spawn_camera()
+    cam_util.adjust_camera_sensor(cam)
+    cam.rotation_euler = (np.pi / 2, 0, 0)
+    for frame, x in [(1, 0), (5, 10)]:
+        cam.location = (x, 0, 0)
+        cam.keyframe_insert("location", frame=frame)
+    return cam
+
+
+def reference_inview_distances(points, cameras, dist_max, vis_margin):
+    points = homogenize(points)
+    mask = np.zeros(len(points), dtype=bool)
+    min_dists = np.full(len(points), 1e7)
+    min_vis_dists = np.full(len(points), 1e7)
+    scene = bpy.context.scene
+    for frame in range(scene.frame_start, scene.frame_end + 1):
+        scene.frame_set(frame)
+        for cam in cameras:
+            dists, vis_dists = split_in_view.compute_vis_dists(points, cam)
+            mask |= (dists < dist_max) & (vis_dists < vis_margin)
+            min_vis_dists[mask] = np.minimum(vis_dists[mask], min_vis_dists[mask])
+            min_dists[mask] = np.minimum(dists[mask], min_dists[mask])
+    return mask, min_dists, min_vis_dists
+
+
+def test_inview_distances_match_per_frame():
+    cam = make_camera()
+
+    rng = np.random.default_rng(0)
+    points = rng.uniform([-20, -5, -10], [30, 40, 10], size=(500, 3))
+
+    trajectory = split_in_view.CameraTrajectory([cam])
+    assert trajectory.P.shape == (5, 1, 3, 4)
+
+    expected = reference_inview_distances(points, [cam], dist_max=30, vis_margin=2)
+    for max_elements in [2**22, 7]:
+        res = trajectory.inview_distances(
+            points, dist_max=30, vis_margin=2, max_elements=max_elements
+        )
+        assert (res[0] == expected[0]).all()
+        assert 0 < res[0].mean() < 1
+        np.testing.assert_allclose(res[1], expected[1])
+        np.testing.assert_allclose(res[2], expected[2], atol=1e-4)
+
+
+def test_placeholder_inview_distances():
+    cam = make_camera()
+    split_in_view.clear_camera_trajectories()
+
+    near = butil.spawn_cube(size=1, location=(0, 5, 0))
+    far = butil.spawn_cube(size=1, location=(0, -5, 0))
+    empty = butil.spawn_empty("empty")
+    empty.location = (5, 10, 0)
+    bpy.context.view_layer.update()
+
+    inview, dists, vis_dists = placement.placeholder_inview_distances(
+        [near, far, empty], [cam], dist_max=100, vis_margin=1
+    )
+    assert inview.tolist() == [True, False, True]
+    assert dists[0] < 5 and np.isclose(vis_dists[0], 0)
+
+    traj = split_in_view.get_camera_trajectory([cam])
+    assert split_in_view.get_camera_trajectory([cam]) is traj
+
+
+def test_camera_trajectory_cache_invalidated():
+    cam = make_camera()
+    split_in_view.clear_camera_trajectories()
+    traj = split_in_view.get_camera_trajectory([cam])
+
+    # re-animating the camera
+    cam.location = (0, 0, 5)
+    cam.keyframe_insert("location", frame=5)
+    new = split_in_view.get_camera_trajectory([cam])
+    assert new is not traj
+    assert not np.allclose(new.P, traj.P)
+    assert split_in_view.get_camera_trajectory([cam]) is new
+
+    # or its rig
+    rig = butil.spawn_empty("rig")
+    cam.parent = rig
+    rig.location = (0, 3, 0)
+    assert split_in_view.get_camera_trajectory([cam]) is not new
+
+    # a new scene with a camera of the same name and the same animation
+    cam = make_camera()
+    cam.data.lens *= 2
+    np.testing.assert_allclose(
+        split_in_view.get_camera_trajectory([cam]).K[..., 0, 0], 2 * traj.K[..., 0, 0]
+    )
+
+
+def test_raycast_visibility_engines():
+    cam = make_camera()
+    bpy.context.scene.frame_end = 2
+
+    near = butil.spawn_cube(size=2, location=(0, 6, 0))
+    far = butil.spawn_cube(size=2, location=(0.5, 10, 0.5))
+    obj = butil.join_objects([near, far])
+    butil.modify_mesh(obj, "SUBSURF", levels=2, subdivision_type="SIMPLE")
+    bpy.context.view_layer.update()
+
+    masks = {
+        engine: split_in_view.raycast_visiblity_mask(
+            obj, [cam], verbose=False, stride=4, engine=engine
+        )
+        for engine in ["bvh", "trimesh"]
+    }
+    assert 0 < masks["bvh"].mean() < 0.5
+    assert (masks["bvh"] == masks["trimesh"]).all()
+
+    # strided casts see a subset of what a full resolution cast sees
+    full = split_in_view.raycast_visiblity_mask(obj, [cam], verbose=False)
+    assert full[masks["bvh"]].all()
+
+
+def test_camera_rays_sensor_resolution():
+    cam = make_camera()
+    _, dirs = split_in_view.camera_pixel_rays(cam)
+    assert len(dirs) == 160 * 90
+
+    try:
+        with gin.unlock_config():
+            gin.bind_parameter("get_sensor_coords.H", 45)
+            gin.bind_parameter("get_sensor_coords.W", 80)
+        assert cam_util.sensor_resolution() == (45, 80)
+        origin, dirs = split_in_view.camera_pixel_rays(cam)
+        assert len(dirs) == 45 * 80
+        np.testing.assert_allclose(np.linalg.norm(dirs, axis=-1), 1)
+    finally:
+        gin.clear_config()
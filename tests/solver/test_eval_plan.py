@@ -0,0 +1,188 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+import numpy as np
+import pytest
+
+from infinigen.core import tags as t
+from infinigen.core.constraints import constraint_language as cl
+from infinigen.core.constraints import reasoning as r
+from infinigen.core.constraints.evaluator import eval_memo, eval_plan, evaluate
+from infinigen.core.constraints.example_solver import greedy, state_def
+from infinigen.core.constraints.example_solver.room.base import room_name
+from infinigen.core.util import blender as butil
+from infinigen.core.util import profiling
+from infinigen_examples import generate_indoors
+from infinigen_examples.constraints import home as ex
+from infinigen_examples.constraints import util as cu
+
+
+def make_state():
+    butil.clear_scene()
+
+    objs = {}
+    for i, (tag, x) in enumerate(
+        [
+            (t.Semantics.Chair, 0),
+            (t.Semantics.Chair, 3),
+            (t.Semantics.Table, 6),
+            (t.Semantics.Table, 10),
+        ]
+    ):
+        name = f"{tag.value}_{i}"
+        objs[name] = state_def.ObjectState(
+            obj=butil.spawn_cube(size=1, location=(x, 0, 0), name=name),
+            generator=None,
+            tags={tag},
+            relations=[],
+        )
+    return state_def.State(objs)
+
+
+def make_problem():
+    scene = cl.scene()
+    chairs = scene.tagged({t.Semantics.Chair})
+    tables = scene.tagged({t.Semantics.Table})
+
+    constraints = {
+        "count": chairs.count().in_range(1, 1),
+        "nested": chairs.all(lambda c: tables.all(lambda tb: c.distance(tb) >= 1)),
+        "or": (chairs.count() >= 3) + (tables.count() <= 1),
+    }
+    score_terms = {
+        "sum": chairs.sum(lambda c: c.distance(tables)),
+        "mean": tables.mean(
+            lambda tb: chairs.sum(lambda c: tb.distance(c) + chairs.count())
+        ),
+        "const": cl.constant(2) * tables.count(),
+    }
+    return cl.Problem(constraints, score_terms)
+
+
+def test_eval_plan_matches_interpreter():
+    state = make_state()
+    problem = make_problem()
+
+    plan = eval_plan.compile_problem(problem, batched=False)
+    assert len(plan) < problem.size()
+
+    expected = evaluate.evaluate_problem(problem, state)
+    res = eval_plan.evaluate_plan(plan, state)
+
+    assert res.loss_vals == expected.loss_vals
+    assert res.violations == expected.violations
+    assert res.viol_count() > 0
+
+
+def test_eval_plan_batched():
+    state = make_state()
+    problem = make_problem()
+
+    plan = eval_plan.compile_problem(problem, batched=True)
+    unbatched = eval_plan.compile_problem(problem, batched=False)
+    assert any(pn.batched_impl is not None for pn in plan.nodes)
+    assert all(pn.batched_impl is None for pn in unbatched.nodes)
+
+    res = eval_plan.evaluate_plan(plan, state)
+    expected = eval_plan.evaluate_plan(unbatched, state)
+
+    assert res.violations == expected.violations
+    for k, v in expected.loss_vals.items():
+        assert np.isclose(res.loss_vals[k], v), k
+
+
+def test_eval_plan_evict():
+    state = make_state()
+    problem = make_problem()
+    plan = eval_plan.compile_problem(problem)
+
+    memo_plan, memo_interp = {}, {}
+    eval_plan.evaluate_plan(plan, state, memo=memo_plan)
+    evaluate.evaluate_problem(problem, state, memo=memo_interp)
+
+    obj = state.objs["chair_0"]
+    obj.obj.location.x = -5
+    plan.evict_memo_for_obj(memo_plan, obj)
+    eval_memo.evict_memo_for_obj(problem, memo_interp, obj)
+
+    assert set(memo_interp.keys()).issubset(memo_plan.keys())
+
+    lazy = eval_plan.evaluate_plan(plan, state, memo=memo_plan)
+    fresh = evaluate.evaluate_problem(problem, state)
+    assert lazy.loss_vals == fresh.loss_vals
+    assert lazy.violations == fresh.violations
+
+
+def test_eval_plan_item_memo():
+    state = make_state()
+    problem = make_problem()
+    plan = eval_plan.compile_problem(problem)
+
+    item_memo = {}
+    eval_plan.evaluate_plan(plan, state, item_memo=item_memo)
+    assert len(item_memo) > 0
+
+    obj = state.objs["chair_0"]
+    obj.obj.location.x = -5
+    eval_plan.evict_item_memo(item_memo, ["chair_0"])
+    assert all("chair_0" not in e.accessed for e in item_memo.values())
+
+    lazy = eval_plan.evaluate_plan(plan, state, item_memo=item_memo)
+    fresh = evaluate.evaluate_problem(problem, state)
+    for k, v in fresh.loss_vals.items():
+        assert np.isclose(lazy.loss_vals[k], v), k
+    assert lazy.violations == fresh.violations
+
+
+def test_eval_plan_profiling():
+    state = make_state()
+    problem = make_problem()
+    plan = eval_plan.compile_problem(problem)
+
+    profiling.start()
+    try:
+        memo = {}
+        eval_plan.evaluate_plan(plan, state, memo=memo)
+        eval_plan.evaluate_plan(plan, state, memo=memo)
+    finally:
+        profile = profiling.stop()
+
+    assert profiling.active() is None
+    assert profile.impls["nested", "distance"][0] > 0
+    hits, misses = profile.caches["eval_memo"]
+    assert hits > 0 and misses > 0
+
+    records = profile.records(stage="test")
+    assert {r["kind"] for r in records} == {"impl", "cache"}
+    assert all(r["stage"] == "test" for r in records)
+
+
+@pytest.mark.parametrize("rtype", [t.Semantics.Bedroom, t.Semantics.LivingRoom])
+def test_eval_plan_home_filtered(rtype):
+    prob = ex.home_furniture_constraints()
+
+    ostate_name = room_name(rtype, 0)
+    state = state_def.State(
+        {
+            ostate_name: state_def.ObjectState(
+                obj=butil.spawn_cube(),
+                generator=None,
+                tags={rtype, t.Semantics.Room},
+                relations=[],
+            )
+        }
+    )
+    greedy.update_active_flags(state, {cu.variable_room: ostate_name})
+
+    filter = generate_indoors.default_greedy_stages()["on_floor_freestanding"]
+    filter = r.domain_tag_substitute(
+        filter, cu.variable_room, r.Domain({rtype, t.Semantics.Room})
+    )
+
+    plan = eval_plan.compile_problem(prob)
+    expected = evaluate.evaluate_problem(prob, state, filter)
+    res = eval_plan.evaluate_plan(plan, state, filter)
+
+    assert res.loss_vals == expected.loss_vals
+    assert res.violations == expected.violations
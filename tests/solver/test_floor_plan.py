@@ -0,0 +1,104 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+import multiprocessing
+
+import gin
+import numpy as np
+import pytest
+import shapely
+
+from infinigen.core.constraints import constraint_language as cl
+from infinigen.core.constraints.example_solver.room import floor_plan
+from infinigen.core.constraints.example_solver.room.utils import (
+    changed_rooms,
+    cow_copy,
+    writable,
+)
+from infinigen.core.constraints.example_solver.state_def import (
+    ObjectState,
+    RelationState,
+    State,
+)
+from infinigen.core.util.math import FixedSeed
+from infinigen_examples.constraints import home
+
+
+def make_rooms():
+    return State(
+        {
+            k: ObjectState(
+                polygon=shapely.box(i, 0, i + 1, 1),
+                relations=[RelationState(cl.Traverse(), "b" if k == "a" else "a")],
+            )
+            for i, k in enumerate(["a", "b"])
+        }
+    )
+
+
+def test_cow_copy():
+    state = make_rooms()
+    state_ = cow_copy(state)
+    assert state_.objs is not state.objs
+    assert all(state_[k] is state[k] for k in state.objs)
+    assert changed_rooms(state_, state) == set()
+
+    o = writable(state_, state, "a")
+    assert o is not state["a"] and state_["a"] is o
+    assert o.relations[0] is not state["a"].relations[0]
+    o.polygon = shapely.box(0, 0, 2, 1)
+    o.relations[0].value = shapely.MultiLineString([])
+    assert state["a"].polygon.area == 1
+    assert state["a"].relations[0].value is None
+
+    # a second write reuses the copy, and rooms never written stay shared
+    assert writable(state_, state, "a") is o
+    assert state_["b"] is state["b"]
+    assert changed_rooms(state_, state) == {"a"}
+
+    # without an origin there is nothing to protect
+    assert writable(state_, None, "b") is state["b"]
+
+
+@pytest.fixture(scope="module")
+def solver():
+    gin.clear_config()  # eg test_gins leaves the last config it loaded bound
+    with FixedSeed(0):
+        consgraph = home.home_room_constraints()
+    solver = floor_plan.FloorPlanSolver(0, consgraph, n_divide_trials=5)
+    assert solver.n_divide_workers == 1  # parallel division is opt-in
+    return solver
+
+
+# seeds whose first success is the 2nd and 3rd trial, ie mid-batch and in a second batch
+@pytest.mark.parametrize("seed", [6, 11])
+def test_divide_segments_parallel(solver, seed):
+    with FixedSeed(seed):
+        pholder = solver.contour_factory.add_staircase(solver.contours[-1])
+
+    def divide(pool):
+        with FixedSeed(seed):
+            st = solver.divide_segments(0, pholder, pool)
+            return st, np.random.randint(1e9)
+
+    serial, serial_next = divide(None)
+
+    solver.n_divide_workers = 2
+    pool = multiprocessing.get_context("fork").Pool(
+        solver.n_divide_workers,
+        initializer=floor_plan._init_segment_pool,
+        initargs=(solver.segment_makers,),
+    )
+    try:
+        parallel, parallel_next = divide(pool)
+    finally:
+        pool.terminate()
+        solver.n_divide_workers = 1
+
+    assert serial is not None and parallel is not None
+    assert serial.objs.keys() == parallel.objs.keys()
+    for k, o in serial.objs.items():
+        assert o.polygon.equals(parallel.objs[k].polygon), k
+    # the global RNG stream continues as if the trials had run sequentially
+    assert serial_next == parallel_next
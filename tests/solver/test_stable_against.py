@@ -8,13 +8,20 @@ import bpy
 
 # import pytest
 import numpy as np
+import trimesh
 from mathutils import Vector
 
 from infinigen.core import tagging
 from infinigen.core import tags as t
 from infinigen.core.constraints import constraint_language as cl
+from infinigen.core.constraints.constraint_language import util as iu
 from infinigen.core.constraints.example_solver import state_def
-from infinigen.core.constraints.example_solver.geometry import parse_scene, validity
+from infinigen.core.constraints.example_solver.geometry import (
+    parse_scene,
+    spatial_index,
+    stability,
+    validity,
+)
 from infinigen.core.util import blender as butil
 
 
@@ -116,6 +123,51 @@ def test_stable_against():
     assert not validity.check_post_move_validity(make_scene((4, 4, 0.5)), "cup")
 
 
+def test_support_feasible():
+    # bounding box prefilter must never reject a pose the exact check accepts
+    for loc in [(0, 0, 1), (2, 2, 1), (2.1, 2.1, 1), (-2, 1, 1.5), (4, 4, 0.5)]:
+        state = make_scene(loc)
+        exact = stability.stable_against(state, "cup", state.objs["cup"].relations[0])
+        if exact:
+            assert spatial_index.support_feasible(state, "cup")
+
+    state = make_scene((0, 0, 1))
+    assert spatial_index.support_feasible(state, "cup")
+    assert spatial_index.support_feasible(state, "cup", np.array([1.9, 0, 0]))
+    assert not spatial_index.support_feasible(state, "cup", np.array([3, 0, 0]))
+
+    # index follows poses moved through the trimesh scene
+    iu.translate(state.trimesh_scene, state.objs["cup"].obj.name, (4, 0, 0))
+    assert not spatial_index.support_feasible(state, "cup")
+    assert not state.spatial_index.may_overlap(state, "cup", ["table"])
+    assert validity.check_post_move_validity(make_scene((0, 0, 1)), "cup")
+
+
+def test_footprints_cached():
+    state = make_scene((0, 0, 1))
+    cup = state.objs["cup"].obj
+    mesh = iu.meshes_from_names(state.trimesh_scene, cup.name)[0]
+    normal, origin = np.array([0, 0, 1.0]), np.array([0, 0, 1.0])
+
+    state.footprints.projected(mesh, normal, origin, key=("cup",))
+    assert len(state.footprints._cache) == 1
+
+    # translations and rotations about the normal reuse the cached polygon
+    for move in [(1, 0.5, 0), (-0.3, 0.2, 0)]:
+        iu.translate(state.trimesh_scene, cup.name, move)
+        iu.rotate(state.trimesh_scene, cup.name, (0, 0, 1), 0.3)
+        mesh = iu.meshes_from_names(state.trimesh_scene, cup.name)[0]
+
+        cached = state.footprints.projected(mesh, normal, origin, key=("cup",))
+        fresh = trimesh.path.polygons.projected(mesh, normal, origin)
+        assert len(state.footprints._cache) == 1
+        assert cached.symmetric_difference(fresh).area < 1e-4 * fresh.area
+
+    assert stability.stable_against(state, "cup", state.objs["cup"].relations[0])
+    iu.translate(state.trimesh_scene, cup.name, (3, 0, 0))
+    assert not stability.stable_against(state, "cup", state.objs["cup"].relations[0])
+
+
 def test_horizontal_stability():
     butil.clear_scene()
     objs = {}
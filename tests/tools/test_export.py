@@ -6,6 +6,7 @@
 
 
 import bpy
+import numpy as np
 import pytest
 
 from infinigen.assets.objects.mollusk import MolluskFactory
@@ -80,4 +81,225 @@ def test_export_curr_scene(format, tmp_path):
     # TODO David Yan add other guarantees (count objects, count/names of materials, any others)
 
 
+def spawn_mollusks():
+    butil.clear_scene()
+    asset1 = MolluskFactory(0).spawn_asset(0)
+    asset2 = MolluskFactory(0).spawn_asset(1)
+    asset2.location.x += 10
+    return asset1, asset2
+
+
+def test_export_bake_cache(tmp_path):
+    spawn_mollusks()
+    export.export_curr_scene(tmp_path, "obj", image_res=TEST_IMAGE_RES, bake_cache=True)
+    textures = {p: p.stat().st_mtime_ns for p in tmp_path.glob("textures/*.png")}
+    assert len(textures) > 0
+    assert (tmp_path / "textures" / export.BakeCache.FILENAME).exists()
+
+    # identical scene, every pass is served from the cache without rewriting its png
+    spawn_mollusks()
+    export.export_curr_scene(tmp_path, "obj", image_res=TEST_IMAGE_RES, bake_cache=True)
+    for p, mtime in textures.items():
+        assert p.stat().st_mtime_ns == mtime
+
+
+def test_export_bake_workers(tmp_path):
+    spawn_mollusks()
+    serial = tmp_path / "serial"
+    serial.mkdir()
+    export.export_curr_scene(serial, "obj", image_res=TEST_IMAGE_RES)
+
+    spawn_mollusks()
+    parallel = tmp_path / "parallel"
+    parallel.mkdir()
+    file = export.export_curr_scene(
+        parallel, "obj", image_res=TEST_IMAGE_RES, bake_workers=2
+    )
+
+    names = sorted(p.name for p in (serial / "textures").glob("*.png"))
+    assert len(names) > 0
+    assert names == sorted(p.name for p in (parallel / "textures").glob("*.png"))
+
+    mtl = file.with_suffix(".mtl").read_text()
+    for name in names:
+        assert name in mtl
+
+
+def test_triangulate_meshes():
+    butil.clear_scene()
+    bpy.ops.mesh.primitive_cylinder_add(vertices=8)
+    cyl = bpy.context.active_object
+    cube = butil.spawn_cube()
+    linked = butil.spawn_cube()
+    linked.data = cube.data
+
+    expected = cyl.data.copy()
+    with butil.ViewportMode(cyl, mode="EDIT"):
+        bpy.ops.mesh.select_all(action="SELECT")
+        bpy.ops.mesh.quads_convert_to_tris()
+    expected, cyl.data = cyl.data, expected
+
+    export.triangulate_meshes()
+    assert len(cube.data.polygons) == 12
+    assert len(cyl.data.polygons) == len(expected.polygons)
+    assert all(len(p.vertices) == 3 for p in cyl.data.polygons)
+    assert not export.triangulate_mesh(cube.data)
+
+
+def spawn_textured_cubes(node_type, output):
+    butil.clear_scene()
+    mat = bpy.data.materials.new("cube_mat")
+    mat.use_nodes = True
+    nodes, links = mat.node_tree.nodes, mat.node_tree.links
+    coord = nodes.new(node_type)
+    noise = nodes.new("ShaderNodeTexNoise")
+    links.new(coord.outputs[output], noise.inputs["Vector"])
+    links.new(noise.outputs["Color"], nodes["Principled BSDF"].inputs["Base Color"])
+
+    cubes = []
+    for x in [0, 5, 10]:
+        cube = butil.spawn_cube(location=(x, 0, 0))
+        cube.data.materials.append(mat)
+        cubes.append(cube)
+    return cubes
+
+
+def add_second_material(cubes, colors, node_type=None, output=None):
+    for cube, color in zip(cubes, colors):
+        mat = bpy.data.materials.new("second_mat")
+        mat.use_nodes = True
+        nodes, links = mat.node_tree.nodes, mat.node_tree.links
+        nodes["Principled BSDF"].inputs["Base Color"].default_value = color
+        if node_type is not None:
+            coord = nodes.new(node_type)
+            links.new(coord.outputs[output], nodes["Principled BSDF"].inputs["Normal"])
+        cube.data.materials.append(mat)
+
+
+def test_bake_cache_key_second_material():
+    cubes = spawn_textured_cubes("ShaderNodeTexCoord", "Generated")[:2]
+    for cube in cubes:
+        cube.location = (0, 0, 0)
+    bpy.context.view_layer.update()
+    add_second_material(cubes, [(1, 0, 0, 1), (1, 0, 0, 1)])
+    keys = [export.bake_cache_key(c, 32, False) for c in cubes]
+    assert keys[0] == keys[1]
+
+    cubes[1].data.materials[1].node_tree.nodes["Principled BSDF"].inputs[
+        "Base Color"
+    ].default_value = (0, 1, 0, 1)
+    assert export.bake_cache_key(cubes[1], 32, False) != keys[0]
+
+
+def test_group_shared_bakes():
+    cubes = spawn_textured_cubes("ShaderNodeTexCoord", "Object")
+    assert export.group_shared_bakes(cubes) == {cubes[0]: cubes[1:]}
+
+    cubes = spawn_textured_cubes("ShaderNodeNewGeometry", "Position")
+    assert export.group_shared_bakes(cubes) == {c: [] for c in cubes}
+
+    cubes = spawn_textured_cubes("ShaderNodeAmbientOcclusion", "AO")
+    assert export.group_shared_bakes(cubes) == {c: [] for c in cubes}
+
+    # only the second material slot differs, by colour or by reading world space
+    cubes = spawn_textured_cubes("ShaderNodeTexCoord", "Object")
+    add_second_material(cubes, [(1, 0, 0, 1), (1, 0, 0, 1), (0, 1, 0, 1)])
+    assert export.group_shared_bakes(cubes) == {cubes[0]: [cubes[1]], cubes[2]: []}
+
+    cubes = spawn_textured_cubes("ShaderNodeTexCoord", "Object")
+    add_second_material(
+        cubes, [(1, 0, 0, 1)] * 3, node_type="ShaderNodeNewGeometry", output="Normal"
+    )
+    assert export.group_shared_bakes(cubes) == {c: [] for c in cubes}
+
+
+def test_export_share_bakes(tmp_path):
+    cubes = spawn_textured_cubes("ShaderNodeTexCoord", "Generated")
+    export.export_curr_scene(tmp_path, "obj", image_res=TEST_IMAGE_RES)
+
+    textures = list((tmp_path / "textures").glob("*.png"))
+    assert len(textures) > 0
+    assert all(cubes[0].name in p.name for p in textures)
+
+    for cube in cubes[1:]:
+        assert cube.data.uv_layers.keys() == ["ExportUV"]
+        assert cube.active_material == cubes[0].active_material
+
+
+def spawn_scatter(n=8):
+    butil.clear_scene()
+    proto = spawn_textured_cubes("ShaderNodeTexCoord", "Generated")[0]
+    butil.delete(bpy.data.objects[1:])
+    butil.put_in_collection(proto, "assets")
+    bpy.data.collections["assets"].hide_render = True
+
+    bpy.ops.mesh.primitive_grid_add(x_subdivisions=n, y_subdivisions=n, size=20)
+    grid = bpy.context.active_object
+    grid.name = "scatter"
+    ng = bpy.data.node_groups.new("scatter", "GeometryNodeTree")
+    ng.interface.new_socket(
+        "Geometry", in_out="INPUT", socket_type="NodeSocketGeometry"
+    )
+    ng.interface.new_socket(
+        "Geometry", in_out="OUTPUT", socket_type="NodeSocketGeometry"
+    )
+    inst = ng.nodes.new("GeometryNodeInstanceOnPoints")
+    info = ng.nodes.new("GeometryNodeObjectInfo")
+    info.inputs["Object"].default_value = proto
+    info.inputs["As Instance"].default_value = True
+    ng.links.new(ng.nodes.new("NodeGroupInput").outputs[0], inst.inputs["Points"])
+    ng.links.new(info.outputs["Geometry"], inst.inputs["Instance"])
+    ng.links.new(inst.outputs[0], ng.nodes.new("NodeGroupOutput").inputs[0])
+    grid.modifiers.new("scatter", "NODES").node_group = ng
+    return proto, grid
+
+
+def test_export_usd_instancing(tmp_path):
+    proto, grid = spawn_scatter()
+    assert export.scatter_instancers() == {grid}
+
+    sizes = {}
+    for usd_instancing in [False, True]:
+        spawn_scatter()
+        folder = tmp_path / str(usd_instancing)
+        folder.mkdir()
+        file = export.export_curr_scene(
+            folder, "usda", image_res=TEST_IMAGE_RES, usd_instancing=usd_instancing
+        )
+        sizes[usd_instancing] = file.stat().st_size
+
+    assert "references" in file.read_text()
+    assert sizes[True] < sizes[False] / 2
+
+
+def test_export_fracture(tmp_path):
+    spawn_textured_cubes("ShaderNodeTexCoord", "Generated")
+    export.export_curr_scene(
+        tmp_path,
+        "obj",
+        image_res=TEST_IMAGE_RES,
+        fracture_pieces=4,
+        fracture_workers=2,
+    )
+
+    files = list((tmp_path / "fracture").glob("*.npz"))
+    assert len(files) == 3
+    for file in files:
+        res = np.load(file)
+        assert len(res["volumes"]) == 4
+        np.testing.assert_allclose(res["volumes"].sum(), 1)
+        assert len(list(file.with_suffix("").glob("piece_*.obj"))) == 4
+
+
 # TODO test all export.py features, including individual export, transparent mats, instances
+
+
+def test_make_args_nested_workers(monkeypatch):
+    argv = ["export.py", "-f", "usdc", "--n_workers", "2"]
+    monkeypatch.setattr("sys.argv", argv)
+    assert export.make_args().n_workers == 2
+
+    for flag in ["--bake_workers", "--fracture_workers"]:
+        monkeypatch.setattr("sys.argv", argv + [flag, "2"])
+        with pytest.raises(ValueError):
+            export.make_args()
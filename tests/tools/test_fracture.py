@@ -0,0 +1,48 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+import numpy as np
+import pytest
+import trimesh
+
+from infinigen.tools import fracture
+
+
+def test_clip_triangles():
+    mesh = trimesh.creation.icosphere(2)
+    tris = mesh.vertices[mesh.faces]
+    normal, offset = np.array([0, 0.6, 0.8]), 0.3
+
+    clipped = fracture.clip_triangles(tris, normal, offset)
+    assert (clipped @ normal <= offset + 1e-9).all()
+
+    # area is preserved between the two halves, and winding is kept
+    other = fracture.clip_triangles(tris, -normal, -offset)
+    area = trimesh.triangles.area(tris).sum()
+    halves = trimesh.triangles.area(clipped).sum() + trimesh.triangles.area(other).sum()
+    np.testing.assert_allclose(area, halves)
+    normals = trimesh.triangles.normals(clipped)[0]
+    assert (np.einsum("ij,ij->i", normals, clipped.mean(1)) > 0).all()
+
+
+@pytest.mark.parametrize("make", [trimesh.creation.box, trimesh.creation.icosphere])
+def test_fracture_volumes(make):
+    mesh = make()
+    res = fracture.fracture(mesh.vertices, mesh.faces, 8, seed=0, density=2)
+
+    assert len(res["volumes"]) == 8
+    assert (res["volumes"] > 0).all()
+    np.testing.assert_allclose(res["volumes"].sum(), mesh.volume)
+    np.testing.assert_allclose(res["masses"], 2 * res["volumes"])
+    np.testing.assert_allclose(
+        (res["centroids"] * res["volumes"][:, None]).sum(0) / mesh.volume,
+        mesh.center_mass,
+        atol=1e-9,
+    )
+    assert res["interior"].any() and not res["interior"].all()
+    assert (mesh.contains(res["seeds"])).all()
+
+    # same seed, same pieces
+    again = fracture.fracture(mesh.vertices, mesh.faces, 8, seed=0, density=2)
+    np.testing.assert_array_equal(res["seeds"], again["seeds"])
@@ -0,0 +1,70 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+import json
+
+import numpy as np
+import pytest
+
+from infinigen.tools import mesh_index
+
+
+def make_entries(n):
+    rng = np.random.default_rng(0)
+    entries = []
+    for i in range(n):
+        entries.append(
+            {
+                "filename": f"saved_mesh_{i % 3:04d}.npz",
+                "mesh_id": f"{i:012x}",
+                "object_name": f"obj_{i}.spawn_asset(0)",
+                "num_verts": int(rng.integers(0, 1000)),
+                "children": list(range(i % 4)),
+                "object_type": "MESH",
+                "num_instances": 1,
+                "object_idx": i + 1,
+                "num_faces": 12,
+                "materials": ["a", "b"],
+                "unapplied_modifiers": [],
+                "instance_bbox": rng.uniform(size=(8, 3)).tolist(),
+                "store": {"vertices": ["../mesh_store/store_0000.npz", "abc"]},
+            }
+        )
+    entries.append(
+        {
+            "object_name": "sun",
+            "object_type": "LIGHT",
+            "children": [],
+            "bbox": rng.uniform(size=(8, 3)).tolist(),
+            "object_idx": n + 1,
+        }
+    )
+    return entries
+
+
+@pytest.mark.parametrize("n", [0, 1, 50])
+def test_mesh_index_roundtrip(tmp_path, n):
+    entries = make_entries(n)
+    json_path = tmp_path / "saved_mesh.json"
+    json_path.write_text(json.dumps(entries))
+    index = mesh_index.MeshIndex(mesh_index.convert_json(json_path))
+
+    assert len(index) == len(entries)
+    for i, entry in enumerate(entries):
+        assert index.entry(i) == entry
+        if "mesh_id" in entry:
+            assert index.find(entry["mesh_id"]) == i
+            assert index.filename(i) == entry["filename"]
+            assert index[entry["mesh_id"]] == entry
+
+    assert index.find("missing") == -1
+    with pytest.raises(KeyError):
+        index["missing"]
+
+
+def test_mesh_index_rejects_other_files(tmp_path):
+    path = tmp_path / "saved_mesh.idx"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        mesh_index.MeshIndex(path)